@@ -1,114 +1,71 @@
 # samastat_dashboard.py
 
 import streamlit as st
-import pandas as pd
-import random
 
-# 🎯 LISTES DE BASE
-cultures = ["Riz", "Maïs", "Tomate", "Oignon"]
-regions = ["Saint-Louis", "Dagana", "Podor", "Matam"]
-techniques = ["traditionnelle", "semi-intensive", "intensive"]
+from samastat.chargement import ProgressiveLoader
+from samastat.donnees import check_session_budget, shared_dataset
+from samastat.instrumentation import begin_rerun, end_rerun, instrument
+from samastat.saed import dashboard_datasets, datasets_version
 
-# 🌾 AGRICULTURE
-def simulate_agriculture(n):
-    data = []
-    for _ in range(n):
-        data.append({
-            "Campagne": random.choice(["2022", "2023", "2024"]),
-            "Région": random.choice(regions),
-            "Culture": random.choice(cultures),
-            "Superficie_ha": round(random.uniform(10, 100), 2),
-            "Rendement_t_ha": round(random.uniform(2.5, 6), 2),
-            "Technique": random.choice(techniques)
-        })
-    return pd.DataFrame(data)
+# 🔢 DONNÉES : artefact publié par le planificateur (simulé ici à défaut), partagé entre les sessions
+# et relu à chaque nouvelle publication (clé : version de l'artefact)
+@shared_dataset(max_entries=2)
+@instrument()
+def load_saed(version):
+    return dashboard_datasets()
 
-# 💧 IRRIGATION
-def simulate_irrigation(n):
-    types = ["gravitaire", "goutte-à-goutte", "aspersion"]
-    états = ["fonctionnelle", "endommagée", "à réhabiliter"]
-    freq = ["quotidienne", "hebdomadaire", "mensuelle"]
-    data = []
-    for _ in range(n):
-        data.append({
-            "Campagne": random.choice(["2022", "2023", "2024"]),
-            "Zone_irriguee": random.choice(regions),
-            "Type_irrigation": random.choice(types),
-            "État_infrastructure": random.choice(états),
-            "Fréquence_irrigation": random.choice(freq)
-        })
-    return pd.DataFrame(data)
+def load_agriculture():
+    return load_saed(datasets_version())["agriculture"]
 
-# 👥 PRODUCTEURS
-def simulate_producteurs(n):
-    statuts = ["individuel", "coopérative", "GIE"]
-    data = []
-    for _ in range(n):
-        data.append({
-            "Nom": f"Producteur_{random.randint(1,999)}",
-            "Sexe": random.choice(["H", "F"]),
-            "Âge": random.randint(20, 65),
-            "Statut": random.choice(statuts),
-            "Région": random.choice(regions),
-            "Culture": random.choice(cultures)
-        })
-    return pd.DataFrame(data)
+def load_irrigation():
+    return load_saed(datasets_version())["irrigation"]
 
-# 💰 FINANCEMENT
-def simulate_financement(n):
-    sources = ["SAED", "Bailleur A", "Fonds coopératif"]
-    types = ["crédit", "subvention", "appui technique"]
-    data = []
-    for _ in range(n):
-        data.append({
-            "Année": random.choice(["2022", "2023", "2024"]),
-            "Source": random.choice(sources),
-            "Type_financement": random.choice(types),
-            "Montant": random.randint(500000, 5000000)
-        })
-    return pd.DataFrame(data)
-
-# 🔢 GÉNÉRATION DES DONNÉES
-agri_df = simulate_agriculture(50)
-irrig_df = simulate_irrigation(50)
-prod_df = simulate_producteurs(50)
-fin_df = simulate_financement(50)
+def load_producteurs():
+    return load_saed(datasets_version())["producteurs"]
+
+def load_financement():
+    return load_saed(datasets_version())["financement"]
+
+# 📦 FUSION POUR EXPORT CSV
+def financement_par_annee():
+    return load_saed(datasets_version())["financement_annuel"]
+
+def export_csv():
+    return load_saed(datasets_version())["export_csv"]
 
 # 🎛️ INTERFACE STREAMLIT
 st.set_page_config(page_title="SamaStat SAED", layout="wide")
+begin_rerun("samastat_saed_dashboard")
 st.title("📊 Tableau de bord SamaStat – SAED")
 
 st.markdown("Bienvenue sur la plateforme statistique interactive dédiée à la SAED. Explorez, filtrez, téléchargez et donnez votre avis ! 💼")
 
+# Chaque bloc est chargé en parallèle et s'affiche dès que ses données sont prêtes
+loader = ProgressiveLoader()
+
 # 🌾 AGRICULTURE
 st.subheader("🌾 Données agricoles")
-st.dataframe(agri_df)
+loader.submit(load_agriculture, render=st.dataframe)
 
 # 💧 IRRIGATION
 st.subheader("💧 Données d'irrigation")
-st.dataframe(irrig_df)
+loader.submit(load_irrigation, render=st.dataframe)
 
 # 👥 PRODUCTEURS
 st.subheader("👥 Données des producteurs")
-st.dataframe(prod_df)
+loader.submit(load_producteurs, render=st.dataframe)
 
 # 💰 FINANCEMENT
 st.subheader("💰 Données de financement")
-st.dataframe(fin_df)
+loader.submit(load_financement, render=st.dataframe)
 
 # 📊 GRAPHIQUE FINANCEMENT
 st.subheader("📈 Financement par année")
-st.bar_chart(fin_df.groupby("Année")["Montant"].sum())
-
-# 📦 FUSION POUR EXPORT CSV
-merged_df = agri_df.merge(irrig_df, left_on=["Campagne", "Région"], right_on=["Campagne", "Zone_irriguee"], how="left")
-merged_df = merged_df.merge(fin_df, left_on="Campagne", right_on="Année", how="left")
-
-csv = merged_df.to_csv(index=False).encode('utf-8')
+loader.submit(financement_par_annee, render=st.bar_chart)
 
 # 📤 EXPORT CSV
 st.subheader("📥 Export des données consolidées")
-st.download_button("Télécharger le fichier CSV", data=csv, file_name="samastat_saed.csv", mime="text/csv")
+loader.submit(export_csv, render=lambda csv: st.download_button("Télécharger le fichier CSV", data=csv, file_name="samastat_saed.csv", mime="text/csv"))
 
 # 🗣️ COMMENTAIRE UTILISATEUR
 st.subheader("📝 Votre avis sur SamaStat")
@@ -118,3 +75,7 @@ commentaire = st.text_area("Comment améliorer cette application ?")
 if st.button("📨 Soumettre votre avis"):
     st.success("Merci pour votre retour, il a bien été enregistré (simulation). 🙏")
 
+loader.render_as_completed()
+check_session_budget()
+end_rerun()
+
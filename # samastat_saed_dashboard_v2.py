@@ -9,10 +9,14 @@ import pandas as pd
 import random
 from fpdf import FPDF
 
+from samastat.donnees import check_session_budget, shared_dataset
+from samastat.instrumentation import begin_rerun, end_rerun, instrument
+
 # ─────────────────────────────────────────────
 # 🖼️ SECTION 1 — Logo & Configuration
 # ─────────────────────────────────────────────
 st.set_page_config(page_title="SamaStat SAED", layout="wide")
+begin_rerun("samastat_saed_dashboard_v2")
 st.sidebar.image("logo_samastat.png", use_column_width=True)
 st.sidebar.title("🔐 Authentification")
 
@@ -54,7 +58,12 @@ if st.session_state.logged_in:
             })
         return pd.DataFrame(data)
 
-    agri_df = simulate_agriculture(50)
+    # Données simulées une seule fois par processus, partagées en lecture seule
+    @shared_dataset
+    def load_agriculture():
+        return simulate_agriculture(50)
+
+    agri_df = load_agriculture()
 
     # 📊 3B — Affichage du tableau de bord
     st.title("📊 Tableau de bord SamaStat – SAED")
@@ -72,6 +81,7 @@ if st.session_state.logged_in:
         st.success("✅ Merci pour votre retour (simulation enregistrée)")
 
     # 📄 3E — Génération du rapport PDF
+    @instrument()
     def generate_pdf(data):
         pdf = FPDF()
         pdf.add_page()
@@ -89,5 +99,8 @@ if st.session_state.logged_in:
         with open(path, "rb") as f:
             st.download_button("📥 Télécharger le rapport", f, file_name="rapport_samastat.pdf")
 
+    check_session_budget()
+    end_rerun()
+
 else:
     st.warning("🔒 Veuillez vous connecter pour accéder au dashboard.")
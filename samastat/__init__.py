@@ -0,0 +1,25 @@
+"""Noyau commun des applications SamaStat.
+
+Chaque application Streamlit (mairie, SAED, scolaire, régions) n'est qu'une page mince
+au-dessus de ces modules : une optimisation faite ici profite à toutes.
+
+- ``auth`` : comptes, connexion, administration des comptes ;
+- ``comptes`` : création de comptes en masse ;
+- ``limiteur`` : limitation des tentatives de connexion ;
+- ``sessions`` : sessions serveur à jetons signés ;
+- ``donnees`` : jeux de données partagés entre sessions, fichiers JSON, budget mémoire ;
+- ``chargement`` : chargements concurrents et affichage progressif ;
+- ``instrumentation`` : chronométrage des reruns et des étapes ;
+- ``mairie``, ``scolaire``, ``saed``, ``regions``, ``previsions`` : données et graphiques par domaine ;
+- ``hierarchie`` : hiérarchie région → département → commune et agrégats ;
+- ``ponderation`` : moyennes, médianes et quantiles pondérés ;
+- ``tables`` : tableaux d'indicateurs par territoire, sources et masques de sélection ;
+- ``prechauffage`` : préchauffage des caches au déploiement ;
+- ``artefacts``, ``planificateur`` : graphe des artefacts précalculés et leur rafraîchissement planifié ;
+- ``validation`` : validation et nettoyage des fichiers déposés ;
+- ``statistiques`` : corrélations, quantiles et notes par groupe du module scolaire ;
+- ``risque`` : score de risque d'échec des étudiants ;
+- ``animation`` : courbes animées pré-agrégées ;
+- ``carte``, ``choroplethe`` : cartes des communes ;
+- ``modeles`` : registre des modèles de prévision pré-entraînés.
+"""
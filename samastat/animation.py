@@ -0,0 +1,76 @@
+"""Courbes animées légères : images pré-agrégées sur le serveur, transmises en deltas.
+
+Au lieu d'une image par valeur distincte d'une colonne (``animation_frame`` de Plotly
+Express, qui recopie toutes les traces dans chaque image), la table est d'abord réduite
+à une moyenne par groupe et par étape. La figure de base porte les abscisses, les axes
+et le style ; chaque image ne contient que les ordonnées des traces qui évoluent.
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+# --- PARAMÈTRES ---
+FRAME_DURATION_MS = 700
+TRANSITION_MS = 300
+
+
+def stage_means(df, stages, group_col):
+    """Moyenne de chaque groupe (lignes) à chaque étape (colonnes) ; ``stages`` : {colonne: libellé}."""
+    return (df.groupby(group_col, observed=True)[list(stages)].mean()
+            .rename(columns=stages).round(2))
+
+
+def period_means(df, period_col, value_col, group_col):
+    """Moyenne de ``value_col`` par groupe (lignes) et par période (colonnes, dans l'ordre)."""
+    return (df.pivot_table(index=group_col, columns=period_col, values=value_col, aggfunc="mean", observed=True)
+            .sort_index(axis=1).round(2))
+
+
+def _revealed(values, step):
+    """Ordonnées connues jusqu'à l'étape ``step`` incluse ; ``None`` au-delà (point non tracé)."""
+    return [None if j > step or np.isnan(v) else float(v) for j, v in enumerate(values)]
+
+
+def animated_lines(table, title, y_title):
+    """Une courbe par ligne de ``table`` ; l'image k révèle la colonne k.
+
+    Les images ne portent que ``y``, et seulement pour les traces qui évoluent d'une
+    étape à l'autre (``traces``) ; abscisses, noms et styles restent dans la figure de base.
+    """
+    steps = [str(step) for step in table.columns]
+    values = table.to_numpy(dtype=np.float64)
+    revealed = [[_revealed(row, step) for step in range(len(steps))] for row in values]
+    # Une trace identique à toutes les étapes n'a pas besoin de figurer dans les images.
+    moving = [i for i, series in enumerate(revealed) if any(y != series[0] for y in series)]
+
+    fig = go.Figure([
+        go.Scatter(x=steps, y=series[0], mode="lines+markers", name=str(group))
+        for group, series in zip(table.index, revealed)
+    ])
+    fig.frames = [
+        go.Frame(name=label, data=[go.Scatter(y=revealed[i][step]) for i in moving], traces=moving)
+        for step, label in enumerate(steps)
+    ]
+
+    finite = values[np.isfinite(values)]
+    margin = max(1.0, 0.05 * (finite.max() - finite.min())) if finite.size else 1.0
+    play = {"frame": {"duration": FRAME_DURATION_MS, "redraw": False},
+            "transition": {"duration": TRANSITION_MS}, "fromcurrent": True}
+    fig.update_layout(
+        title=title, yaxis_title=y_title,
+        xaxis={"type": "category", "categoryorder": "array", "categoryarray": steps},
+        yaxis={"range": [finite.min() - margin, finite.max() + margin] if finite.size else None},
+        updatemenus=[{"type": "buttons", "showactive": False, "x": 0, "y": -0.15, "xanchor": "left",
+                      "buttons": [{"label": "▶", "method": "animate", "args": [None, play]},
+                                  {"label": "⏸", "method": "animate",
+                                   "args": [[None], {"frame": {"duration": 0}, "mode": "immediate"}]}]}],
+        sliders=[{"x": 0.1, "y": -0.15, "len": 0.9, "currentvalue": {"prefix": ""},
+                  "steps": [{"label": label, "method": "animate",
+                             "args": [[label], {"frame": {"duration": 0, "redraw": False}, "mode": "immediate"}]}
+                            for label in steps]}],
+    )
+    return fig
+
+
+def payload_size(fig):
+    """Taille JSON de la figure (octets), pour comparer les variantes d'animation."""
+    return len(fig.to_json().encode("utf-8"))
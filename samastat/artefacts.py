@@ -0,0 +1,279 @@
+"""Artefacts précalculés : graphe de dépendances, publication atomique, lecture par les sessions.
+
+Une source (``@source``) renvoie la version courante d'une donnée : l'empreinte de son
+contenu (``content_version``), si bien qu'un fichier réécrit à l'identique ne
+déclenche rien. Un artefact (``@artifact``) déclare les sources et les artefacts dont
+il dépend ; sa version est l'empreinte de son résultat publié, et un artefact recalculé
+à l'identique ne salit pas ceux qui en dépendent. ``refresh`` ne recalcule que les
+nœuds dont une entrée a changé, les branches indépendantes en parallèle. Un artefact
+ligne à ligne (``@row_artifact``) sur une source tabulaire (``table_source``) ne
+recalcule que les lignes modifiées.
+
+Chaque résultat est écrit dans un fichier temporaire puis renommé (``os.replace``) : une
+session lit l'ancien ou le nouvel artefact, jamais un fichier partiel.
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from graphlib import TopologicalSorter
+
+import pandas as pd
+import streamlit as st
+
+from samastat.donnees import file_version, read_json, read_only_view, write_json
+
+# --- PARAMÈTRES ---
+ARTIFACT_DIR = os.environ.get("SAMASTAT_ARTEFACTS", "artefacts")
+STATE_FILE = os.path.join(ARTIFACT_DIR, "etat.json")
+DEFAULT_WORKERS = int(os.environ.get("SAMASTAT_ARTEFACTS_WORKERS", "4"))
+
+SOURCES = {}
+TABLES = {}
+ARTIFACTS = {}
+_LOGGER = logging.getLogger("samastat.artefacts")
+
+
+# --- VERSIONS DE CONTENU ---
+def _digest(data):
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _file_digest(path, version):
+    with open(path, "rb") as f:
+        return _digest(f.read())
+
+
+def content_version(path):
+    """Empreinte du contenu d'un fichier, recalculée seulement si sa date ou sa taille change.
+
+    Une base SQLite compte aussi son journal ``-wal``.
+    """
+    version = file_version(path)
+    if version == "absent":
+        return version
+    digest = _file_digest(path, version)
+    if os.path.exists(path + "-wal"):
+        digest += "+" + _file_digest(path + "-wal", file_version(path + "-wal"))
+    return digest
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _table(path, key, version):
+    """Tableau (une ligne par clé), empreinte de chaque ligne et empreinte d'ensemble."""
+    df = pd.read_csv(path).drop_duplicates(key).reset_index(drop=True)
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    rows = dict(zip(df[key].astype(str), (format(h, "x") for h in hashes)))
+    return df, rows, _digest(hashes.tobytes() + ",".join(df.columns).encode("utf-8"))
+
+
+# --- DÉCLARATIONS ---
+def source(name):
+    """Déclare une source : fonction sans argument renvoyant sa version courante."""
+    def decorator(fn):
+        SOURCES[name] = fn
+        return fn
+    return decorator
+
+
+def table_version(path, key):
+    """Empreinte d'un CSV calculée à partir des empreintes de ses lignes."""
+    return _table(path, key, file_version(path))[2] if os.path.exists(path) else "absent"
+
+
+def table_source(name, path, key):
+    """Déclare un CSV comme source tabulaire : une empreinte par ligne (clé ``key``)."""
+    TABLES[name] = (path, key)
+    SOURCES[name] = lambda: table_version(path, key)
+
+
+def artifact(name, inputs):
+    """Déclare un artefact ; la fonction reçoit, dans l'ordre, la valeur des artefacts de ``inputs``.
+
+    Une fonction qui renvoie ``None`` (figures persistées par le cache disque de
+    Streamlit, par exemple) n'écrit que son état.
+    """
+    def decorator(fn):
+        ARTIFACTS[name] = (fn, list(inputs), None)
+        return fn
+    return decorator
+
+
+def row_artifact(name, table):
+    """Déclare un artefact calculé ligne par ligne sur la source tabulaire ``table``.
+
+    La fonction reçoit une ligne (``pd.Series``) et renvoie sa valeur ; l'artefact publié
+    est un dictionnaire clé → valeur. Seules les lignes nouvelles ou modifiées sont recalculées.
+    """
+    def decorator(fn):
+        ARTIFACTS[name] = (fn, [table], table)
+        return fn
+    return decorator
+
+
+# --- PUBLICATION ---
+def artifact_path(name):
+    return os.path.join(ARTIFACT_DIR, f"{name}.pkl")
+
+
+def publish(name, value):
+    """Écriture atomique : fichier temporaire dans le même dossier, puis renommage.
+
+    Renvoie l'empreinte du contenu publié (version de l'artefact).
+    """
+    payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    os.makedirs(ARTIFACT_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=ARTIFACT_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, artifact_path(name))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return _digest(payload)
+
+
+def _load_file(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _load(path, mtime_ns, size):
+    return _load_file(path)
+
+
+def artifact_version(name):
+    """Version publiée de ``name`` (``"absent"`` avant le premier passage) : clé de cache des lecteurs."""
+    entry = read_json(STATE_FILE, private=False).get(name)
+    return "absent" if entry is None else entry["version"]
+
+
+def read_artifact(name, **inputs):
+    """Dernière valeur publiée de ``name`` (vue en lecture seule), relue seulement si elle change.
+
+    ``inputs`` : versions courantes des sources attendues ; ``None`` si l'artefact est
+    absent ou a été calculé sur d'autres versions (l'appelant le calcule alors lui-même).
+    """
+    entry = read_json(STATE_FILE, private=False).get(name)
+    if entry is None or any(entry["entrees"].get(key) != version for key, version in inputs.items()):
+        return None
+    try:
+        stat = os.stat(artifact_path(name))
+    except FileNotFoundError:
+        return None
+    return read_only_view(_load(artifact_path(name), stat.st_mtime_ns, stat.st_size))
+
+
+# --- CONSTRUCTION ---
+def _build(name, current, previous):
+    """Calcule et publie un artefact ; renvoie l'entrée d'état et le nombre de lignes recalculées.
+
+    Les versions des sources sont relevées après le calcul : un artefact qui modifie une de
+    ses sources (entraînement des modèles absents) est noté à jour sur la nouvelle version.
+    """
+    fn, inputs, table = ARTIFACTS[name]
+    if table is None:
+        value = fn(*[_load_file(artifact_path(key)) for key in inputs if key in ARTIFACTS])
+        current = {key: SOURCES[key]() if key in SOURCES else version for key, version in current.items()}
+        version = publish(name, value) if value is not None else _digest(json.dumps(current, sort_keys=True).encode())
+        return {"entrees": current, "version": version, "publie": time.time()}, None
+
+    path, key = TABLES[table]
+    df, rows, _ = _table(path, key, file_version(path))
+    known = previous.get("lignes", {}) if previous else {}
+    values = _load_file(artifact_path(name)) if known and os.path.exists(artifact_path(name)) else {}
+    changed = [(i, k) for i, k in enumerate(rows) if known.get(k) != rows[k] or k not in values]
+    values = {k: values[k] for k in rows if k in values}  # lignes disparues retirées
+    for i, k in changed:
+        values[k] = fn(df.iloc[i])
+    version = publish(name, values)
+    return {"entrees": current, "version": version, "publie": time.time(), "lignes": rows}, len(changed)
+
+
+def _line(name, status, start=None, error=None, rows=None):
+    return {"artefact": name, "statut": status, "duree_s": round(time.perf_counter() - start, 3) if start else 0.0,
+            "lignes": rows, "erreur": error}
+
+
+def _run(name, current, previous):
+    start = time.perf_counter()
+    try:
+        entry, rows = _build(name, current, previous)
+    except Exception as exc:  # une source illisible ne doit pas arrêter le planificateur
+        _LOGGER.warning("Artefact %s : échec (%s)", name, exc)
+        return None, _line(name, "échec", start, f"{type(exc).__name__}: {exc}")
+    return entry, _line(name, "recalculé", start, rows=rows)
+
+
+def refresh(names=None, workers=DEFAULT_WORKERS):
+    """Recalcule les artefacts dont une entrée a changé, les branches indépendantes en parallèle.
+
+    ``names`` limite le passage à ces artefacts (et à ce dont ils dépendent). Un échec
+    laisse l'artefact publié en place et suspend ceux qui en dépendent jusqu'au passage
+    suivant. Renvoie une ligne de compte rendu par artefact examiné.
+    """
+    graph = {name: [i for i in inputs if i in ARTIFACTS] for name, (_, inputs, _) in ARTIFACTS.items()}
+    if names is not None:
+        wanted, todo = set(), list(names)
+        while todo:
+            name = todo.pop()
+            if name not in wanted:
+                wanted.add(name)
+                todo.extend(graph[name])
+        graph = {name: deps for name, deps in graph.items() if name in wanted}
+
+    os.makedirs(ARTIFACT_DIR, exist_ok=True)
+    state = read_json(STATE_FILE)
+    versions, failed, report = {}, set(), []
+    sorter = TopologicalSorter(graph)
+    sorter.prepare()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="artefacts") as pool:
+        running = {}
+        while sorter.is_active():
+            for name in sorter.get_ready():
+                inputs = ARTIFACTS[name][1]
+                if failed.intersection(inputs):
+                    failed.add(name)
+                    report.append(_line(name, "suspendu"))
+                    sorter.done(name)
+                    continue
+                try:
+                    for key in inputs:
+                        if key not in versions:
+                            versions[key] = SOURCES[key]()
+                except Exception as exc:
+                    failed.add(name)
+                    report.append(_line(name, "échec", error=f"{type(exc).__name__}: {exc}"))
+                    sorter.done(name)
+                    continue
+                current = {key: versions[key] for key in inputs}
+                entry = state.get(name)
+                if entry is not None and entry["entrees"] == current:
+                    versions[name] = entry["version"]
+                    report.append(_line(name, "à jour"))
+                    sorter.done(name)
+                    continue
+                running[pool.submit(_run, name, current, entry)] = name
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                entry, line = future.result()
+                report.append(line)
+                if entry is None:
+                    failed.add(name)
+                else:
+                    versions.update(entry["entrees"])  # sources relevées après le calcul
+                    versions[name] = entry["version"]
+                    state[name] = entry
+                    write_json(STATE_FILE, state, indent=2, ensure_ascii=False)
+                sorter.done(name)
+    return report
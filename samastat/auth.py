@@ -0,0 +1,389 @@
+"""Comptes utilisateurs, connexion et administration des comptes des applications SamaStat.
+
+Les comptes sont stockés dans ``users.json`` (nom d'utilisateur → hachage bcrypt, ou
+``{"hash": ..., "communes": [...], "regions": [...], "role": "admin"}`` pour un compte limité à
+un périmètre ou administrateur).
+Le fichier n'est relu que lorsqu'il change et chaque écriture est atomique.
+Les tentatives de connexion passent par ``authenticate`` : limitées par ``samastat.limiteur``,
+elles ne hachent rien pour un compte inconnu mais répondent dans le même temps.
+Une connexion réussie ouvre une session serveur (``samastat.sessions``) : un rechargement
+de la page la retrouve sans nouveau calcul bcrypt. Un hachage d'un autre coût que
+``BCRYPT_ROUNDS`` est refait en arrière-plan à la connexion suivante.
+"""
+import contextlib
+import copy
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+import streamlit as st
+
+from samastat.donnees import file_lock, read_json, write_json
+from samastat.instrumentation import instrument
+from samastat.limiteur import client_ip, format_wait, get_bcrypt_slots, get_login_limiter
+from samastat.sessions import current_token, forget_login, get_session_store, remember_login
+
+# --- PARAMÈTRES ---
+USER_FILE = "users.json"
+LOGO_PATH = "logo.png"
+BCRYPT_WAIT_S = 5.0
+BCRYPT_ROUNDS = int(os.environ.get("SAMASTAT_BCRYPT_ROUNDS", "12"))
+ADMIN_ROLE = "admin"
+BCRYPT_MAX_BYTES = 72
+
+_users_lock = threading.Lock()
+_LOGGER = logging.getLogger("samastat.auth")
+
+
+# --- UTILISATEURS ---
+@instrument()
+def load_users():
+    try:
+        return read_json(USER_FILE)
+    except json.JSONDecodeError:
+        st.error("Erreur: Le fichier des utilisateurs est corrompu. Supprimez-le ou corrigez-le.")
+        return {}
+
+
+def save_users(users):
+    write_json(USER_FILE, users)
+
+
+@contextlib.contextmanager
+def users_update():
+    """Lecture-modification-écriture de ``users.json`` sous verrou (threads et processus).
+
+    Le fichier est relu une fois le verrou pris, pour ne perdre aucune écriture concurrente
+    (rehachage, import en masse, autre session) ; il n'est réécrit que s'il a changé. Un
+    fichier corrompu lève ``json.JSONDecodeError`` au lieu d'être écrasé.
+    """
+    with _users_lock, file_lock(USER_FILE + ".lock"):
+        users = read_json(USER_FILE)
+        before = copy.deepcopy(users)
+        yield users
+        if users != before:
+            save_users(users)
+
+
+def password_too_long(password: str) -> bool:
+    """bcrypt refuse les mots de passe de plus de ``BCRYPT_MAX_BYTES`` octets."""
+    return len(password.encode("utf-8")) > BCRYPT_MAX_BYTES
+
+
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    """Hache un mot de passe et le retourne en chaîne de caractères."""
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def hash_rounds(hashed: str) -> int:
+    """Coût d'un hachage bcrypt (``$2b$12$…`` → 12)."""
+    return int(hashed.split("$")[2])
+
+
+def check_password(password: str, hashed) -> bool:
+    """Vérifie un mot de passe par rapport à son hachage (chaîne ou octets)."""
+    if isinstance(hashed, str):
+        hashed = hashed.encode("utf-8")
+    return bcrypt.checkpw(password.encode("utf-8"), hashed)
+
+
+def user_entry(value):
+    """Entrée d'un compte sous forme de dict, quelle que soit sa forme dans le fichier."""
+    return dict(value) if isinstance(value, dict) else {"hash": value}
+
+
+def set_password(users, username, password=None, hashed=None):
+    """Change le mot de passe d'un compte (ou pose un hachage déjà calculé) en conservant son périmètre."""
+    entry = user_entry(users.get(username, ""))
+    entry["hash"] = hash_password(password) if hashed is None else hashed
+    users[username] = entry if len(entry) > 1 else entry["hash"]
+
+
+def set_scope(users, username, communes=(), regions=()):
+    """Limite un compte à des communes et/ou régions ; sans l'une ni l'autre, accès complet."""
+    entry = {key: value for key, value in user_entry(users[username]).items() if key not in ("communes", "regions")}
+    if communes:
+        entry["communes"] = sorted(communes)
+    if regions:
+        entry["regions"] = sorted(regions)
+    users[username] = entry if len(entry) > 1 else entry["hash"]
+
+
+def set_role(users, username, role=None):
+    """Attribue un rôle (``ADMIN_ROLE``) à un compte ; ``None`` le retire."""
+    entry = user_entry(users[username])
+    entry.pop("role", None)
+    if role:
+        entry["role"] = role
+    users[username] = entry if len(entry) > 1 else entry["hash"]
+
+
+def is_admin():
+    """Session connectée à un compte dont le rôle enregistré est ``admin``."""
+    username = st.session_state.get("username")
+    if not st.session_state.get("logged_in") or not username:
+        return False
+    try:
+        users = read_json(USER_FILE, private=False)
+    except json.JSONDecodeError:
+        return False
+    return username in users and user_entry(users[username]).get("role") == ADMIN_ROLE
+
+
+def user_scope(username):
+    """Périmètre d'un compte : ``None`` (toutes les communes) ou ``(communes, régions)``."""
+    try:
+        users = read_json(USER_FILE, private=False)
+    except json.JSONDecodeError:
+        return (), ()
+    if username not in users:
+        return (), ()
+    entry = user_entry(users[username])
+    communes = tuple(sorted(entry.get("communes", ())))
+    regions = tuple(sorted(entry.get("regions", ())))
+    if not communes and not regions:
+        return None
+    return communes, regions
+
+
+def verify_user(username, password):
+    try:
+        users = read_json(USER_FILE, private=False)
+    except json.JSONDecodeError:
+        return False
+    if username not in users:
+        return False
+    return check_password(password, user_entry(users[username])["hash"])
+
+
+@st.cache_resource(show_spinner=False)
+def get_rehash_executor():
+    """Un seul thread : les rehachages passent après les connexions, un par un."""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="rehash")
+
+
+def _rehash(username, password, old_hash):
+    """Tâche de fond : hors de tout script Streamlit, les erreurs sont journalisées."""
+    try:
+        new_hash = hash_password(password)
+        with users_update() as users:
+            # Le mot de passe a pu changer entre-temps : on ne remplace que l'ancien hachage.
+            if username in users and user_entry(users[username])["hash"] == old_hash:
+                set_password(users, username, hashed=new_hash)
+    except Exception:
+        _LOGGER.exception("Rehachage du compte %s impossible", username)
+
+
+def schedule_rehash(username, password, hashed):
+    """Refait en arrière-plan un hachage dont le coût n'est plus ``BCRYPT_ROUNDS``."""
+    if hash_rounds(hashed) != BCRYPT_ROUNDS:
+        get_rehash_executor().submit(_rehash, username, password, hashed)
+
+
+@st.cache_resource(show_spinner=False)
+def bcrypt_check_time():
+    """Durée médiane d'une vérification bcrypt au coût courant, mesurée une fois."""
+    dummy = bcrypt.hashpw(b"calibrage", bcrypt.gensalt(BCRYPT_ROUNDS))
+    durations = []
+    for _ in range(3):
+        start = time.perf_counter()
+        bcrypt.checkpw(b"samastat", dummy)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def authenticate(username, password, ip=None):
+    """Vérifie une tentative de connexion ; renvoie ``(succès, message d'erreur)``.
+
+    Toute vérification d'un mot de passe saisi passe par ici (connexion, changement de
+    mot de passe) : limiteur et plafond de calculs bcrypt simultanés compris.
+    """
+    limiter = get_login_limiter()
+    wait = limiter.acquire(username, client_ip() if ip is None else ip)
+    if wait > 0:
+        return False, f"Trop de tentatives. Réessayez dans {format_wait(wait)}."
+
+    start = time.perf_counter()
+    try:
+        users = read_json(USER_FILE, private=False)
+    except json.JSONDecodeError:
+        users = {}
+    if username not in users:
+        # Compte inconnu : pas de bcrypt, mais la même durée de réponse qu'un mauvais mot de passe.
+        time.sleep(max(0.0, bcrypt_check_time() - (time.perf_counter() - start)))
+        ok = False
+    else:
+        slots = get_bcrypt_slots()
+        if not slots.acquire(timeout=BCRYPT_WAIT_S):
+            return False, "Serveur occupé, réessayez dans quelques secondes."
+        hashed = user_entry(users[username])["hash"]
+        try:
+            ok = check_password(password, hashed)
+        finally:
+            slots.release()
+
+    if ok:
+        limiter.record_success(username)
+        schedule_rehash(username, password, hashed)
+        return True, ""
+    limiter.record_failure(username)
+    return False, "Nom d'utilisateur ou mot de passe incorrect."
+
+
+# --- SESSION ---
+def init_session():
+    if "logged_in" not in st.session_state:
+        st.session_state.logged_in = False
+        st.session_state.username = ""
+    if not st.session_state.logged_in:
+        restore_session()
+
+
+def restore_session():
+    """Reconnecte la session depuis son jeton signé (rechargement, nouvel onglet)."""
+    token = current_token()
+    username = get_session_store().resolve(token) if token else None
+    if username is None:
+        return False
+    try:
+        known = username in read_json(USER_FILE, private=False)
+    except json.JSONDecodeError:
+        known = False
+    if known:
+        st.session_state.logged_in = True
+        st.session_state.username = username
+    return known
+
+
+def logout_button(label="🔓 Se déconnecter", container=st.sidebar, key="logout_btn"):
+    if container.button(label, key=key):
+        forget_login()
+        st.session_state.logged_in = False
+        st.session_state.username = ""
+        st.rerun()
+
+
+# --- PAGE D'ACCUEIL ---
+def show_welcome_page(presentation, info="Veuillez vous connecter pour accéder aux données.", logo_path=LOGO_PATH):
+    st.set_page_config(page_title="SamaStat Mairie", layout="centered")
+    if os.path.exists(logo_path):
+        st.image(logo_path, width=250)
+    st.title("Bienvenue sur SamaStat Mairie")
+    st.markdown(presentation)
+    st.info(info)
+
+
+# --- CONNEXION ---
+def show_login(header="🧑‍💻 Connexion"):
+    st.sidebar.subheader(header)
+    username = st.sidebar.text_input("Nom d'utilisateur", key="login_user")
+    password = st.sidebar.text_input("Mot de passe", type="password", key="login_pass")
+    if st.sidebar.button("Se connecter", key="login_btn"):
+        ok, message = authenticate(username, password)
+        if ok:
+            st.session_state.logged_in = True
+            st.session_state.username = username
+            remember_login(username)
+            st.success(f"Bienvenue {username} ! Vous êtes connecté.")
+            st.rerun()
+        else:
+            st.error(message)
+
+
+# --- ADMINISTRATION ---
+def _split_names(text):
+    return [name.strip() for name in text.split(",") if name.strip()]
+
+
+def show_admin_panel():
+    """Création, modification et suppression de comptes (dans le conteneur courant).
+
+    Réservé aux administrateurs connectés : un périmètre vide donnant l'accès complet,
+    le laisser ouvert permettrait à chacun de lever sa propre restriction.
+    """
+    if not is_admin():
+        return
+    action = st.radio("Choisir une action :", [
+        "Créer un compte", "Modifier le mot de passe", "Définir le périmètre", "Supprimer un utilisateur"],
+        key="admin_action")
+    try:
+        users = read_json(USER_FILE, private=False)
+    except json.JSONDecodeError:
+        st.error("Erreur: Le fichier des utilisateurs est corrompu. Supprimez-le ou corrigez-le.")
+        return
+
+    if action == "Créer un compte":
+        new_user = st.text_input("🔤 Nouveau nom d'utilisateur", key="create_user")
+        new_pass = st.text_input("🔑 Nouveau mot de passe", type="password", key="create_pass")
+        communes = st.text_input("🏙️ Communes autorisées (séparées par des virgules, vide = toutes)", key="create_communes")
+        regions = st.text_input("🗺️ Régions autorisées (séparées par des virgules)", key="create_regions")
+        if st.button("Créer le compte", key="btn_create"):
+            if new_user in users:
+                st.warning("Ce nom d'utilisateur existe déjà.")
+            elif new_user == "" or new_pass == "":
+                st.error("Veuillez remplir tous les champs.")
+            elif password_too_long(new_pass):
+                st.error(f"Mot de passe trop long ({BCRYPT_MAX_BYTES} octets au plus).")
+            else:
+                hashed = hash_password(new_pass)  # hors verrou : bcrypt est lent
+                with users_update() as current:
+                    created = new_user not in current
+                    if created:
+                        current[new_user] = hashed
+                        set_scope(current, new_user, _split_names(communes), _split_names(regions))
+                if created:
+                    st.success(f"Compte '{new_user}' créé ✅")
+                else:
+                    st.warning("Ce nom d'utilisateur existe déjà.")
+
+    elif action == "Modifier le mot de passe":
+        user = st.text_input("Nom d'utilisateur existant", key="mod_user")
+        old_pass = st.text_input("Mot de passe actuel", type="password", key="mod_old")
+        new_pass = st.text_input("Nouveau mot de passe", type="password", key="mod_new")
+        if st.button("Mettre à jour le mot de passe", key="btn_update"):
+            if new_pass == "":
+                ok, message = False, "Nouveau mot de passe vide."
+            elif password_too_long(new_pass):
+                ok, message = False, f"Mot de passe trop long ({BCRYPT_MAX_BYTES} octets au plus)."
+            else:
+                # Même limiteur que le formulaire de connexion : pas d'essais illimités de l'ancien mot de passe.
+                ok, message = authenticate(user, old_pass, client_ip())
+            if not ok:
+                st.error(message)
+            else:
+                hashed = hash_password(new_pass)
+                with users_update() as current:
+                    if user in current:
+                        set_password(current, user, hashed=hashed)
+                get_session_store().revoke_user(user)  # les sessions ouvertes avec l'ancien mot de passe
+                st.success("Mot de passe mis à jour ✅")
+
+    elif action == "Définir le périmètre":
+        user = st.text_input("Nom d'utilisateur existant", key="scope_user")
+        communes = st.text_input("🏙️ Communes autorisées (séparées par des virgules, vide = toutes)", key="scope_communes")
+        regions = st.text_input("🗺️ Régions autorisées (séparées par des virgules)", key="scope_regions")
+        if st.button("Enregistrer le périmètre", key="btn_scope"):
+            with users_update() as current:
+                found = user in current
+                if found:
+                    set_scope(current, user, _split_names(communes), _split_names(regions))
+            if found:
+                st.success(f"Périmètre de '{user}' mis à jour ✅")
+            else:
+                st.error("Utilisateur introuvable.")
+
+    elif action == "Supprimer un utilisateur":
+        user_to_delete = st.text_input("Nom d'utilisateur à supprimer", key="del_user")
+        if st.button("Supprimer le compte", key="btn_delete"):
+            with users_update() as current:
+                found = current.pop(user_to_delete, None) is not None
+            if found:
+                get_session_store().revoke_user(user_to_delete)
+                st.success(f"Compte '{user_to_delete}' supprimé ✅")
+            else:
+                st.error("Utilisateur non trouvé.")
@@ -0,0 +1,227 @@
+"""Carte des communes : index spatial, regroupement des marqueurs côté serveur et cache HTML.
+
+Les couches (communes, postes de santé, écoles…) sont des tableaux ``lat``/``lon``/``nom``/
+``popup``. À la construction, chaque couche reçoit un index spatial en grille et ses
+regroupements de marqueurs sont précalculés pour chaque niveau de zoom. Une vue ne
+charge que les éléments de son emprise : celle que renvoie la carte (streamlit-folium)
+après un déplacement ou un zoom de l'utilisateur, sinon celle des contrôles centre/zoom.
+Les marqueurs visibles sont mis en cache par (couche, version des données, zoom, emprise)
+et ajoutés à la carte sans la recharger.
+"""
+import hashlib
+import math
+
+import folium
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit_folium import st_folium
+
+# --- PARAMÈTRES ---
+TILE_SIZE = 256
+MAP_WIDTH = 700
+MAP_HEIGHT = 500
+MIN_ZOOM = 5
+MAX_ZOOM = 14
+MAX_CLUSTER_ZOOM = 12
+CLUSTER_RADIUS_PX = 60
+INDEX_CELL_DEG = 0.25
+VIEW_PADDING = 0.5
+
+LAYER_COLUMNS = ["lat", "lon", "nom", "popup"]
+LAYER_COLORS = ["blue", "green", "red", "purple", "orange"]
+
+
+# --- INDEX SPATIAL ---
+class SpatialIndex:
+    """Index en grille régulière : chaque cellule connaît les points qu'elle contient."""
+
+    def __init__(self, lat, lon, cell_deg=INDEX_CELL_DEG):
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.cell_deg = cell_deg
+        cx = np.floor(self.lon / cell_deg).astype(np.int64)
+        cy = np.floor(self.lat / cell_deg).astype(np.int64)
+        order = np.lexsort((cy, cx))
+        keys = np.stack([cx[order], cy[order]], axis=1)
+        starts = np.flatnonzero(np.r_[True, np.any(keys[1:] != keys[:-1], axis=1)])
+        bounds = np.r_[starts, len(order)]
+        self._cells = {
+            (int(keys[s, 0]), int(keys[s, 1])): order[s:e]
+            for s, e in zip(bounds[:-1], bounds[1:])
+        }
+
+    def query(self, bbox):
+        """Indices des points dans l'emprise ``(sud, ouest, nord, est)``."""
+        south, west, north, east = bbox
+        x0, x1 = math.floor(west / self.cell_deg), math.floor(east / self.cell_deg)
+        y0, y1 = math.floor(south / self.cell_deg), math.floor(north / self.cell_deg)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self._cells):
+            candidates = np.arange(len(self.lat))
+        else:
+            found = [self._cells[(x, y)] for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)
+                     if (x, y) in self._cells]
+            if not found:
+                return np.empty(0, dtype=np.int64)
+            candidates = np.concatenate(found)
+        inside = ((self.lat[candidates] >= south) & (self.lat[candidates] <= north)
+                  & (self.lon[candidates] >= west) & (self.lon[candidates] <= east))
+        return np.sort(candidates[inside])
+
+
+# --- REGROUPEMENT ---
+def cluster_points(lat, lon, zoom, radius_px=CLUSTER_RADIUS_PX):
+    """Regroupe les points par cellules de ``radius_px`` pixels au niveau de zoom donné."""
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    cell = radius_px * 360.0 / (TILE_SIZE * 2 ** zoom)
+    keys = np.stack([np.floor(lon / cell), np.floor(lat / cell)], axis=1)
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    inverse = inverse.ravel()
+    count = np.bincount(inverse)
+    return pd.DataFrame({
+        "lat": np.bincount(inverse, weights=lat) / count,
+        "lon": np.bincount(inverse, weights=lon) / count,
+        "count": count,
+        "first": first,
+    })
+
+
+def viewport_bbox(center, zoom, width=MAP_WIDTH, height=MAP_HEIGHT, padding=VIEW_PADDING):
+    """Emprise visible (avec marge) d'une carte centrée sur ``center`` au zoom donné."""
+    lat, lon = center
+    deg_per_px = 360.0 / (TILE_SIZE * 2 ** zoom)
+    half_w = width / 2 * deg_per_px * (1 + padding)
+    half_h = height / 2 * deg_per_px * math.cos(math.radians(lat)) * (1 + padding)
+    return (lat - half_h, lon - half_w, lat + half_h, lon + half_w)
+
+
+def pad_bbox(bbox, padding=VIEW_PADDING):
+    """Élargit l'emprise ``(sud, ouest, nord, est)`` de ``padding`` fois sa demi-taille de chaque côté."""
+    south, west, north, east = bbox
+    dy = (north - south) / 2 * padding
+    dx = (east - west) / 2 * padding
+    return (south - dy, west - dx, north + dy, east + dx)
+
+
+def returned_view(value):
+    """(emprise, zoom) renvoyés par streamlit-folium, ou ``None`` si la carte n'a rien renvoyé."""
+    try:
+        south_west, north_east = value["bounds"]["_southWest"], value["bounds"]["_northEast"]
+        bbox = (south_west["lat"], south_west["lng"], north_east["lat"], north_east["lng"])
+        zoom = int(value["zoom"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if any(v is None for v in bbox):
+        return None
+    return tuple(float(v) for v in bbox), zoom
+
+
+def snap_bbox(bbox, zoom):
+    """Aligne l'emprise sur la grille du zoom pour que les vues voisines partagent le cache."""
+    step = CLUSTER_RADIUS_PX * 360.0 / (TILE_SIZE * 2 ** zoom)
+    south, west, north, east = bbox
+    return (math.floor(south / step) * step, math.floor(west / step) * step,
+            math.ceil(north / step) * step, math.ceil(east / step) * step)
+
+
+def data_version(layers):
+    """Empreinte du contenu des couches : change dès qu'un point ou un popup change."""
+    digest = hashlib.sha1()
+    for name in sorted(layers):
+        digest.update(name.encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(layers[name][LAYER_COLUMNS], index=False).values.tobytes())
+    return digest.hexdigest()[:12]
+
+
+# --- CARTE ---
+class CommuneMap:
+    """Couches de la carte avec index spatiaux et regroupements précalculés par zoom."""
+
+    def __init__(self, layers):
+        self.layers = {name: df[LAYER_COLUMNS].reset_index(drop=True) for name, df in layers.items()}
+        self.version = data_version(self.layers)
+        self._points = {}
+        self._clusters = {}
+        for name, df in self.layers.items():
+            self._points[name] = SpatialIndex(df["lat"], df["lon"])
+            self._clusters[name] = {}
+            for zoom in range(MIN_ZOOM, MAX_CLUSTER_ZOOM):
+                clusters = cluster_points(df["lat"], df["lon"], zoom)
+                self._clusters[name][zoom] = (clusters, SpatialIndex(clusters["lat"], clusters["lon"]))
+
+    def features_in_view(self, name, bbox, zoom):
+        """Marqueurs (isolés ou regroupés) d'une couche visibles dans l'emprise."""
+        df = self.layers[name]
+        if zoom >= MAX_CLUSTER_ZOOM:
+            rows = df.iloc[self._points[name].query(bbox)]
+            return rows.assign(count=1)
+        clusters, index = self._clusters[name][max(zoom, MIN_ZOOM)]
+        visible = clusters.iloc[index.query(bbox)]
+        singles = visible["count"] == 1
+        return visible.assign(
+            nom=np.where(singles, df["nom"].to_numpy()[visible["first"]], ""),
+            popup=np.where(singles, df["popup"].to_numpy()[visible["first"]], ""),
+        )
+
+
+def feature_group(name, features, color):
+    """Groupe folium des marqueurs d'une couche (cercle proportionnel pour un regroupement)."""
+    group = folium.FeatureGroup(name=name)
+    for row in features.itertuples(index=False):
+        if row.count > 1:
+            folium.CircleMarker(
+                location=[row.lat, row.lon], radius=10 + 4 * math.log2(row.count),
+                color=color, fill=True, fill_opacity=0.6,
+                tooltip=f"{name} : {row.count} éléments (zoomez pour détailler)",
+            ).add_to(group)
+        else:
+            folium.Marker(
+                location=[row.lat, row.lon], popup=row.popup, tooltip=row.nom,
+                icon=folium.Icon(color=color),
+            ).add_to(group)
+    return group
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def build_commune_map(_layers, version):
+    """Construit (une fois par version des données) les index et regroupements."""
+    return CommuneMap(_layers)
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_features(_carte, name, version, zoom, bbox):
+    """Marqueurs visibles, mis en cache par (couche, version des données, zoom, emprise)."""
+    return _carte.features_in_view(name, bbox, zoom)
+
+
+def show_map(layers, center, zoom, key="carte_communes"):
+    """Affiche la carte des couches données en ne chargeant que l'emprise visible.
+
+    L'emprise suit les déplacements de l'utilisateur (bornes renvoyées par la carte) ; un
+    changement des contrôles ``center``/``zoom`` recentre la carte et repart de ces valeurs.
+    """
+    version = data_version(layers)
+    carte = build_commune_map(layers, version)
+    zoom = int(min(max(zoom, MIN_ZOOM), MAX_ZOOM))
+    controls = (tuple(center), zoom)
+    view = None
+    if st.session_state.get(f"{key}_controles") == controls:
+        view = returned_view(st.session_state.get(key))
+    st.session_state[f"{key}_controles"] = controls
+    if view is None:
+        bbox, view_zoom = viewport_bbox(center, zoom), zoom
+    else:
+        bbox, view_zoom = pad_bbox(view[0]), int(min(max(view[1], MIN_ZOOM), MAX_ZOOM))
+    bbox = snap_bbox(bbox, view_zoom)
+    groups = [
+        feature_group(name, cached_features(carte, name, version, view_zoom, bbox),
+                      LAYER_COLORS[i % len(LAYER_COLORS)])
+        for i, name in enumerate(layers)
+    ]
+    st_folium(
+        folium.Map(location=list(center), zoom_start=zoom), key=key,
+        width=MAP_WIDTH, height=MAP_HEIGHT, returned_objects=["bounds", "zoom"],
+        feature_group_to_add=groups,
+        layer_control=folium.LayerControl() if len(groups) > 1 else None,
+    )
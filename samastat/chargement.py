@@ -0,0 +1,63 @@
+"""Chargement concurrent des données et affichage progressif des tableaux de bord.
+
+Les chargements (jeux de données, agrégats, figures) partent tous en parallèle dans
+un pool de threads partagé par le processus. Chaque bloc de la page est réservé par
+un ``st.empty()`` puis rempli, dans le thread du script, dès que ses données arrivent :
+les indicateurs s'affichent sans attendre le graphique le plus lent.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# --- PARAMÈTRES ---
+MAX_WORKERS = int(os.environ.get("SAMASTAT_LOADER_WORKERS", "8"))
+
+
+@st.cache_resource(show_spinner=False)
+def get_executor():
+    """Pool de threads unique pour tout le processus (et non un pool par session)."""
+    return ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="samastat-chargement")
+
+
+def _with_script_ctx(fn, ctx):
+    """Rattache le thread de travail à la session pour que les caches Streamlit fonctionnent."""
+    def run(*args, **kwargs):
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args, **kwargs)
+    return run
+
+
+class ProgressiveLoader:
+    """Lance des tâches en parallèle et affiche chaque résultat dès qu'il est prêt."""
+
+    def __init__(self, executor=None):
+        self._executor = executor or get_executor()
+        self._ctx = get_script_run_ctx()
+        self._pending = {}
+
+    def fetch(self, fn, *args, **kwargs):
+        """Démarre un chargement sans emplacement d'affichage (ex. jeu de données partagé)."""
+        return self._executor.submit(_with_script_ctx(fn, self._ctx), *args, **kwargs)
+
+    def submit(self, fn, *args, render, placeholder=None, message="⏳ Chargement…", **kwargs):
+        """Démarre ``fn`` et réserve un emplacement que ``render(résultat)`` remplira."""
+        slot = placeholder if placeholder is not None else st.empty()
+        slot.caption(message)
+        future = self.fetch(fn, *args, **kwargs)
+        self._pending[future] = (slot, render)
+        return future
+
+    def render_as_completed(self):
+        """Remplit les emplacements dans l'ordre d'arrivée des résultats."""
+        for future in as_completed(list(self._pending)):
+            slot, render = self._pending.pop(future)
+            error = future.exception()
+            if error is not None:
+                slot.error(f"Chargement impossible : {error}")
+                continue
+            with slot.container():
+                render(future.result())
@@ -0,0 +1,195 @@
+"""Cartes choroplèthes des indicateurs communaux à partir de contours précalculés.
+
+Les contours des communes sont convertis une fois (``python -m samastat.choroplethe
+communes.geojson``) en un fichier binaire compact : coordonnées quantifiées en entiers
+32 bits, simplifiées (Douglas-Peucker) pour chaque niveau de zoom. Les valeurs d'un
+indicateur sont jointes par clé de commune ; le changement d'indicateur se fait dans
+le navigateur (``restyle`` de ``z``) sans renvoyer les géométries.
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+# --- PARAMÈTRES ---
+BOUNDARY_FILE = "communes_contours.npz"
+ZOOM_LEVELS = (6, 8, 10, 12)
+DEFAULT_ZOOM = 8
+QUANTIZATION = 1e5  # 1e-5 degré ≈ 1 m
+TOLERANCE_PX = 0.75
+TILE_SIZE = 256
+
+
+# --- SIMPLIFICATION ---
+def simplify_ring(points, tolerance):
+    """Douglas-Peucker itératif sur un anneau fermé (tableau n x 2)."""
+    n = len(points)
+    if n <= 4:
+        return points
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        offsets = points[start + 1:end] - points[start]
+        norm = np.hypot(*segment)
+        if norm == 0:
+            dist = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            dist = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / norm
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    simplified = points[keep]
+    if len(simplified) < 4:
+        # Anneau trop petit pour ce zoom : on garde un quadrilatère représentatif.
+        simplified = points[np.linspace(0, n - 1, 4).astype(int)]
+    return simplified
+
+
+def zoom_tolerance(zoom):
+    return TOLERANCE_PX * 360.0 / (TILE_SIZE * 2 ** zoom)
+
+
+# --- STOCKAGE BINAIRE ---
+def _polygons(geometry):
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    raise ValueError(f"Géométrie non supportée : {geometry['type']}")
+
+
+def build_boundaries(geojson, key_property, output=BOUNDARY_FILE, zoom_levels=ZOOM_LEVELS):
+    """Convertit un GeoJSON de communes en contours binaires multi-résolution."""
+    keys, rings = [], []
+    for feature_id, feature in enumerate(geojson["features"]):
+        keys.append(str(feature["properties"][key_property]))
+        for polygon_id, polygon in enumerate(_polygons(feature["geometry"])):
+            for ring_id, ring in enumerate(polygon):
+                rings.append((feature_id, polygon_id, ring_id, np.asarray(ring, dtype=float)[:, :2]))
+
+    arrays = {"keys": np.array(keys), "zoom_levels": np.array(zoom_levels)}
+    for zoom in zoom_levels:
+        tolerance = zoom_tolerance(zoom)
+        simplified = [simplify_ring(coords, tolerance) for *_, coords in rings]
+        lengths = np.array([len(r) for r in simplified])
+        arrays[f"coords_{zoom}"] = np.round(np.concatenate(simplified) * QUANTIZATION).astype(np.int32)
+        arrays[f"offsets_{zoom}"] = np.r_[0, np.cumsum(lengths)].astype(np.int64)
+    arrays["ring_ids"] = np.array([(f, p, r) for f, p, r, _ in rings], dtype=np.int32).reshape(-1, 3)
+    np.savez_compressed(output, **arrays)
+    return output
+
+
+class Boundaries:
+    """Contours binaires chargés en mémoire, convertibles en GeoJSON par niveau de zoom."""
+
+    def __init__(self, path=BOUNDARY_FILE):
+        with np.load(path) as data:
+            self.arrays = {name: data[name] for name in data.files}
+        self.keys = self.arrays["keys"].astype(str)
+        self.zoom_levels = [int(z) for z in self.arrays["zoom_levels"]]
+
+    def nearest_zoom(self, zoom):
+        return min(self.zoom_levels, key=lambda level: abs(level - zoom))
+
+    def geojson(self, zoom):
+        zoom = self.nearest_zoom(zoom)
+        coords = self.arrays[f"coords_{zoom}"] / QUANTIZATION
+        offsets = self.arrays[f"offsets_{zoom}"]
+        features = [{"type": "Feature", "properties": {"cle": key}, "geometry": {"type": "MultiPolygon", "coordinates": []}}
+                    for key in self.keys]
+        for i, (feature_id, polygon_id, ring_id) in enumerate(self.arrays["ring_ids"]):
+            polygons = features[feature_id]["geometry"]["coordinates"]
+            if ring_id == 0:
+                polygons.append([])
+            polygons[-1].append(coords[offsets[i]:offsets[i + 1]].round(5).tolist())
+        return {"type": "FeatureCollection", "features": features}
+
+
+# --- JOINTURE ---
+def join_indicator(keys, df, key_col, value_col):
+    """Valeurs de l'indicateur alignées sur l'ordre des contours (NaN si commune absente)."""
+    positions = pd.Index(df[key_col].astype(str)).get_indexer(keys)
+    values = df[value_col].to_numpy(dtype=float)
+    return np.where(positions >= 0, values[positions], np.nan)
+
+
+# --- FIGURE ---
+@st.cache_resource(show_spinner=False)
+def load_boundaries(path=BOUNDARY_FILE):
+    return Boundaries(path)
+
+
+@st.cache_resource(show_spinner=False)
+def boundary_geojson(path, zoom):
+    """GeoJSON simplifié partagé par toutes les sessions pour un niveau de zoom."""
+    return load_boundaries(path).geojson(zoom)
+
+
+def build_choropleth(df, key_col, indicators, zoom=DEFAULT_ZOOM, path=BOUNDARY_FILE):
+    """Une seule trace géographique ; chaque bouton ne remplace que les valeurs ``z``."""
+    boundaries = load_boundaries(path)
+    values = {name: join_indicator(boundaries.keys, df, key_col, name) for name in indicators}
+    first = indicators[0]
+    fig = go.Figure(go.Choropleth(
+        geojson=boundary_geojson(path, boundaries.nearest_zoom(zoom)),
+        featureidkey="properties.cle",
+        locations=boundaries.keys,
+        z=values[first],
+        colorscale="Viridis",
+        colorbar={"title": {"text": first}},
+        marker_line_width=0.3,
+    ))
+    fig.update_geos(fitbounds="locations", visible=False)
+    fig.update_layout(
+        margin={"l": 0, "r": 0, "t": 40, "b": 0},
+        updatemenus=[{
+            "type": "buttons",
+            "direction": "right",
+            "x": 0, "y": 1.08, "xanchor": "left",
+            "buttons": [
+                {"label": name, "method": "restyle",
+                 "args": [{"z": [values[name]], "colorbar.title.text": name}]}
+                for name in indicators
+            ],
+        }],
+    )
+    return fig
+
+
+def show_choropleth(df, key_col, indicators, path=BOUNDARY_FILE):
+    if not os.path.exists(path):
+        st.info(f"Contours des communes indisponibles : générez « {path} » avec "
+                "`python -m samastat.choroplethe communes.geojson`.")
+        return
+    boundaries = load_boundaries(path)
+    zoom = st.select_slider("Niveau de détail des contours", options=boundaries.zoom_levels,
+                            value=boundaries.nearest_zoom(DEFAULT_ZOOM))
+    st.plotly_chart(build_choropleth(df, key_col, indicators, zoom, path), use_container_width=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Précalcule les contours simplifiés des communes.")
+    parser.add_argument("geojson", help="Fichier GeoJSON des communes")
+    parser.add_argument("--cle", default="Commune", help="Propriété portant le nom de la commune")
+    parser.add_argument("--sortie", default=BOUNDARY_FILE)
+    args = parser.parse_args()
+    with open(args.geojson, "r", encoding="utf-8") as f:
+        geojson = json.load(f)
+    build_boundaries(geojson, args.cle, args.sortie)
+    print(f"{len(geojson['features'])} communes → {args.sortie} ({os.path.getsize(args.sortie) / 1e3:.1f} Ko)")
+
+
+if __name__ == "__main__":
+    main()
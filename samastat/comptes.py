@@ -0,0 +1,96 @@
+"""Création de comptes en masse à partir d'un CSV.
+
+    python -m samastat.comptes agents_thies.csv
+    python -m samastat.comptes agents_thies.csv --workers 8 --remplacer
+
+Colonnes du CSV : ``utilisateur``, ``mot_de_passe`` et, facultatives, ``communes`` et
+``regions`` (noms séparés par des ``;``) et ``role`` (``admin`` pour un administrateur). Les mots de passe sont hachés en parallèle
+sur tous les cœurs ; ``users.json`` est réécrit une seule fois, de façon atomique.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from samastat.auth import (ADMIN_ROLE, BCRYPT_MAX_BYTES, BCRYPT_ROUNDS, USER_FILE, hash_password, password_too_long,
+                           set_role, set_scope, users_update)
+from samastat.donnees import read_json
+from samastat.sessions import revoke_shared
+
+# --- PARAMÈTRES ---
+CHUNK_SIZE = 8
+
+
+def _names(value):
+    return [name.strip() for name in (value or "").split(";") if name.strip()]
+
+
+def read_accounts(path):
+    """Lignes valides du CSV et messages d'erreur pour les autres."""
+    accounts, errors, seen = [], [], set()
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            username = (row.get("utilisateur") or "").strip()
+            password = row.get("mot_de_passe") or ""
+            role = (row.get("role") or "").strip() or None
+            if not username or not password:
+                errors.append(f"ligne {line} : utilisateur ou mot de passe manquant")
+            elif password_too_long(password):
+                errors.append(f"ligne {line} : mot de passe de plus de {BCRYPT_MAX_BYTES} octets")
+            elif role not in (None, ADMIN_ROLE):
+                errors.append(f"ligne {line} : rôle inconnu '{role}'")
+            elif username in seen:
+                errors.append(f"ligne {line} : '{username}' en double dans le fichier")
+            else:
+                seen.add(username)
+                accounts.append((username, password, _names(row.get("communes")), _names(row.get("regions")), role))
+    return accounts, errors
+
+
+def import_accounts(accounts, replace=False, workers=None, rounds=BCRYPT_ROUNDS):
+    """Hache en parallèle et enregistre ; renvoie (créés, ignorés car existants).
+
+    Le hachage (long) se fait hors verrou ; ``users.json`` est ensuite relu sous verrou
+    et les comptes fusionnés, sans écraser ce qui a été écrit entre-temps.
+    """
+    users = read_json(USER_FILE)  # un fichier corrompu arrête l'import au lieu d'être écrasé
+    todo = [account for account in accounts if replace or account[0] not in users]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        hashes = list(pool.map(hash_password, [a[1] for a in todo], [rounds] * len(todo), chunksize=CHUNK_SIZE))
+    saved = []
+    with users_update() as users:
+        for (username, _, communes, regions, role), hashed in zip(todo, hashes):
+            if not replace and username in users:
+                continue  # créé par ailleurs pendant le hachage
+            users[username] = hashed
+            set_scope(users, username, communes, regions)
+            set_role(users, username, role)
+            saved.append(username)
+    if replace:
+        # Comptes remplacés : leurs sessions ne doivent pas survivre à l'ancien mot de passe.
+        revoke_shared(saved)
+    return len(saved), len(accounts) - len(saved)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crée des comptes SamaStat à partir d'un CSV.")
+    parser.add_argument("fichier", help="CSV : utilisateur, mot_de_passe[, communes, regions, role]")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Processus de hachage")
+    parser.add_argument("--cout", type=int, default=BCRYPT_ROUNDS, help="Coût bcrypt")
+    parser.add_argument("--remplacer", action="store_true", help="Remplace les comptes existants")
+    args = parser.parse_args(argv)
+
+    accounts, errors = read_accounts(args.fichier)
+    for error in errors:
+        print(f"⚠️ {error}")
+    start = time.perf_counter()
+    created, skipped = import_accounts(accounts, args.remplacer, args.workers, args.cout)
+    print(f"{created} comptes enregistrés, {skipped} existants ignorés "
+          f"en {time.perf_counter() - start:.2f} s ({args.workers} processus, coût {args.cout})")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""Jeux de données partagés entre les sessions Streamlit et budget mémoire par session.
+
+Un jeu de données déclaré avec ``@shared_dataset`` est chargé une seule fois par
+processus (sémantique ``st.cache_resource``) ; chaque session n'en reçoit qu'une vue
+en lecture seule. L'état propre à une session se limite alors aux filtres et sélections.
+Les petits fichiers JSON (comptes, communes) ne sont relus que lorsqu'ils changent sur disque.
+"""
+import contextlib
+import copy
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# --- PARAMÈTRES ---
+SESSION_BUDGET_MB = float(os.environ.get("SAMASTAT_SESSION_BUDGET_MB", "25"))
+
+
+# --- VUES EN LECTURE SEULE ---
+def read_only_view(data):
+    """Renvoie une vue sans copie : toute modification côté session crée sa propre copie.
+
+    Repose sur le Copy-on-Write de pandas, toujours actif à partir de pandas 3 (``requirements.txt``).
+    """
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        return data.copy(deep=False)
+    if isinstance(data, np.ndarray):
+        view = data.view()
+        view.flags.writeable = False
+        return view
+    if isinstance(data, dict):
+        return {key: read_only_view(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return tuple(read_only_view(value) for value in data)
+    return data
+
+
+def shared_dataset(loader=None, *, max_entries=None):
+    """Décorateur : charge le jeu de données une fois par processus et distribue des vues.
+
+    ``@shared_dataset(max_entries=n)`` borne le nombre de jeux gardés (un par jeu d'arguments).
+    """
+    if loader is None:
+        return lambda fn: shared_dataset(fn, max_entries=max_entries)
+    cached_loader = st.cache_resource(show_spinner=False, max_entries=max_entries)(loader)
+
+    def get(*args, **kwargs):
+        return read_only_view(cached_loader(*args, **kwargs))
+
+    get.__name__ = loader.__name__
+    get.__doc__ = loader.__doc__
+    get.clear = cached_loader.clear
+    return get
+
+
+# --- VERSIONS ---
+def file_version(path):
+    """Version d'un fichier source (date et taille) : change dès que le fichier est réécrit."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return "absent"
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def frame_version(df):
+    """Empreinte du contenu d'un tableau, pour les clés des caches persistés sur disque."""
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    digest.update(",".join(map(str, df.columns)).encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+# --- FICHIERS JSON ---
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _parse_json(path, mtime_ns, size):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_json(path, default=None, private=True):
+    """Contenu d'un fichier JSON, relu seulement si sa date ou sa taille a changé.
+
+    Avec ``private=False`` l'objet partagé est renvoyé tel quel : à ne pas modifier.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        data = {} if default is None else default
+        return copy.deepcopy(data) if private else data  # le défaut de l'appelant n'est pas modifié
+    data = _parse_json(path, stat.st_mtime_ns, stat.st_size)
+    return copy.deepcopy(data) if private else data
+
+
+def write_json(path, data, **kwargs):
+    """Écriture atomique : les lecteurs voient l'ancien ou le nouveau fichier, jamais un fichier partiel."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, **kwargs)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Verrou exclusif entre processus, posé sur un fichier témoin ``path`` (créé au besoin)."""
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# --- COMPTABILITÉ MÉMOIRE ---
+def deep_sizeof(obj, _seen=None):
+    """Taille approximative en octets d'un objet, en comptant le contenu des conteneurs."""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, _seen) + deep_sizeof(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(v, _seen) for v in obj)
+    return size
+
+
+def session_memory_bytes(state=None):
+    """Mémoire retenue par la session courante, clé par clé de ``st.session_state``."""
+    state = st.session_state if state is None else state
+    return {key: deep_sizeof(state[key]) for key in state.keys()}
+
+
+def check_session_budget(budget_mb=SESSION_BUDGET_MB):
+    """Affiche la mémoire de la session dans la barre latérale et alerte au-delà du budget."""
+    usage = session_memory_bytes()
+    total_mb = sum(usage.values()) / 1e6
+    if total_mb > budget_mb:
+        heaviest = max(usage, key=usage.get)
+        st.sidebar.warning(
+            f"⚠️ Session : {total_mb:.1f} Mo (budget {budget_mb:.0f} Mo). "
+            f"Clé la plus lourde : « {heaviest} »."
+        )
+    else:
+        st.sidebar.caption(f"💾 Mémoire de session : {total_mb:.2f} Mo / {budget_mb:.0f} Mo")
+    return total_mb
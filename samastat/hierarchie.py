@@ -0,0 +1,273 @@
+"""Hiérarchie administrative région → département → commune et agrégats précalculés.
+
+Chaque ligne de données est rattachée à un nœud de l'arbre, à n'importe quel niveau :
+une délégation SAED couvre un département entier (Podor) ou une seule commune
+(Richard-Toll). Chaque nœud garde les sommes de ses lignes et de celles de ses
+descendants : les indicateurs additifs (population, superficie) sont des sommes, les
+taux des moyennes pondérées (Σ poids × taux / Σ poids). Descendre ou remonter d'un
+niveau n'est qu'une lecture de ces sommes ; modifier une ligne ne met à jour que le
+nœud et ses ancêtres.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from samastat.donnees import file_version, read_only_view
+
+# --- PARAMÈTRES ---
+LEVELS = ("Région", "Département", "Commune")
+NATIONAL = "Sénégal"
+TERRITORY_FILE = "territoires.csv"
+ALL = "(tous)"
+
+# Référentiel intégré, complété ou corrigé par ``territoires.csv`` (Commune, Département, Région).
+DEPARTEMENTS = {
+    "Dakar": ["Dakar", "Guédiawaye", "Keur Massar", "Pikine", "Rufisque"],
+    "Diourbel": ["Bambey", "Diourbel", "Mbacké"],
+    "Fatick": ["Fatick", "Foundiougne", "Gossas"],
+    "Kaffrine": ["Birkelane", "Kaffrine", "Koungheul", "Malem Hodar"],
+    "Kaolack": ["Guinguinéo", "Kaolack", "Nioro du Rip"],
+    "Kédougou": ["Kédougou", "Salémata", "Saraya"],
+    "Kolda": ["Kolda", "Médina Yoro Foulah", "Vélingara"],
+    "Louga": ["Kébémer", "Linguère", "Louga"],
+    "Matam": ["Kanel", "Matam", "Ranérou-Ferlo"],
+    "Saint-Louis": ["Dagana", "Podor", "Saint-Louis"],
+    "Sédhiou": ["Bounkiling", "Goudomp", "Sédhiou"],
+    "Tambacounda": ["Bakel", "Goudiry", "Koumpentoum", "Tambacounda"],
+    "Thiès": ["Mbour", "Thiès", "Tivaouane"],
+    "Ziguinchor": ["Bignona", "Oussouye", "Ziguinchor"],
+}
+COMMUNES = {"Richard-Toll": "Dagana"}
+
+
+# --- RÉFÉRENTIEL ---
+@st.cache_data(show_spinner=False, max_entries=2)
+def territory_reference(version):
+    """Correspondances département → région et commune → département."""
+    department_region = {dept: region for region, depts in DEPARTEMENTS.items() for dept in depts}
+    commune_department = dict(COMMUNES)
+    if version != "absent":
+        df = pd.read_csv(TERRITORY_FILE, dtype=str).dropna(subset=["Commune", "Département"])
+        commune_department.update(zip(df["Commune"], df["Département"]))
+        known = df.dropna(subset=["Région"])
+        department_region.update(zip(known["Département"], known["Région"]))
+    return department_region, commune_department
+
+
+def _label(value):
+    return value if isinstance(value, str) and value else None
+
+
+def territory_path(region=None, departement=None, commune=None):
+    """Chemin ``(région, département, commune)`` complété par le référentiel ; ``None`` si inconnu."""
+    region, departement, commune = _label(region), _label(departement), _label(commune)
+    department_region, commune_department = territory_reference(file_version(TERRITORY_FILE))
+    if commune is not None and departement is None:
+        departement = commune_department.get(commune)
+    if departement is not None and region is None:
+        region = department_region.get(departement)
+    return region, departement, commune
+
+
+def locate(name):
+    """Chemin d'un nom de département, de commune ou de région ; le département l'emporte
+    (« Matam » désigne le département, pas la commune)."""
+    department_region, commune_department = territory_reference(file_version(TERRITORY_FILE))
+    if name in department_region:
+        return territory_path(departement=name)
+    if name in commune_department:
+        return territory_path(commune=name)
+    if name in DEPARTEMENTS:
+        return (name, None, None)
+    return None
+
+
+def _key(path):
+    """Chemin sans les niveaux inconnus de fin : ``("Saint-Louis", "Dagana")``."""
+    path = tuple(path)
+    while path and path[-1] is None:
+        path = path[:-1]
+    return path
+
+
+# --- AGRÉGATS ---
+class Hierarchy:
+    """Arbre des territoires et sommes précalculées de chaque nœud (ses lignes et ses descendants).
+
+    ``additive`` : colonnes sommées ; ``weighted`` : ``{taux: colonne de poids}``, un poids
+    ``None`` donnant la moyenne simple des lignes. Un chemin ``None`` écarte la ligne
+    (nom absent du référentiel, voir ``unplaced``).
+    """
+
+    def __init__(self, paths, frame, additive=(), weighted=None):
+        self.additive = list(additive)
+        self.weighted = dict(weighted or {})
+        self._inputs = list(dict.fromkeys(self.additive + list(self.weighted)
+                                          + [w for w in self.weighted.values() if w]))
+        self._lock = threading.Lock()
+        self._views = {}
+        self.version = 0
+
+        self._ids = {(): 0}
+        self.paths = [()]
+        self.parent = [-1]
+        self._children = [[]]
+        row_nodes, rows, seen, self.unplaced = [], [], set(), []
+        values = frame[self._inputs].to_numpy(dtype=np.float64)
+        for i, path in enumerate(paths):
+            if path is None:
+                self.unplaced.append(i)
+                continue
+            node = self._node(_key(path))
+            if node in seen:
+                raise ValueError(f"Deux lignes pour le même territoire : {' / '.join(filter(None, path))}")
+            seen.add(node)
+            row_nodes.append(node)
+            rows.append(i)
+        self.parent = np.asarray(self.parent)
+        self.depth = np.array([len(path) for path in self.paths])
+
+        self._rows = np.full((len(self.paths), len(self._inputs)), np.nan)
+        self._rows[row_nodes] = values[rows]
+        self._has_row = np.zeros(len(self.paths), dtype=bool)
+        self._has_row[row_nodes] = True
+        self._totals = self._contributions(self._rows)
+        for depth in range(len(LEVELS), 0, -1):
+            nodes = np.flatnonzero(self.depth == depth)
+            np.add.at(self._totals, self.parent[nodes], self._totals[nodes])
+
+    def _node(self, key):
+        node = self._ids.get(key)
+        if node is None:
+            parent = self._node(_key(key[:-1]))
+            node = self._ids[key] = len(self.paths)
+            self.paths.append(key)
+            self.parent.append(parent)
+            self._children.append([])
+            self._children[parent].append(node)
+        return node
+
+    def _contributions(self, rows):
+        """Sommes apportées par des lignes : une colonne par indicateur additif, deux par taux."""
+        column = dict(zip(self._inputs, rows.T))
+        parts = [np.nan_to_num(column[name]) for name in self.additive]
+        for rate, weight in self.weighted.items():
+            x = column[rate]
+            w = np.ones(len(rows)) if weight is None else column[weight]
+            known = ~np.isnan(x) & ~np.isnan(w)
+            parts += [np.where(known, w * x, 0.0), np.where(known, w, 0.0)]
+        return np.column_stack(parts) if parts else np.zeros((len(rows), 0))
+
+    def _indicators(self, nodes):
+        totals = self._totals[nodes]
+        n = len(self.additive)
+        table = {name: totals[:, i] for i, name in enumerate(self.additive)}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for j, rate in enumerate(self.weighted):
+                table[rate] = np.round(totals[:, n + 2 * j] / totals[:, n + 2 * j + 1], 2)
+        frame = pd.DataFrame({
+            "Territoire": [self.label(node) for node in nodes],
+            "Niveau": [self.level(node) for node in nodes],
+        })
+        return pd.concat([frame, pd.DataFrame(table)], axis=1)
+
+    # --- LECTURES ---
+    def node(self, path):
+        return self._ids[_key(path)]
+
+    def label(self, node):
+        return self.paths[node][-1] if node else NATIONAL
+
+    def level(self, node):
+        return LEVELS[self.depth[node] - 1] if node else "Pays"
+
+    def child_ids(self, node=0):
+        return list(self._children[node])
+
+    def children(self, node=0):
+        """Agrégats des enfants d'un nœud (descente d'un niveau), gardés jusqu'à la prochaine mise à jour."""
+        with self._lock:
+            view = self._views.get(node)
+            if view is None:
+                view = self._views[node] = self._indicators(self._children[node])
+        return read_only_view(view)
+
+    def lineage(self, node):
+        """Agrégats du nœud et de ses ancêtres, du pays au nœud (remontée)."""
+        with self._lock:
+            return self._indicators(self._ancestors(node)[::-1])
+
+    # --- MISES À JOUR ---
+    def _ancestors(self, node):
+        """Le nœud puis ses ancêtres jusqu'à la racine."""
+        nodes = []
+        while node >= 0:
+            nodes.append(node)
+            node = self.parent[node]
+        return nodes
+
+    def _apply(self, node, row):
+        delta = self._contributions(row[None])[0] - self._contributions(self._rows[node][None])[0]
+        self._rows[node] = row
+        ancestors = self._ancestors(node)
+        self._totals[ancestors] += delta
+        # Seules les vues listant un nœud modifié (celles de ses ancêtres stricts) sont périmées.
+        for ancestor in ancestors[1:]:
+            self._views.pop(ancestor, None)
+
+    def update(self, path, values):
+        """Remplace des valeurs d'une ligne ; seuls le nœud et ses ancêtres sont recalculés."""
+        node = self.node(path)
+        with self._lock:
+            row = self._rows[node].copy()
+            for name, value in values.items():
+                row[self._inputs.index(name)] = value
+            self._apply(node, row)
+            self.version += 1
+
+    def sync(self, paths, frame):
+        """Applique les lignes modifiées d'une nouvelle version des données.
+
+        Renvoie le nombre de lignes mises à jour, ou ``None`` si les territoires ont
+        changé (ligne ajoutée ou retirée) : l'arbre doit alors être reconstruit.
+        """
+        placed = [(i, _key(path)) for i, path in enumerate(paths) if path is not None]
+        nodes = [self._ids.get(key) for _, key in placed]
+        if None in nodes or len(set(nodes)) != len(nodes):
+            return None
+        if len(nodes) != int(self._has_row.sum()) or not self._has_row[nodes].all():
+            return None
+        values = frame[self._inputs].to_numpy(dtype=np.float64)[[i for i, _ in placed]]
+        current = self._rows[nodes]
+        changed = np.flatnonzero(~((values == current) | (np.isnan(values) & np.isnan(current))).all(axis=1))
+        with self._lock:
+            for j in changed:
+                self._apply(nodes[j], values[j])
+            if len(changed):
+                self.version += 1
+        return len(changed)
+
+
+# --- AFFICHAGE ---
+def show_drilldown(hierarchy, key):
+    """Agrégats par niveau : une liste déroulante par niveau pour descendre, la lignée pour remonter."""
+    node = 0
+    columns = st.columns(len(LEVELS))
+    for depth, level in enumerate(LEVELS):
+        children = hierarchy.child_ids(node)
+        if not children:
+            break
+        # Options : noms (stables d'une reconstruction à l'autre), pas numéros de nœuds.
+        by_name = {hierarchy.label(child): child for child in children}
+        choice = columns[depth].selectbox(level, [ALL, *by_name], key=f"{key}_niveau_{depth}")
+        if choice == ALL:
+            break
+        node = by_name[choice]
+    if node:
+        st.dataframe(hierarchy.lineage(node), hide_index=True)
+    children = hierarchy.children(node)
+    if len(children):
+        st.markdown(f"**{hierarchy.label(node)}** : détail par territoire")
+        st.dataframe(children, hide_index=True)
@@ -0,0 +1,272 @@
+"""Instrumentation des chemins critiques : temps réel, temps CPU et allocations par étape.
+
+Usage dans une application :
+
+    begin_rerun("sene_mairie")          # en tête de script / de main()
+    ...
+    end_rerun()                         # en fin de script (facultatif)
+
+    @instrument()
+    def load_users(): ...
+
+    with stage("graphiques onglet 1"):
+        ...
+
+    show_perf_panel()                   # panneau réservé aux administrateurs
+
+Chaque rerun Streamlit produit un enregistrement (étapes et durées) conservé en mémoire,
+exportable au format texte Prometheus ou ajouté à un fichier JSONL local. Les
+allocations ne sont mesurées que si ``SAMASTAT_PROFILE_ALLOC=1`` (tracemalloc a un coût) ;
+tracemalloc ne suit qu'un pic pour tout le processus, si bien que deux reruns simultanés
+faussent leurs allocations par étape : elles ne sont qu'indicatives sous charge.
+"""
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict, defaultdict, deque
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# --- PARAMÈTRES ---
+JSONL_FILE = os.environ.get("SAMASTAT_PERF_JSONL", "")
+PROMETHEUS_FILE = os.environ.get("SAMASTAT_PERF_PROM", "")
+HISTORY_SIZE = 500
+MAX_OPEN_RERUNS = 1000        # sessions suivies au plus ; les plus anciennes sont closes
+
+if os.environ.get("SAMASTAT_PROFILE_ALLOC") == "1" and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+_lock = threading.Lock()
+_local = threading.local()
+_current = OrderedDict()  # session -> rerun en cours
+_history = deque(maxlen=HISTORY_SIZE)
+_totals = defaultdict(lambda: {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "alloc_bytes": 0})
+_rerun_totals = defaultdict(lambda: {"reruns": 0, "wall_s": 0.0})
+_rerun_seq = 0
+
+
+def _session_key():
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else "hors-session"
+
+
+# --- RERUNS ---
+def begin_rerun(app):
+    """Ouvre l'enregistrement du rerun courant et clôt le précédent de la même session."""
+    global _rerun_seq
+    key = _session_key()
+    with _lock:
+        _rerun_seq += 1
+        previous = _current.pop(key, None)
+        _current[key] = {
+            "rerun": _rerun_seq,
+            "app": app,
+            "session": key,
+            "started_at": time.time(),
+            "_t0": time.perf_counter(),
+            "stages": [],
+        }
+        # Sessions fermées sans nouveau rerun : leur dernier enregistrement est clos ici.
+        closed = [_current.popitem(last=False)[1] for _ in range(len(_current) - MAX_OPEN_RERUNS)]
+    for record in ([previous] if previous is not None else []) + closed:
+        _finish(record)
+
+
+def end_rerun():
+    """Marque la fin du rerun courant (sinon : fin de sa dernière étape mesurée)."""
+    with _lock:
+        record = _current.get(_session_key())
+        if record is not None:
+            record["_t_end"] = time.perf_counter()
+
+
+def _finish(record):
+    record = dict(record)
+    t0 = record.pop("_t0")
+    t_end = record.pop("_t_end", None)
+    if t_end is not None:
+        record["wall_s"] = round(t_end - t0, 6)
+    else:
+        # Sans fin explicite (ex. st.stop()), on s'arrête à la dernière étape mesurée.
+        record["wall_s"] = max((s["end_s"] for s in record["stages"]), default=0.0)
+    with _lock:
+        _history.append(record)
+        totals = _rerun_totals[record["app"]]
+        totals["reruns"] += 1
+        totals["wall_s"] += record["wall_s"]
+    if JSONL_FILE:
+        export_jsonl(JSONL_FILE, [record])
+    if PROMETHEUS_FILE:
+        write_prometheus(PROMETHEUS_FILE)
+
+
+# --- ÉTAPES ---
+class stage:
+    """Context manager mesurant une étape ; rattaché au rerun de la session courante."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self._tracing = tracemalloc.is_tracing()
+        if self._tracing:
+            # Pic global au processus : une étape concurrente le remet aussi à zéro (mesure indicative).
+            self._mem0 = tracemalloc.get_traced_memory()[0]
+            self._child_peak = 0
+            tracemalloc.reset_peak()
+        stack.append(self)
+        self._cpu0 = time.thread_time()
+        self._wall0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall0
+        cpu = time.thread_time() - self._cpu0
+        stack = _local.stack
+        stack.pop()
+        alloc = 0
+        if self._tracing:
+            peak = max(tracemalloc.get_traced_memory()[1], self._child_peak)
+            alloc = max(peak - self._mem0, 0)
+            if stack and getattr(stack[-1], "_tracing", False):
+                stack[-1]._child_peak = max(stack[-1]._child_peak, peak)
+        self._record(wall, cpu, alloc, failed=exc_type is not None)
+        return False
+
+    def _record(self, wall, cpu, alloc, failed):
+        key = _session_key()
+        with _lock:
+            totals = _totals[self.name]
+            totals["calls"] += 1
+            totals["wall_s"] += wall
+            totals["cpu_s"] += cpu
+            totals["alloc_bytes"] += alloc
+            record = _current.get(key)
+            if record is not None:
+                record["stages"].append({
+                    "stage": self.name,
+                    "wall_s": round(wall, 6),
+                    "cpu_s": round(cpu, 6),
+                    "alloc_bytes": int(alloc),
+                    "end_s": round(time.perf_counter() - record["_t0"], 6),
+                    "thread": threading.current_thread().name,
+                    "failed": failed,
+                })
+
+
+def instrument(name=None):
+    """Décorateur : chaque appel de la fonction est mesuré comme une étape."""
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# --- EXPORTS ---
+def history():
+    with _lock:
+        return list(_history)
+
+
+def current_rerun():
+    with _lock:
+        record = _current.get(_session_key())
+        return None if record is None else {**record, "stages": list(record["stages"])}
+
+
+def reset():
+    """Vide l'historique et les compteurs (benchmarks, tests de charge)."""
+    with _lock:
+        _current.clear()
+        _history.clear()
+        _totals.clear()
+        _rerun_totals.clear()
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def export_prometheus():
+    """Compteurs cumulés du processus au format d'exposition texte Prometheus."""
+    with _lock:
+        stages = {name: dict(values) for name, values in _totals.items()}
+        reruns = {app: dict(values) for app, values in _rerun_totals.items()}
+    metrics = [
+        ("samastat_stage_calls_total", "Nombre d'appels par étape.", "calls"),
+        ("samastat_stage_wall_seconds_total", "Temps réel cumulé par étape.", "wall_s"),
+        ("samastat_stage_cpu_seconds_total", "Temps CPU (thread) cumulé par étape.", "cpu_s"),
+        ("samastat_stage_alloc_bytes_total", "Pic d'allocations cumulé par étape (tracemalloc).", "alloc_bytes"),
+    ]
+    lines = []
+    for metric, help_text, field in metrics:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        lines += [f'{metric}{{stage="{_label(name)}"}} {values[field]}' for name, values in sorted(stages.items())]
+    lines += ["# HELP samastat_reruns_total Nombre de reruns terminés par application.",
+              "# TYPE samastat_reruns_total counter"]
+    lines += [f'samastat_reruns_total{{app="{_label(app)}"}} {v["reruns"]}' for app, v in sorted(reruns.items())]
+    lines += ["# HELP samastat_rerun_wall_seconds_total Temps réel cumulé des reruns par application.",
+              "# TYPE samastat_rerun_wall_seconds_total counter"]
+    lines += [f'samastat_rerun_wall_seconds_total{{app="{_label(app)}"}} {v["wall_s"]}' for app, v in sorted(reruns.items())]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path):
+    """Écrit l'exposition Prometheus de façon atomique (lisible par le textfile collector)."""
+    folder = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(export_prometheus())
+    os.replace(tmp_path, path)
+
+
+def export_jsonl(path, records=None):
+    """Ajoute les enregistrements de reruns (par défaut tout l'historique) à un fichier JSONL."""
+    records = history() if records is None else records
+    with open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+# --- PANNEAU ADMIN ---
+def show_perf_panel():
+    """Panneau de chronométrage du rerun, visible uniquement par les administrateurs."""
+    from samastat.auth import is_admin  # auth est lui-même instrumenté
+
+    if not is_admin():
+        return
+    import pandas as pd
+
+    with st.sidebar.expander("⏱️ Performances (admin)"):
+        record = current_rerun()
+        if record and record["stages"]:
+            st.caption(f"Rerun n°{record['rerun']} – {record['app']}")
+            st.dataframe(pd.DataFrame(record["stages"])[["stage", "wall_s", "cpu_s", "alloc_bytes", "thread"]],
+                         use_container_width=True)
+        done = history()
+        if done:
+            df = pd.DataFrame([{"stage": s["stage"], "wall_s": s["wall_s"], "cpu_s": s["cpu_s"]}
+                               for r in done for s in r["stages"]])
+            if not df.empty:
+                st.caption("Cumul sur les reruns précédents")
+                st.dataframe(df.groupby("stage").agg(appels=("wall_s", "size"), wall_s=("wall_s", "sum"),
+                                                     p95_s=("wall_s", lambda s: s.quantile(0.95)),
+                                                     cpu_s=("cpu_s", "sum")).sort_values("wall_s", ascending=False),
+                             use_container_width=True)
+        st.download_button("📥 Export Prometheus", export_prometheus().encode("utf-8"),
+                           file_name="samastat_metrics.prom", mime="text/plain")
+        st.download_button("📥 Export JSONL", "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in done).encode("utf-8"),
+                           file_name="samastat_reruns.jsonl", mime="application/json")
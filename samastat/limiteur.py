@@ -0,0 +1,137 @@
+"""Limitation des tentatives de connexion : seau à jetons par utilisateur et par adresse IP.
+
+Chaque tentative consomme un jeton dans le seau de l'utilisateur visé et dans celui de
+l'adresse d'origine ; un seau vide refuse la tentative sans calcul bcrypt. Les échecs
+répétés sur un même compte le verrouillent pour une durée qui double à chaque nouvel
+échec. L'état est partagé par toutes les sessions du processus serveur. Les clients sans
+adresse connue partagent un même seau ; un verrou en cours n'est jamais oublié pour
+faire de la place.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+# --- PARAMÈTRES ---
+USER_BURST = 5                 # tentatives immédiates par compte
+USER_REFILL_S = 12.0           # puis une tentative toutes les 12 s
+IP_BURST = 20                  # tentatives immédiates par adresse
+IP_REFILL_S = 3.0
+LOCKOUT_AFTER = 5              # échecs consécutifs avant verrouillage
+LOCKOUT_BASE_S = 30.0          # 30 s, 60 s, 120 s… jusqu'au plafond
+LOCKOUT_MAX_S = 3600.0
+MAX_TRACKED = 10_000           # clés suivies au plus (les plus anciennes sont oubliées)
+UNKNOWN_IP = "inconnue"        # seau commun aux clients sans adresse
+TRUST_PROXY = os.environ.get("SAMASTAT_PROXY") == "1"  # X-Forwarded-For fiable (derrière un proxy)
+BCRYPT_SLOTS = int(os.environ.get("SAMASTAT_BCRYPT_SLOTS", max(1, (os.cpu_count() or 2) // 2)))
+
+
+class TokenBucket:
+    """Seau de ``capacity`` jetons, rempli d'un jeton toutes les ``refill_s`` secondes."""
+
+    def __init__(self, capacity, refill_s, now=None):
+        self.capacity = capacity
+        self.refill_s = refill_s
+        self.tokens = float(capacity)
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) / self.refill_s)
+        self.updated = now
+
+    def take(self, now):
+        """Consomme un jeton ; renvoie 0 ou l'attente (s) avant le prochain jeton."""
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) * self.refill_s
+
+
+class LoginLimiter:
+    """Seaux par utilisateur et par IP, verrouillage progressif après des échecs répétés."""
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._users = OrderedDict()
+        self._ips = OrderedDict()
+        self._failures = OrderedDict()  # utilisateur -> (échecs consécutifs, fin du verrou)
+
+    @staticmethod
+    def _trim(table):
+        while len(table) > MAX_TRACKED:
+            table.popitem(last=False)
+
+    def _touch(self, table, key, factory):
+        value = table.pop(key, None)
+        table[key] = value = factory() if value is None else value
+        self._trim(table)
+        return value
+
+    def _trim_failures(self, now):
+        """Oublie les plus anciens échecs, jamais un verrou actif ou récent (quitte à dépasser ``MAX_TRACKED``)."""
+        kept = 0
+        while len(self._failures) > MAX_TRACKED and kept < len(self._failures):
+            username, (failures, locked_until) = self._failures.popitem(last=False)
+            if failures >= LOCKOUT_AFTER and locked_until + LOCKOUT_MAX_S > now:
+                self._failures[username] = (failures, locked_until)  # remis en fin de file
+                kept += 1
+
+    def acquire(self, username, ip):
+        """Autorise une tentative ou renvoie l'attente (s) imposée ; rien n'est haché ici.
+
+        ``ip=None`` (adresse inconnue) : seau commun ``UNKNOWN_IP`` à tous ces clients.
+        """
+        now = self._clock()
+        with self._lock:
+            _, locked_until = self._failures.get(username, (0, 0.0))
+            if locked_until > now:
+                return locked_until - now
+            user_bucket = self._touch(self._users, username, lambda: TokenBucket(USER_BURST, USER_REFILL_S, now))
+            ip_bucket = self._touch(self._ips, UNKNOWN_IP if ip is None else ip,
+                                    lambda: TokenBucket(IP_BURST, IP_REFILL_S, now))
+            return max(ip_bucket.take(now), user_bucket.take(now))
+
+    def record_failure(self, username):
+        now = self._clock()
+        with self._lock:
+            failures, _ = self._failures.pop(username, (0, 0.0))
+            failures += 1
+            locked_until = 0.0
+            if failures >= LOCKOUT_AFTER:
+                locked_until = now + min(LOCKOUT_MAX_S, LOCKOUT_BASE_S * 2 ** (failures - LOCKOUT_AFTER))
+            self._failures[username] = (failures, locked_until)
+            self._trim_failures(now)
+
+    def record_success(self, username):
+        with self._lock:
+            self._failures.pop(username, None)
+
+
+@st.cache_resource(show_spinner=False)
+def get_login_limiter():
+    """Limiteur partagé par toutes les sessions du processus."""
+    return LoginLimiter()
+
+
+@st.cache_resource(show_spinner=False)
+def get_bcrypt_slots():
+    """Nombre de vérifications bcrypt simultanées : le reste des cœurs reste aux pages."""
+    return threading.BoundedSemaphore(BCRYPT_SLOTS)
+
+
+def client_ip():
+    """Adresse du client (premier saut de ``X-Forwarded-For`` si ``SAMASTAT_PROXY=1``) ; ``None`` si inconnue."""
+    try:
+        forwarded = st.context.headers.get("X-Forwarded-For", "") if TRUST_PROXY else ""
+        return forwarded.split(",")[0].strip() or st.context.ip_address or None
+    except Exception:  # hors serveur (tests, scripts)
+        return None
+
+
+def format_wait(seconds):
+    seconds = int(seconds + 0.999)
+    return f"{seconds // 60} min {seconds % 60:02d} s" if seconds >= 60 else f"{seconds} s"
@@ -0,0 +1,307 @@
+"""Données communales et rapports partagés par les applications SamaStat Mairie.
+
+Le CSV communal est aussi découpé en partitions (un fichier Parquet par commune) : une
+session limitée à un périmètre (communes ou régions autorisées, voir ``auth.user_scope``)
+ne charge et ne met en cache que les lignes de ce périmètre. Les agrégats par
+département et par région (``commune_hierarchy``) suivent le CSV ligne par ligne.
+"""
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+import streamlit as st
+
+from samastat.artefacts import content_version, read_artifact, table_version
+from samastat.donnees import file_version, read_json, write_json
+from samastat.hierarchie import TERRITORY_FILE, Hierarchy, territory_path
+from samastat.instrumentation import instrument
+from samastat.ponderation import weighted_report, weighted_summary
+
+# --- PARAMÈTRES ---
+DATA_FILE = "samastat_mairie_donnees.csv"
+COMMUNE_FILE = "communes.json"
+PARTITION_DIR = os.path.join("partitions", "mairie")
+PARTITION_INDEX = os.path.join(PARTITION_DIR, "index.json")
+MAX_CACHED_SCOPES = 64
+CHART_FIELDS = [
+    "Taux de Scolarisation (%)", "Taux de Vaccination (%)", "Taux de Chômage (%)",
+    "Accès à l'Eau Potable (%)", "Électricité (%)"
+]
+HIERARCHY_ADDITIVE = [
+    "Population Totale", "Nombre d'Écoles", "Postes de Sécurité", "Logements Sociaux Construits",
+    "Budget Participatif (millions CFA)", "Incendies/an",
+]
+HIERARCHY_RATES = ["Croissance Annuelle (%)", "Femmes (%)", *CHART_FIELDS]  # pondérés par la population
+DOMAIN_RATES = ("Taux Vaccination (%)",)
+DOMAIN_WEIGHTINGS = {"Population": "Population", "Aucune (moyenne simple)": None}
+
+COMMUNES = {
+    "Dakar": {"Population": 1050000, "Taux Vaccination (%)": 75},
+    "Thiès": {"Population": 320000, "Taux Vaccination (%)": 65},
+    "Diourbel": {"Population": 250000, "Taux Vaccination (%)": 70},
+}
+# Clé des caches de ``communes_frame`` : calculée une fois, pas en hachant le tableau à chaque rerun.
+COMMUNES_VERSION = hashlib.sha1(json.dumps(COMMUNES, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+# --- COMMUNES CIBLÉES ---
+@st.cache_data(show_spinner=False)
+def communes_frame():
+    return pd.DataFrame(COMMUNES).T
+
+
+def show_commune_report(df, version):
+    """Téléchargement des données, rapport synthétique (.csv) et aperçu du rapport.
+
+    ``version`` identifie la source de ``df`` (``COMMUNES_VERSION`` pour ``communes_frame``).
+    """
+    st.markdown("### 📥 Télécharger les données")
+    st.download_button(
+        label="📊 Télécharger les données des communes (.csv)",
+        data=df.to_csv(index=True).encode('utf-8'),
+        file_name='donnees_communes.csv',
+        mime='text/csv'
+    )
+
+    st.markdown("### 🧾 Télécharger un rapport synthétique")
+    # Taux pondéré par la population : Dakar ne pèse pas autant que Diourbel.
+    vaccination = weighted_report(df, version, ("Taux Vaccination (%)",)).iloc[0]
+    rapport = f"""\n
+    RAPPORT SAMAStat Mairie - Zones Ciblées\n
+    Nombre de communes : {len(df)}\n
+    Population totale : {df['Population'].sum():,}\n
+    Taux de vaccination moyen (pondéré par la population) : {vaccination['Taux Vaccination (%)']:.2f} %\n
+    Taux de vaccination médian (pondéré) : {vaccination['Taux Vaccination (%) – médiane']:.2f} %"""
+
+    rapport_csv = "Indicateur,Valeur\n"
+    rapport_csv += f"Nombre de communes,{len(df)}\n"
+    rapport_csv += f"Population totale,{df['Population'].sum()}\n"
+    rapport_csv += f"Taux vaccination moyen (pondéré),{vaccination['Taux Vaccination (%)']:.2f} %\n"
+    rapport_csv += f"Taux vaccination médian (pondéré),{vaccination['Taux Vaccination (%) – médiane']:.2f} %\n"
+
+    st.download_button(
+        label="📄 Télécharger rapport synthétique (.csv)",
+        data=rapport_csv.encode('utf-8'),
+        file_name="rapport_samastat.csv",
+        mime="text/csv"
+    )
+
+    st.text_area("Aperçu du rapport :", rapport.strip(), height=150)
+
+
+# --- FICHIER DES COMMUNES ---
+def load_communes():
+    return read_json(COMMUNE_FILE)
+
+
+def save_communes(data):
+    write_json(COMMUNE_FILE, data, indent=2, ensure_ascii=False)
+
+
+def communes_version():
+    return content_version(COMMUNE_FILE)
+
+
+def territory_version():
+    """Empreinte de ``territoires.csv`` (rattachement des communes aux régions)."""
+    return content_version(TERRITORY_FILE)
+
+
+def communes_table(data):
+    """Une ligne par commune du fichier des communes, avec la colonne ``Commune``."""
+    df = pd.DataFrame(data).T
+    df['Commune'] = df.index
+    return df.reset_index(drop=True)
+
+
+def domain_tables(data, version):
+    """Statistiques par domaine pour chaque pondération (artefact ``domaines`` du planificateur).
+
+    ``version`` : empreinte du fichier des communes d'où vient ``data`` (``communes_version``).
+    """
+    df = communes_table(data)
+    if "Domaine" not in df:
+        # communes.json absent ou sans domaines : tableaux vides plutôt qu'un échec à chaque passage.
+        empty = pd.DataFrame(columns=["Population", *DOMAIN_RATES], index=pd.Index([], name="Domaine"))
+        return {label: empty for label in DOMAIN_WEIGHTINGS}
+    return {
+        label: weighted_report(df, version, DOMAIN_RATES, weight=weight, by="Domaine", additive=("Population",))
+        for label, weight in DOMAIN_WEIGHTINGS.items()
+    }
+
+
+def domain_stats(data, weighting):
+    """Statistiques par domaine publiées par le planificateur, calculées ici si absentes ou périmées."""
+    version = communes_version()
+    published = read_artifact("domaines", communes=version)
+    return (domain_tables(data, version) if published is None else published)[weighting]
+
+
+# --- INDICATEURS PAR COMMUNE (CSV) ---
+@st.cache_data(show_spinner=False)
+def load_commune_names():
+    return pd.read_csv(DATA_FILE, usecols=["Commune"])["Commune"].unique().tolist()
+
+
+@st.cache_data(show_spinner=False)
+@instrument("read_csv mairie")
+def load_data():
+    return pd.read_csv(DATA_FILE)
+
+
+def data_version():
+    """Empreinte du CSV (une par commune, voir ``samastat.artefacts.table_source``)."""
+    return table_version(DATA_FILE, "Commune")
+
+
+def commune_indicators(row):
+    """Ligne d'une commune et données de son graphique (artefact ``lignes_communes``)."""
+    return {"ligne": row, "graphique": row[CHART_FIELDS].astype(float).to_frame("Valeur")}
+
+
+def _published_commune(commune, scope):
+    if scope is not None:
+        return None
+    published = read_artifact("lignes_communes", mairie=data_version())
+    return None if published is None else published.get(commune)
+
+
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_SCOPES)
+def get_commune_row(commune, scope=None):
+    published = _published_commune(commune, scope)
+    if published is not None:
+        return published["ligne"]
+    df = load_scoped_data(scope)
+    return df[df["Commune"] == commune].iloc[0]
+
+
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_SCOPES)
+def get_chart_data(commune, scope=None):
+    published = _published_commune(commune, scope)
+    if published is not None:
+        return published["graphique"]
+    return commune_indicators(get_commune_row(commune, scope))["graphique"]
+
+
+# --- PARTITIONS PAR PÉRIMÈTRE ---
+_partition_lock = threading.Lock()
+
+
+def _partition_file(commune):
+    return hashlib.sha1(commune.encode("utf-8")).hexdigest()[:12] + ".parquet"
+
+
+def build_partitions():
+    """Découpe le CSV en un fichier par commune et écrit l'index (commune → fichier, région)."""
+    version = file_version(DATA_FILE)
+    df = pd.read_csv(DATA_FILE)
+    os.makedirs(PARTITION_DIR, exist_ok=True)
+    communes = {}
+    for commune, part in df.groupby("Commune", sort=False):
+        name = _partition_file(commune)
+        tmp_path = os.path.join(PARTITION_DIR, name + ".tmp")
+        part.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, os.path.join(PARTITION_DIR, name))
+        region = part["Région"].iloc[0] if "Région" in part else None
+        communes[commune] = {"fichier": name, "region": region if isinstance(region, str) else None}
+    index = {"source": version, "colonnes": list(df.columns), "communes": communes}
+    write_json(PARTITION_INDEX, index, indent=2, ensure_ascii=False)
+
+    # Communes retirées du CSV : leurs partitions ne sont plus référencées, on les supprime.
+    current = {entry["fichier"] for entry in communes.values()}
+    for entry in os.scandir(PARTITION_DIR):
+        if entry.name.endswith(".parquet") and entry.name not in current:
+            os.remove(entry.path)
+    return index
+
+
+def partition_index():
+    """Index des partitions, reconstruit si le CSV a changé depuis le dernier découpage."""
+    index = read_json(PARTITION_INDEX, private=False)
+    if index.get("source") == file_version(DATA_FILE):
+        return index
+    with _partition_lock:
+        index = read_json(PARTITION_INDEX, private=False)
+        if index.get("source") != file_version(DATA_FILE):
+            index = build_partitions()
+    return index
+
+
+def scope_communes(scope):
+    """Communes couvertes par un périmètre ``(communes, régions)`` ; ``None`` : toutes."""
+    if scope is None:
+        return load_commune_names()
+    communes, regions = scope
+    return [commune for commune, entry in partition_index()["communes"].items()
+            if commune in communes or entry["region"] in regions]
+
+
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_SCOPES)
+@instrument("read_parquet partitions mairie")
+def load_scope_data(scope):
+    """Lignes des seules communes du périmètre, lues depuis leurs partitions."""
+    index = partition_index()
+    names = scope_communes(scope)
+    if not names:
+        return pd.DataFrame(columns=index["colonnes"])
+    parts = [pd.read_parquet(os.path.join(PARTITION_DIR, index["communes"][name]["fichier"])) for name in names]
+    return pd.concat(parts, ignore_index=True)
+
+
+def load_scoped_data(scope=None):
+    """Tableau complet pour un compte sans restriction, partition du périmètre sinon."""
+    return load_data() if scope is None else load_scope_data(scope)
+
+
+# --- AGRÉGATS TERRITORIAUX ---
+_hierarchy_lock = threading.Lock()
+
+
+@st.cache_resource(show_spinner=False)
+def _hierarchy_state():
+    return {}
+
+
+def _commune_paths(df):
+    missing = [None] * len(df)
+    regions = df["Région"] if "Région" in df else missing
+    departments = df["Département"] if "Département" in df else missing
+    return [territory_path(region, department, commune)
+            for region, department, commune in zip(regions, departments, df["Commune"])]
+
+
+def region_summary(df):
+    """Sommes, moyennes et quantiles pondérés par la population, par région (artefact ``agregats_regions``)."""
+    df = df.assign(**{"Région": [path[0] if path else None for path in _commune_paths(df)]})
+    additive = [name for name in HIERARCHY_ADDITIVE if name in df]
+    rates = [name for name in HIERARCHY_RATES if name in df]
+    return weighted_summary(df, rates, weight="Population Totale", by="Région", additive=additive)
+
+
+def region_table():
+    """Agrégats régionaux publiés par le planificateur, calculés ici si absents ou périmés."""
+    published = read_artifact("agregats_regions", mairie=data_version(), territoires=territory_version())
+    return region_summary(load_data()) if published is None else published
+
+
+def commune_hierarchy():
+    """Agrégats communes → départements → régions → pays.
+
+    Quand le CSV change, seules les communes modifiées sont répercutées sur leurs
+    ancêtres ; l'arbre n'est reconstruit que si des communes apparaissent ou disparaissent.
+    """
+    state = _hierarchy_state()
+    version = file_version(DATA_FILE)
+    with _hierarchy_lock:
+        if state.get("version") != version:
+            df = pd.read_csv(DATA_FILE).drop_duplicates("Commune")
+            paths = _commune_paths(df)
+            hierarchy = state.get("hierarchy")
+            if hierarchy is None or hierarchy.sync(paths, df) is None:
+                additive = [name for name in HIERARCHY_ADDITIVE if name in df]
+                rates = {name: "Population Totale" for name in HIERARCHY_RATES if name in df}
+                hierarchy = Hierarchy(paths, df, additive, rates)
+            state.update(version=version, hierarchy=hierarchy)
+        return state["hierarchy"]
@@ -0,0 +1,224 @@
+"""Registre de modèles de prévision pré-entraînés pour les tableaux de bord SamaStat.
+
+Les modèles sont entraînés hors ligne (``python -m samastat.modeles``), sérialisés
+un fichier par série (commune, indicateur) et chargés à la demande dans un cache LRU.
+Une instance est partagée entre les sessions (``st.cache_resource``) : le cache, l'index
+et sa réécriture sont protégés par ``ModelRegistry.lock``. L'index est relu dès qu'il
+change sur disque (réentraînement hors ligne) ; le fichier d'une version remplacée est
+gardé ``SAMASTAT_MODELES_RETENTION_S`` secondes pour les processus qui lisent encore l'ancien
+index. Les pages n'entraînent jamais : un modèle absent lève ``MissingModelError``.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+# --- PARAMÈTRES ---
+MODEL_DIR = "modeles"
+INDEX_FILE = "index.json"
+REGISTRY_FORMAT = 1
+MAX_LOADED_MODELS = 64
+SUPERSEDED_RETENTION_S = float(os.environ.get("SAMASTAT_MODELES_RETENTION_S", "3600"))
+WARM_UP_HINT = "lancez « python -m samastat.prechauffage » ou le planificateur"
+
+
+class MissingModelError(LookupError):
+    """Modèle absent du registre : il s'entraîne hors ligne, jamais au chargement d'une page."""
+
+
+def series_id(commune, indicateur):
+    """Identifiant d'une série de prévision (commune, indicateur)."""
+    return f"{commune}::{indicateur}"
+
+
+def _atomic_write(path, payload: bytes):
+    """Écrit un fichier via un fichier temporaire pour ne jamais laisser d'état partiel."""
+    folder = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# --- REGISTRE ---
+class ModelRegistry:
+    """Stocke les modèles ajustés par série et sert des prédictions groupées."""
+
+    def __init__(self, model_dir=MODEL_DIR, max_loaded=MAX_LOADED_MODELS):
+        self.model_dir = model_dir
+        self.max_loaded = max_loaded
+        self._loaded = OrderedDict()
+        self._stamp = None
+        self._index = self._load_index()
+        # Réentrant : un entraînement de secours peut enregistrer ses modèles en le tenant.
+        self.lock = threading.RLock()
+
+    @property
+    def index_path(self):
+        return os.path.join(self.model_dir, INDEX_FILE)
+
+    def _index_stamp(self):
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load_index(self):
+        self._stamp = self._index_stamp()
+        if self._stamp is None:
+            return {"format": REGISTRY_FORMAT, "series": {}}
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("format") != REGISTRY_FORMAT:
+            raise ValueError(f"Format de registre non supporté : {index.get('format')}")
+        return index
+
+    def _refresh(self, force=False):
+        """Relit l'index s'il a été réécrit (par un autre processus) ; à appeler sous ``lock``."""
+        if not force and self._index_stamp() == self._stamp:
+            return
+        previous = self._index["series"]
+        self._index = self._load_index()
+        for sid in list(self._loaded):
+            if previous.get(sid, {}).get("fichier") != self._index["series"].get(sid, {}).get("fichier"):
+                del self._loaded[sid]
+
+    def _save_index(self):
+        os.makedirs(self.model_dir, exist_ok=True)
+        payload = json.dumps(self._index, indent=2, ensure_ascii=False).encode("utf-8")
+        _atomic_write(self.index_path, payload)
+        self._stamp = self._index_stamp()
+
+    def _retire(self, filename):
+        """Garde le fichier remplacé pendant la rétention, puis supprime ceux qui l'ont dépassée."""
+        now = time.time()
+        kept = []
+        for entry in self._index.get("remplaces", []) + [{"fichier": filename, "depuis": now}]:
+            if now - entry["depuis"] < SUPERSEDED_RETENTION_S:
+                kept.append(entry)
+            else:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(os.path.join(self.model_dir, entry["fichier"]))
+        self._index["remplaces"] = kept
+
+    def series(self):
+        with self.lock:
+            self._refresh()
+            return list(self._index["series"])
+
+    def __contains__(self, sid):
+        with self.lock:
+            self._refresh()
+            return sid in self._index["series"]
+
+    def metadata(self, sid):
+        with self.lock:
+            self._refresh()
+            if sid not in self._index["series"]:
+                raise MissingModelError(f"Modèle absent du registre : {sid} ({WARM_UP_HINT})")
+            return dict(self._index["series"][sid])
+
+    def register(self, commune, indicateur, model, metadata=None):
+        """Sérialise un modèle ajusté et incrémente la version de la série."""
+        sid = series_id(commune, indicateur)
+        with self.lock:
+            self._refresh()  # un autre processus a pu enregistrer depuis
+            previous = self._index["series"].get(sid, {})
+            version = previous.get("version", 0) + 1
+            slug = hashlib.sha1(sid.encode("utf-8")).hexdigest()[:16]
+            filename = f"{slug}-v{version}.pkl"
+
+            os.makedirs(self.model_dir, exist_ok=True)
+            _atomic_write(os.path.join(self.model_dir, filename),
+                          pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+            if previous.get("fichier"):
+                self._retire(previous["fichier"])
+            self._index["series"][sid] = {
+                "commune": commune,
+                "indicateur": indicateur,
+                "version": version,
+                "fichier": filename,
+                "modele": type(model).__name__,
+                "entraine_le": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                **(metadata or {}),
+            }
+            self._save_index()
+            self._loaded.pop(sid, None)
+            return version
+
+    def get(self, sid):
+        """Charge un modèle à la demande en gardant au plus ``max_loaded`` modèles en mémoire."""
+        with self.lock:
+            self._refresh()
+            if sid in self._loaded:
+                self._loaded.move_to_end(sid)
+                return self._loaded[sid]
+            try:
+                model = self._read_model(sid)
+            except FileNotFoundError:
+                # Index relu trop tôt (réécriture en cours ailleurs) : on le relit une fois.
+                self._refresh(force=True)
+                model = self._read_model(sid)
+            self._loaded[sid] = model
+            if len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+            return model
+
+    def _read_model(self, sid):
+        if sid not in self._index["series"]:
+            raise MissingModelError(f"Modèle absent du registre : {sid} ({WARM_UP_HINT})")
+        with open(os.path.join(self.model_dir, self._index["series"][sid]["fichier"]), "rb") as f:
+            return pickle.load(f)
+
+    def predict(self, years, series_ids):
+        """Prédit toutes les séries demandées pour les années données, en un seul tableau."""
+        X = np.asarray(years, dtype=float).reshape(-1, 1)
+        predictions = {"Année": np.asarray(years)}
+        for sid in series_ids:
+            predictions[sid] = np.asarray(self.get(sid).predict(X)).ravel()
+        return pd.DataFrame(predictions)
+
+
+# --- ENTRAÎNEMENT HORS LIGNE ---
+def train_forecast_models(history, commune, registry, year_col="Année"):
+    """Ajuste une régression linéaire par indicateur et l'enregistre dans le registre."""
+    X = history[[year_col]].to_numpy(dtype=float)
+    for col in history.columns.drop(year_col):
+        model = LinearRegression()
+        model.fit(X, history[col].to_numpy(dtype=float))
+        registry.register(commune, col, model, metadata={
+            "annees": [int(history[year_col].min()), int(history[year_col].max())],
+            "observations": int(len(history)),
+        })
+
+
+def main():
+    from samastat.previsions import FORECAST_COMMUNE, generate_history_data
+
+    model_dir = sys.argv[1] if len(sys.argv) > 1 else MODEL_DIR
+    registry = ModelRegistry(model_dir)
+    start = time.perf_counter()
+    train_forecast_models(generate_history_data(), FORECAST_COMMUNE, registry)
+    print(f"{len(registry.series())} modèles enregistrés dans '{model_dir}' "
+          f"en {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Planificateur : rafraîchit en arrière-plan les artefacts des tableaux de bord.
+
+    python -m samastat.planificateur                    # vérifie les sources toutes les 60 s
+    python -m samastat.planificateur --une-fois         # un seul passage (cron, déploiement)
+    python -m samastat.planificateur --only previsions
+    python -m samastat.planificateur --workers 1        # passage séquentiel
+
+À chaque passage, l'empreinte de chaque source (``communes.json``, CSV, partitions
+scolaires, registre des modèles, référentiel des territoires) est relevée ; seuls les
+artefacts en aval d'une source modifiée sont recalculés puis publiés de façon atomique
+(voir ``samastat.artefacts``). Le CSV de la mairie est suivi ligne à ligne : modifier
+une commune ne recalcule que cette commune et les agrégats régionaux.
+
+    mairie ──► lignes_communes ──► agregats_regions ◄── territoires
+    historique ──► previsions ◄── modeles
+    saed_simulations ──► saed_fusion
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+import pandas as pd
+
+from samastat.artefacts import ARTIFACTS, DEFAULT_WORKERS, artifact, refresh, row_artifact, source, table_source
+from samastat.mairie import (DATA_FILE, commune_indicators, communes_version, domain_tables, load_communes,
+                             partition_index, region_summary, territory_version)
+from samastat.prechauffage import warm_regions, warm_saed, warm_school
+from samastat.previsions import forecast_from_history, generate_history_data, model_version, train_missing_forecasts
+from samastat.risque import train_missing_risk_model
+from samastat.regions import REGION_TABLE
+from samastat.saed import DELEGATION_TABLE, consolidate, simulate_datasets
+from samastat.scolaire import partition_score_totals, student_data_version
+
+# --- PARAMÈTRES ---
+INTERVAL_S = float(os.environ.get("SAMASTAT_PLANIFICATEUR_INTERVALLE", "60"))
+
+_LOGGER = logging.getLogger("samastat.planificateur")
+
+
+# --- SOURCES ---
+source("communes")(communes_version)
+source("modeles")(model_version)
+source("eleves")(student_data_version)
+source("regions")(REGION_TABLE.version)
+source("delegations")(DELEGATION_TABLE.version)
+source("territoires")(territory_version)
+table_source("mairie", DATA_FILE, key="Commune")
+
+
+# --- ARTEFACTS ---
+@artifact("historique", inputs=[])
+def build_history():
+    """Historique communal simulé : calculé une fois, puis toujours à jour."""
+    return generate_history_data()
+
+
+@artifact("previsions", inputs=["historique", "modeles"])
+def build_forecasts(history):
+    """Historique et prévisions communales (``sene_mairie.py``) ; entraîne d'abord les modèles absents."""
+    train_missing_forecasts(history)
+    return forecast_from_history(history)
+
+
+@artifact("domaines", inputs=["communes"])
+def build_domain_stats():
+    """Population et taux de vaccination par domaine, pour chaque pondération."""
+    return domain_tables(load_communes(), communes_version())
+
+
+@artifact("partitions_mairie", inputs=["mairie"])
+def build_commune_partitions():
+    """Partitions par commune, écrites dans ``partitions/mairie/`` par ``partition_index``.
+
+    Ne publie rien : l'artefact ne garde que son état, pour ne redécouper qu'après un changement du CSV.
+    """
+    partition_index()
+
+
+@row_artifact("lignes_communes", table="mairie")
+def build_commune_row(row):
+    """Ligne et données du graphique d'une commune (seules les communes modifiées sont recalculées)."""
+    return commune_indicators(row)
+
+
+@artifact("agregats_regions", inputs=["mairie", "lignes_communes", "territoires"])
+def build_region_summary(rows):
+    return region_summary(pd.DataFrame([entry["ligne"] for entry in rows.values()]))
+
+
+@artifact("saed_simulations", inputs=[])
+def build_saed_simulations():
+    """Jeux simulés du tableau de bord SAED : tirés une fois, partagés par toutes les sessions."""
+    return simulate_datasets()
+
+
+@artifact("saed_fusion", inputs=["saed_simulations"])
+def build_saed_merge(datasets):
+    """Fusion pour export, financement annuel et CSV consolidé."""
+    return consolidate(datasets)
+
+
+@artifact("figures_regions", inputs=["regions", "territoires"])
+def build_region_figures():
+    """Figures et agrégats de ``app.py``, recalculés pour vérifier les nouvelles sources.
+
+    Ne publie rien : les sessions les relisent dans le cache ``persist="disk"`` du serveur,
+    rempli par son préchauffage (``samastat.prechauffage``) ou au premier visiteur.
+    """
+    warm_regions()
+
+
+@artifact("figures_saed", inputs=["delegations", "territoires"])
+def build_saed_figures():
+    """Figures de ``app_saed.py`` ; comme ``figures_regions``, ne publie rien."""
+    warm_saed()
+
+
+@artifact("moyennes_scolaires", inputs=["eleves"])
+def build_score_totals():
+    """Somme et effectif des scores finaux par partition (graphique des moyennes par département)."""
+    return partition_score_totals()
+
+
+@artifact("scolaire", inputs=["eleves", "modeles"])
+def build_school_views():
+    """Figures, statistiques et scores de risque du module scolaire.
+
+    Ne publie rien, comme ``figures_regions`` : vérifie les vues sur les nouvelles données.
+    """
+    warm_school()
+
+
+# --- BOUCLE ---
+def train_missing_models():
+    """Entraîne les modèles absents avant le passage : la source ``modeles`` ne bouge plus pendant."""
+    for train in (train_missing_forecasts, train_missing_risk_model):
+        try:
+            train()
+        except Exception as exc:  # données scolaires absentes, par exemple : l'artefact échouera seul
+            _LOGGER.warning("Entraînement %s : échec (%s)", train.__name__, exc)
+
+
+def run_once(names=None, workers=DEFAULT_WORKERS):
+    """Un passage ; les échecs sont journalisés par ``refresh``."""
+    train_missing_models()
+    report = refresh(names, workers)
+    for line in report:
+        if line["statut"] == "recalculé":
+            detail = f" ({line['lignes']} ligne(s))" if line["lignes"] is not None else ""
+            _LOGGER.info("%s recalculé en %.2fs%s", line["artefact"], line["duree_s"], detail)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rafraîchit les artefacts des tableaux de bord SamaStat.")
+    parser.add_argument("--only", action="append", choices=sorted(ARTIFACTS),
+                        help="Artefact à rafraîchir (répétable ; défaut : tous)")
+    parser.add_argument("--une-fois", action="store_true", help="Un seul passage, puis sortie")
+    parser.add_argument("--intervalle", type=float, default=INTERVAL_S, help="Secondes entre deux passages")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Artefacts indépendants recalculés en parallèle")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    if args.une_fois:
+        report = run_once(args.only, args.workers)
+        for line in report:
+            status = f"⚠️ {line['erreur']}" if line["erreur"] else line["statut"]
+            if line["lignes"] is not None and not line["erreur"]:
+                status += f" ({line['lignes']} ligne(s))"
+            print(f"  {line['artefact']:<18} {line['duree_s']:>8.2f}s  {status}")
+        return 1 if any(line["statut"] == "échec" for line in report) else 0
+
+    _LOGGER.info("Planificateur démarré : passage toutes les %.0fs", args.intervalle)
+    try:
+        while True:
+            run_once(args.only, args.workers)
+            time.sleep(args.intervalle)
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Agrégation pondérée des indicateurs communaux : moyennes, médianes et quantiles.
+
+Un taux communal (vaccination, scolarisation) ne se moyenne pas tel quel : Dakar et ses
+1,05 million d'habitants ne pèsent pas autant que Diourbel. Chaque ligne est pondérée
+(par la population, par défaut), groupe par groupe et sans boucle Python : les
+quantiles pondérés sont interpolés sur la répartition cumulée des poids après un seul
+tri de la table.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# --- PARAMÈTRES ---
+WEIGHT = "Population"
+QUANTILES = (0.1, 0.5, 0.9)
+MAX_CACHED_SCHEMES = 64
+
+
+def _column(df, name):
+    return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _weights(df, weight):
+    """Poids de chaque ligne ; ``weight=None`` : poids égaux (moyenne simple)."""
+    return np.ones(len(df)) if weight is None else _column(df, weight)
+
+
+def _groups(df, by):
+    if by is None:
+        return np.zeros(len(df), dtype=np.int64), pd.Index(["Ensemble"])
+    codes, names = pd.factorize(df[by], sort=True)
+    return codes, pd.Index(names, name=by)
+
+
+# --- CALCULS VECTORISÉS ---
+def grouped_means(values, weights, groups, n_groups):
+    """Σ poids × valeur / Σ poids par groupe ; lignes sans valeur ou sans poids ignorées."""
+    known = ~np.isnan(values) & ~np.isnan(weights) & (weights > 0) & (groups >= 0)
+    totals = np.bincount(groups[known], weights[known], minlength=n_groups)
+    sums = np.bincount(groups[known], weights[known] * values[known], minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / totals
+
+
+def grouped_quantiles(values, weights, groups, n_groups, quantiles=QUANTILES):
+    """Quantiles pondérés par groupe (tableau groupes × quantiles).
+
+    Chaque ligne est placée au milieu de sa part de poids cumulée, puis les quantiles
+    sont interpolés entre lignes voisines : à poids égaux on retrouve la médiane usuelle.
+    """
+    quantiles = np.asarray(quantiles, dtype=np.float64)
+    result = np.full((n_groups, len(quantiles)), np.nan)
+    known = ~np.isnan(values) & ~np.isnan(weights) & (weights > 0) & (groups >= 0)
+    if not known.any():
+        return result
+    values, weights, groups = values[known], weights[known], groups[known]
+    order = np.lexsort((values, groups))
+    values, weights, groups = values[order], weights[order], groups[order]
+
+    ids = np.arange(n_groups)
+    starts = np.searchsorted(groups, ids)
+    ends = np.searchsorted(groups, ids, side="right")
+    cumulated = np.cumsum(weights)
+    before = np.r_[0.0, cumulated][starts]
+    totals = np.bincount(groups, weights, minlength=n_groups)
+    # Clé croissante sur toute la table : numéro du groupe + position dans sa répartition (0..1).
+    keys = groups + (cumulated - weights / 2 - before[groups]) / totals[groups]
+
+    targets = ids[:, None] + quantiles[None, :]
+    last = np.maximum(ends - 1, 0)[:, None]
+    right = np.clip(np.searchsorted(keys, targets), starts[:, None], last)
+    left = np.clip(right - 1, starts[:, None], last)
+    span = keys[right] - keys[left]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fraction = np.clip(np.where(span > 0, (targets - keys[left]) / span, 0.0), 0.0, 1.0)
+    present = ends > starts
+    result[present] = (values[left] + fraction * (values[right] - values[left]))[present]
+    return result
+
+
+# --- TABLEAUX ---
+def quantile_label(q):
+    return "médiane" if q == 0.5 else f"q{round(q * 100)}"
+
+
+def weighted_summary(df, rates, weight=WEIGHT, by=None, additive=(), quantiles=QUANTILES):
+    """Sommes des colonnes ``additive``, moyenne et quantiles pondérés de chaque taux, par groupe."""
+    groups, names = _groups(df, by)
+    weights = _weights(df, weight)
+    table = {}
+    grouped = groups >= 0
+    for name in additive:
+        table[name] = np.bincount(groups[grouped], np.nan_to_num(_column(df, name))[grouped], minlength=len(names))
+    for name in rates:
+        values = _column(df, name)
+        table[name] = np.round(grouped_means(values, weights, groups, len(names)), 2)
+        for q, column in zip(quantiles, grouped_quantiles(values, weights, groups, len(names), quantiles).T):
+            table[f"{name} – {quantile_label(q)}"] = np.round(column, 2)
+    return pd.DataFrame(table, index=names)
+
+
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_SCHEMES)
+def weighted_report(_df, version, rates, weight=WEIGHT, by=None, additive=(), quantiles=QUANTILES):
+    """``weighted_summary`` mis en cache par version des données et schéma de pondération."""
+    return weighted_summary(_df, list(rates), weight, by, list(additive), quantiles)
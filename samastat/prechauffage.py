@@ -0,0 +1,166 @@
+"""Préchauffage des caches : les vues par défaut sont calculées avant le premier visiteur.
+
+    python -m samastat.prechauffage                 # toutes les tâches, en parallèle
+    python -m samastat.prechauffage --only scolaire --workers 2
+
+En ligne de commande (étape de déploiement), les modèles de prévision sont entraînés et
+chaque tâche est calculée une fois, ce qui vérifie les sources avant la mise en ligne ;
+hors du serveur, Streamlit garde ces caches en mémoire. Dans le serveur,
+``start_warm_up()`` (appelée par le portail si ``SAMASTAT_PRECHAUFFAGE=1``) remplit en
+arrière-plan les caches en mémoire (jeux de données partagés, lignes communales,
+contours) et ceux déclarés ``persist="disk"`` (figures des régions, de la SAED et du
+module scolaire, statistiques, scores de risque), qui survivent aux redémarrages.
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import streamlit as st
+
+from samastat.choroplethe import BOUNDARY_FILE, boundary_geojson, load_boundaries
+from samastat.mairie import get_chart_data, get_commune_row, load_commune_names, load_data, partition_index
+from samastat.previsions import generate_forecast_data, train_missing_forecasts
+from samastat.regions import economic_figures, load_regions, region_hierarchy, social_figures, unemployment_trend
+from samastat.risque import risk_model_version, risk_scores, train_missing_risk_model
+from samastat.saed import agriculture_figures, delegation_hierarchy, economy_view, load_delegations, water_figures
+from samastat.scolaire import (default_selection, figure, figure_names, load_students, student_data_version,
+                               student_manifest)
+from samastat.statistiques import correlation_tables
+
+# --- PARAMÈTRES ---
+DEFAULT_WORKERS = int(os.environ.get("SAMASTAT_PRECHAUFFAGE_WORKERS", "4"))
+
+TASKS = {}
+_LOGGER = logging.getLogger("samastat.prechauffage")
+
+
+def task(name):
+    """Déclare une tâche de préchauffage (sans argument, idempotente)."""
+    def decorator(fn):
+        TASKS[name] = fn
+        return fn
+    return decorator
+
+
+# --- TÂCHES ---
+@task("regions")
+def warm_regions():
+    """``app.py`` : toutes les régions sélectionnées (vue par défaut)."""
+    df, version = load_regions()
+    selection = tuple(sorted(df["Région"]))
+    social_figures(selection, version)
+    economic_figures(selection, version)
+    unemployment_trend(tuple(df["Région"]), version)
+    region_hierarchy(version)
+
+
+@task("saed")
+def warm_saed():
+    """``app_saed.py`` : toutes les délégations sélectionnées (vue par défaut)."""
+    df, version = load_delegations()
+    selection = tuple(sorted(df["Région"]))
+    agriculture_figures(selection, version)
+    water_figures(selection, version)
+    economy_view(selection, version)
+    delegation_hierarchy(version)
+
+
+@task("scolaire")
+def warm_school():
+    """Module scolaire : sélection par défaut, variantes simple et détaillée, corrélations, risques."""
+    if not student_manifest()["partitions"]:
+        return  # aucun dépôt accepté : rien à préchauffer
+    version = student_data_version()
+    selection = default_selection()
+    filtered_df = load_students(selection[2], *selection[:2])
+    for detailed in (False, True):
+        for name in figure_names(detailed):
+            figure(name, filtered_df, selection, detailed)
+    for method in ("pearson", "spearman"):
+        correlation_tables(selection[2], method, version, *selection[:2])
+    train_missing_risk_model()
+    risk_scores(version, risk_model_version())
+
+
+@task("previsions")
+def warm_forecasts():
+    """Prévisions communales : entraîne les modèles absents et les charge."""
+    train_missing_forecasts()
+    generate_forecast_data()
+
+
+@task("mairie")
+def warm_communes():
+    """``samastat_app_mairie.py`` : chaque commune, les partitions par commune, puis les contours de la carte."""
+    load_data()
+    partition_index()
+    for commune in load_commune_names():
+        get_commune_row(commune)
+        get_chart_data(commune)
+    if os.path.exists(BOUNDARY_FILE):
+        boundaries = load_boundaries(BOUNDARY_FILE)
+        for zoom in boundaries.zoom_levels:
+            boundary_geojson(BOUNDARY_FILE, zoom)
+
+
+# --- EXÉCUTION ---
+def _timed(name):
+    start = time.perf_counter()
+    error = None
+    try:
+        TASKS[name]()
+    except Exception as exc:  # une source absente ne doit pas bloquer les autres tâches
+        error = f"{type(exc).__name__}: {exc}"
+    return {"tache": name, "duree_s": round(time.perf_counter() - start, 3), "erreur": error}
+
+
+def run_warm_up(names=None, workers=DEFAULT_WORKERS):
+    """Exécute les tâches en parallèle ; renvoie leurs durées et la durée totale."""
+    names = list(names or TASKS)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prechauffage") as pool:
+        futures = [pool.submit(_timed, name) for name in names]
+        results = [future.result() for future in as_completed(futures)]
+    return results, time.perf_counter() - start
+
+
+def _log_results(results, duration):
+    for result in results:
+        if result["erreur"]:
+            _LOGGER.warning("Préchauffage %s : échec après %.2fs (%s)", result["tache"], result["duree_s"], result["erreur"])
+        else:
+            _LOGGER.info("Préchauffage %s : %.2fs", result["tache"], result["duree_s"])
+    _LOGGER.info("Préchauffage terminé en %.2fs", duration)
+
+
+@st.cache_resource(show_spinner=False)
+def start_warm_up(workers=DEFAULT_WORKERS):
+    """Lance le préchauffage une seule fois par processus serveur, en arrière-plan."""
+    thread = threading.Thread(target=lambda: _log_results(*run_warm_up(workers=workers)),
+                              name="prechauffage", daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Préchauffe les caches des tableaux de bord SamaStat.")
+    parser.add_argument("--only", action="append", choices=sorted(TASKS),
+                        help="Tâche à exécuter (répétable ; défaut : toutes)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args(argv)
+
+    results, duration = run_warm_up(args.only, args.workers)
+    for result in sorted(results, key=lambda r: r["tache"]):
+        status = f"⚠️ {result['erreur']}" if result["erreur"] else "ok"
+        print(f"  {result['tache']:<12} {result['duree_s']:>8.2f}s  {status}")
+    total = sum(r["duree_s"] for r in results)
+    print(f"Préchauffage terminé en {duration:.2f}s ({total:.2f}s cumulées, {args.workers} workers)")
+    return 1 if any(r["erreur"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Historique communal et prévisions servies par le registre de modèles pré-entraînés."""
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from samastat.artefacts import content_version, read_artifact
+from samastat.instrumentation import instrument
+from samastat.modeles import INDEX_FILE, ModelRegistry, series_id, train_forecast_models
+
+# --- PARAMÈTRES ---
+MODEL_DIR = "modeles"
+FORECAST_COMMUNE = "Toutes communes"
+FORECAST_YEARS = [2025, 2026, 2027]
+
+
+# --- DONNÉES ---
+def generate_history_data():
+    years = list(range(2015, 2025))
+    rng = np.random.RandomState(42)
+    data = {
+        "Année": years,
+        "Naissances": np.round(np.linspace(1500, 1800, len(years)) + rng.normal(0, 50, len(years))),
+        "Décès": np.round(np.linspace(400, 500, len(years)) + rng.normal(0, 20, len(years))),
+        "Budget Municipal (M CFA)": np.round(np.linspace(900, 1300, len(years)) + rng.normal(0, 80, len(years))),
+        "Permis de construire": np.round(np.linspace(100, 250, len(years)) + rng.normal(0, 10, len(years))),
+        "Zones inondables recensées": np.round(np.linspace(60, 30, len(years)) + rng.normal(0, 5, len(years)))
+    }
+    return pd.DataFrame(data)
+
+
+@st.cache_resource
+def get_model_registry():
+    """Registre partagé par toutes les sessions ; les modèles sont entraînés hors ligne.
+
+    Il relit son index quand un réentraînement le réécrit : pas besoin de le vider.
+    """
+    return ModelRegistry(MODEL_DIR)
+
+
+@instrument()
+def generate_forecast_data():
+    return forecast_from_history(generate_history_data())
+
+
+def train_missing_forecasts(df=None):
+    """Entraîne les modèles de prévision absents (préchauffage, planificateur ; jamais une page)."""
+    df = generate_history_data() if df is None else df
+    registry = get_model_registry()
+    with registry.lock:
+        if any(series_id(FORECAST_COMMUNE, col) not in registry for col in df.columns[1:]):
+            train_forecast_models(df, FORECAST_COMMUNE, registry)
+
+
+def forecast_from_history(df):
+    """Historique suivi des prévisions du registre (artefact ``previsions``, en aval de ``historique``).
+
+    Lève ``MissingModelError`` si les modèles n'ont pas encore été entraînés.
+    """
+    registry = get_model_registry()
+    ids = [series_id(FORECAST_COMMUNE, col) for col in df.columns[1:]]
+    df_preds = registry.predict(FORECAST_YEARS, ids).round()
+    df_preds.columns = ["Année", *df.columns[1:]]
+    df_all = pd.concat([df, df_preds], ignore_index=True)
+    return df_all
+
+
+def model_version():
+    """Version du registre des modèles (son index est réécrit à chaque enregistrement)."""
+    return content_version(os.path.join(MODEL_DIR, INDEX_FILE))
+
+
+def forecast_table():
+    """Prévisions publiées par le planificateur ; calculées ici seulement si absentes ou périmées."""
+    df = read_artifact("previsions", modeles=model_version())
+    return generate_forecast_data() if df is None else df
+
+
+# --- GRAPHIQUES ---
+def forecast_figure(df, col):
+    """Tendance d'un indicateur ; les prévisions sont tracées en pointillés rouges."""
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.plot(df["Année"], df[col], marker='o', label="Données")
+    ax.set_xlabel("Année")
+    ax.set_ylabel(col)
+    ax.set_title(f"Évolution de {col}")
+    forecast_data = df[df["Année"] >= FORECAST_YEARS[0]]
+    ax.plot(forecast_data["Année"], forecast_data[col], marker='o', linestyle='--', color='red', label="Prévisions")
+    ax.legend()
+    return fig
+
+
+def show_forecast_charts(df):
+    for col in df.columns[1:]:
+        st.markdown(f"**{col}**")
+        fig = forecast_figure(df, col)
+        st.pyplot(fig)
+        plt.close(fig)
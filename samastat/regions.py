@@ -0,0 +1,106 @@
+"""Indicateurs sociaux et économiques des régions du Sénégal (application ``app.py``).
+
+Les figures d'une sélection de régions sont construites une fois puis servies depuis
+le cache, persisté sur disque : le préchauffage fait au déploiement profite au serveur.
+Le tableau vient de ``regions_indicateurs.csv`` s'il existe (voir ``samastat.tables``),
+sinon des données simulées ci-dessous.
+"""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from samastat.hierarchie import Hierarchy, territory_path
+from samastat.instrumentation import stage
+from samastat.tables import TableSource, indicator_table, load_table, ordered_rows, select_rows
+
+# --- DONNÉES SIMULÉES ---
+REGIONS = [
+    "Dakar", "Thiès", "Saint-Louis", "Diourbel", "Kaolack",
+    "Ziguinchor", "Fatick", "Kédougou", "Tambacounda", "Matam"
+]
+
+DATA = {
+    "Région": REGIONS,
+    "Population": [3400000, 1800000, 980000, 1100000, 1030000, 860000, 720000, 320000, 700000, 650000],
+    "Taux de scolarisation (%)": [90, 82, 79, 77, 75, 74, 76, 65, 68, 70],
+    "Accès à l’eau potable (%)": [94, 88, 85, 83, 84, 81, 86, 70, 73, 75],
+    "Taux de chômage (%)": [14, 12, 10, 11, 13, 9, 10, 8, 7, 6],
+    "PIB régional (milliards FCFA)": [5200, 3600, 2300, 1800, 1700, 1600, 1400, 700, 900, 850],
+    "Revenu moyen annuel (FCFA)": [1400000, 1100000, 950000, 870000, 820000, 780000, 770000, 600000, 620000, 640000],
+    "Taux d’accès aux soins (%)": [93, 88, 84, 81, 79, 76, 78, 66, 70, 72],
+    "Taux de pauvreté (%)": [18, 25, 30, 32, 34, 29, 28, 41, 39, 37]
+}
+
+TREND_YEARS = list(range(2021, 2026))
+MAX_CACHED_VIEWS = 128
+
+REGION_TABLE = TableSource("regions", "Région", data=DATA, path="regions_indicateurs.csv")
+
+# Agrégation nationale : sommes pour les volumes, moyennes pondérées par la population pour les taux.
+REGION_ADDITIVE = ["Population", "PIB régional (milliards FCFA)"]
+REGION_RATES = {name: "Population" for name in [
+    "Taux de scolarisation (%)", "Accès à l’eau potable (%)", "Taux de chômage (%)",
+    "Revenu moyen annuel (FCFA)", "Taux d’accès aux soins (%)", "Taux de pauvreté (%)",
+]}
+
+
+def load_regions():
+    """Tableau des régions et sa version (clé des figures persistées)."""
+    return load_table(REGION_TABLE.name)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def region_hierarchy(version):
+    """Agrégats pays → régions (et au-delà si le tableau porte des départements ou communes)."""
+    df = indicator_table(REGION_TABLE.name, version).frame
+    with stage("hiérarchie des régions"):
+        paths = [territory_path(region=name) for name in df["Région"]]
+        return Hierarchy(paths, df, REGION_ADDITIVE, REGION_RATES)
+
+
+# --- FIGURES ---
+@st.cache_data(show_spinner=False, persist="disk", max_entries=MAX_CACHED_VIEWS)
+def social_figures(selected_regions, version):
+    df_filtered = select_rows(REGION_TABLE.name, selected_regions, version)
+    with stage("plotly indicateurs sociaux"):
+        return {
+            "population": px.bar(df_filtered, x="Région", y="Population", color="Population", template="plotly_white"),
+            "scolarisation": px.line(df_filtered, x="Région", y="Taux de scolarisation (%)", markers=True, template="plotly_white"),
+            "eau": px.bar(df_filtered, x="Région", y="Accès à l’eau potable (%)", color="Accès à l’eau potable (%)", template="plotly_white"),
+            "chomage": px.scatter(df_filtered, x="Région", y="Taux de chômage (%)", size="Population", color="Taux de chômage (%)", template="plotly_white"),
+        }
+
+
+@st.cache_data(show_spinner=False, persist="disk", max_entries=MAX_CACHED_VIEWS)
+def economic_figures(selected_regions, version):
+    df_filtered = select_rows(REGION_TABLE.name, selected_regions, version)
+    with stage("plotly indicateurs économiques"):
+        return {
+            "pib": px.bar(df_filtered, x="Région", y="PIB régional (milliards FCFA)", color="PIB régional (milliards FCFA)", template="plotly_white"),
+            "revenu": px.line(df_filtered, x="Région", y="Revenu moyen annuel (FCFA)", markers=True, template="plotly_white"),
+            "soins": px.scatter(df_filtered, x="Taux d’accès aux soins (%)", y="Taux de pauvreté (%)", size="Population", color="Région", template="plotly_white",
+                                title="💡 Accès aux soins vs Taux de pauvreté"),
+        }
+
+
+@st.cache_data(show_spinner=False, persist="disk", max_entries=MAX_CACHED_VIEWS)
+def unemployment_trend(selected_regions, version):
+    """Tendance simulée 2021–2025 et prévision 2026 ; ``selected_regions`` dans l'ordre choisi."""
+    df_selected = ordered_rows(REGION_TABLE.name, selected_regions, version)
+    with stage("tendance & prévisions"):
+        rng = np.random.RandomState(42)  # générateur local : sûr entre threads
+        # Mêmes tirages que la boucle région par région, année par année (ordre ligne par ligne).
+        base_chomage = df_selected["Taux de chômage (%)"].to_numpy(dtype=np.float64)
+        evolution = base_chomage[:, None] + rng.normal(0, 0.5, size=(len(df_selected), len(TREND_YEARS)))
+
+        df_tendance = pd.DataFrame({
+            "Région": np.repeat(df_selected["Région"].to_numpy(), len(TREND_YEARS)),
+            "Année": np.tile(TREND_YEARS, len(df_selected)),
+            "Taux de chômage (%)": np.round(evolution, 2).ravel(),
+        })
+        fig_tendance = px.line(df_tendance, x="Année", y="Taux de chômage (%)", color="Région", markers=True, template="plotly_white")
+
+        df_prevision = df_tendance[df_tendance["Année"] == TREND_YEARS[-1]].copy()
+        df_prevision["Prévision 2026 (%)"] = round(df_prevision["Taux de chômage (%)"] * rng.uniform(0.97, 1.03, len(df_prevision)), 2)
+        return fig_tendance, df_prevision[["Région", "Taux de chômage (%)", "Prévision 2026 (%)"]]
@@ -0,0 +1,125 @@
+"""Score de risque d'échec des étudiants du module scolaire.
+
+    python -m samastat.risque            # entraînement hors ligne, enregistré dans ``modeles/``
+
+Le modèle (standardisation + régression logistique) est ajusté sur les étudiants notés
+D ou F, enregistré dans le registre des modèles de prévision puis appliqué à toute la
+cohorte par lots vectorisés. Les scores sont mis en cache par version du fichier et du
+modèle, triés par risque décroissant : filtrer et classer ne coûte plus qu'un masque.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from samastat.instrumentation import instrument
+from samastat.modeles import MissingModelError, ModelRegistry, series_id
+from samastat.previsions import MODEL_DIR, get_model_registry
+from samastat.scolaire import load_student_data, student_data_version
+
+# --- PARAMÈTRES ---
+FEATURES = [
+    "Attendance (%)", "Midterm_Score", "Assignments_Avg", "Quizzes_Avg",
+    "Stress_Level (1-10)", "Sleep_Hours_per_Night", "Study_Hours_per_Week",
+]
+AT_RISK_GRADES = ("D", "F")
+RISK_SERIES = ("Module scolaire", "Risque d'échec")
+BATCH_SIZE = 50_000
+RISK_BINS = [0.0, 0.4, 0.66, 1.0]
+RISK_LABELS = ["🟢 Faible", "🟠 Moyen", "🔴 Élevé"]
+
+
+# --- ENTRAÎNEMENT HORS LIGNE ---
+def train_risk_model(df, registry):
+    """Ajuste le modèle, mesure son AUC sur 20 % des étudiants, puis l'enregistre ajusté sur tous."""
+    X = df[FEATURES].to_numpy(dtype=np.float64)
+    y = df["Grade"].isin(AT_RISK_GRADES).to_numpy()
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)
+    model = make_pipeline(StandardScaler(), LogisticRegression(class_weight="balanced"))
+    auc = roc_auc_score(y_test, model.fit(X_train, y_train).predict_proba(X_test)[:, 1])
+    model.fit(X, y)
+    return registry.register(*RISK_SERIES, model, metadata={
+        "variables": FEATURES,
+        "cible": f"Grade ∈ {{{', '.join(AT_RISK_GRADES)}}}",
+        "auc": round(float(auc), 3),
+        "observations": int(len(df)),
+        "donnees": student_data_version(),
+    })
+
+
+# --- SCORES ---
+def score_batches(model, X, batch_size=BATCH_SIZE):
+    """Probabilités de risque, calculées par lots pour borner la mémoire intermédiaire."""
+    scores = np.empty(len(X))
+    for start in range(0, len(X), batch_size):
+        scores[start:start + batch_size] = model.predict_proba(X[start:start + batch_size])[:, 1]
+    return scores
+
+
+def risk_level(scores):
+    return pd.cut(scores, RISK_BINS, labels=RISK_LABELS, include_lowest=True)
+
+
+def train_missing_risk_model():
+    """Entraîne le modèle s'il est absent (préchauffage, planificateur ; jamais une page)."""
+    registry = get_model_registry()
+    with registry.lock:
+        if series_id(*RISK_SERIES) not in registry:
+            train_risk_model(load_student_data(student_data_version()), registry)
+
+
+def risk_model_version():
+    """Version du modèle enregistré ; ``MissingModelError`` s'il n'a pas encore été entraîné."""
+    return get_model_registry().metadata(series_id(*RISK_SERIES))["version"]
+
+
+@st.cache_data(show_spinner=False, persist="disk", max_entries=4)
+@instrument("score risque d'échec")
+def risk_scores(data_version, model_version):
+    """Cohorte entière scorée, du risque le plus élevé au plus faible."""
+    df = load_student_data(data_version)
+    model = get_model_registry().get(series_id(*RISK_SERIES))
+    scores = score_batches(model, df[FEATURES].to_numpy(dtype=np.float64))
+    result = df[["Student_ID", "Academie", "Annee", "Department", "Gender", *FEATURES, "Grade"]].assign(
+        **{"Risque (%)": np.round(scores * 100, 1), "Niveau": risk_level(scores)})
+    return result.iloc[np.argsort(-scores, kind="stable")].reset_index(drop=True)
+
+
+def show_risk_table(departments, academies=None, years=None):
+    """Étudiants de la sélection au-dessus d'un seuil de risque, les plus exposés d'abord."""
+    try:
+        scores = risk_scores(student_data_version(), risk_model_version())
+    except MissingModelError as exc:
+        st.info(f"Score de risque indisponible : {exc}.")
+        return
+    threshold = st.slider("Risque minimal (%)", 0, 100, 50, key="risk_threshold")
+    selected = scores["Department"].isin(departments)
+    if academies is not None:
+        selected &= scores["Academie"].isin(academies)
+    if years is not None:
+        selected &= scores["Annee"].isin(years)
+    at_risk = scores[selected & (scores["Risque (%)"] >= threshold)]
+    st.caption(f"{len(at_risk)} étudiants sur {int(selected.sum())} "
+               f"(AUC du modèle : {get_model_registry().metadata(series_id(*RISK_SERIES))['auc']})")
+    st.dataframe(at_risk, hide_index=True)
+
+
+def main():
+    model_dir = sys.argv[1] if len(sys.argv) > 1 else MODEL_DIR
+    registry = ModelRegistry(model_dir)
+    start = time.perf_counter()
+    version = train_risk_model(load_student_data(student_data_version()), registry)
+    metadata = registry.metadata(series_id(*RISK_SERIES))
+    print(f"Modèle de risque v{version} enregistré dans '{model_dir}' (AUC {metadata['auc']}) "
+          f"en {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
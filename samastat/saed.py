@@ -0,0 +1,250 @@
+"""Données simulées, figures, fusion pour export et rapport PDF des tableaux de bord SAED.
+
+Les simulateurs, la fusion et le PDF n'affichent rien : ils servent aussi hors
+interface (benchmarks, préchauffage). Les figures de ``app_saed.py`` sont mises en
+cache par sélection de délégations, avec persistance sur disque ; le tableau des
+délégations vient de ``saed_delegations.csv`` s'il existe (voir ``samastat.tables``).
+"""
+import random
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+from fpdf import FPDF
+
+from samastat.artefacts import artifact_version, read_artifact
+from samastat.hierarchie import Hierarchy, locate
+from samastat.instrumentation import instrument, stage
+from samastat.tables import TableSource, indicator_table, load_table, select_rows
+
+# 🎯 LISTES DE BASE
+cultures = ["Riz", "Maïs", "Tomate", "Oignon"]
+regions = ["Saint-Louis", "Dagana", "Podor", "Matam"]
+techniques = ["traditionnelle", "semi-intensive", "intensive"]
+
+PDF_LOGO = "logo_samastat.png"
+PDF_FILE = "rapport_samastat.pdf"
+MAX_CACHED_VIEWS = 128
+SIMULATION_SIZE = 50
+
+# 🗺️ INDICATEURS PAR DÉLÉGATION (app_saed.py)
+DELEGATIONS = ["Podor", "Dagana", "Richard-Toll", "Bakel", "Matam", "Kanel"]
+
+DELEGATION_DATA = {
+    "Région": DELEGATIONS,
+    "Superficie cultivée (ha)": [56000, 42000, 38000, 24000, 18000, 15000],
+    "Production (tonnes)": [152000, 110000, 98000, 64000, 45000, 39000],
+    "Rendement (t/ha)": [2.71, 2.62, 2.58, 2.66, 2.50, 2.60],
+    "Volume d’eau distribué (milliers m³)": [30000, 25000, 22000, 18000, 15000, 13000],
+    "Taux d’irrigation (%)": [92, 85, 80, 76, 70, 68],
+    "Budget régional (millions FCFA)": [7800, 6500, 5800, 4300, 3500, 3000],
+    "Revenus agricoles (millions FCFA)": [11500, 9800, 8600, 6400, 4900, 4200],
+    "Taux d’emploi agricole (%)": [66, 60, 58, 55, 52, 50]
+}
+
+DELEGATION_TABLE = TableSource("delegations", "Région", data=DELEGATION_DATA, path="saed_delegations.csv")
+
+# Délégations rattachées à leur département (Podor, Dagana…) ou à leur commune (Richard-Toll) ;
+# rendements et taux d'irrigation pondérés par la superficie cultivée.
+DELEGATION_ADDITIVE = [
+    "Superficie cultivée (ha)", "Production (tonnes)", "Volume d’eau distribué (milliers m³)",
+    "Budget régional (millions FCFA)", "Revenus agricoles (millions FCFA)",
+]
+DELEGATION_RATES = {
+    "Rendement (t/ha)": "Superficie cultivée (ha)",
+    "Taux d’irrigation (%)": "Superficie cultivée (ha)",
+    "Taux d’emploi agricole (%)": None,
+}
+
+
+# 🌾 AGRICULTURE
+def simulate_agriculture(n, techniques=techniques):
+    data = []
+    for _ in range(n):
+        data.append({
+            "Campagne": random.choice(["2022", "2023", "2024"]),
+            "Région": random.choice(regions),
+            "Culture": random.choice(cultures),
+            "Superficie_ha": round(random.uniform(10, 100), 2),
+            "Rendement_t_ha": round(random.uniform(2.5, 6), 2),
+            "Technique": random.choice(techniques)
+        })
+    return pd.DataFrame(data)
+
+
+# 💧 IRRIGATION
+def simulate_irrigation(n):
+    types = ["gravitaire", "goutte-à-goutte", "aspersion"]
+    états = ["fonctionnelle", "endommagée", "à réhabiliter"]
+    freq = ["quotidienne", "hebdomadaire", "mensuelle"]
+    data = []
+    for _ in range(n):
+        data.append({
+            "Campagne": random.choice(["2022", "2023", "2024"]),
+            "Zone_irriguee": random.choice(regions),
+            "Type_irrigation": random.choice(types),
+            "État_infrastructure": random.choice(états),
+            "Fréquence_irrigation": random.choice(freq)
+        })
+    return pd.DataFrame(data)
+
+
+# 👥 PRODUCTEURS
+def simulate_producteurs(n):
+    statuts = ["individuel", "coopérative", "GIE"]
+    data = []
+    for _ in range(n):
+        data.append({
+            "Nom": f"Producteur_{random.randint(1,999)}",
+            "Sexe": random.choice(["H", "F"]),
+            "Âge": random.randint(20, 65),
+            "Statut": random.choice(statuts),
+            "Région": random.choice(regions),
+            "Culture": random.choice(cultures)
+        })
+    return pd.DataFrame(data)
+
+
+# 💰 FINANCEMENT
+def simulate_financement(n):
+    sources = ["SAED", "Bailleur A", "Fonds coopératif"]
+    types = ["crédit", "subvention", "appui technique"]
+    data = []
+    for _ in range(n):
+        data.append({
+            "Année": random.choice(["2022", "2023", "2024"]),
+            "Source": random.choice(sources),
+            "Type_financement": random.choice(types),
+            "Montant": random.randint(500000, 5000000)
+        })
+    return pd.DataFrame(data)
+
+
+# 📦 FUSION POUR EXPORT CSV
+@instrument()
+def merge_for_export(agri_df, irrig_df, fin_df):
+    merged_df = agri_df.merge(irrig_df, left_on=["Campagne", "Région"], right_on=["Campagne", "Zone_irriguee"], how="left")
+    return merged_df.merge(fin_df, left_on="Campagne", right_on="Année", how="left")
+
+
+def simulate_datasets(n=SIMULATION_SIZE):
+    """Jeux simulés du tableau de bord SAED (artefact ``saed_simulations``)."""
+    return {
+        "agriculture": simulate_agriculture(n),
+        "irrigation": simulate_irrigation(n),
+        "producteurs": simulate_producteurs(n),
+        "financement": simulate_financement(n),
+    }
+
+
+def consolidate(datasets):
+    """Jeux simulés, fusion pour export et financement annuel (artefact ``saed_fusion``)."""
+    merged_df = merge_for_export(datasets["agriculture"], datasets["irrigation"], datasets["financement"])
+    return {
+        **datasets,
+        "fusion": merged_df,
+        "financement_annuel": datasets["financement"].groupby("Année")["Montant"].sum(),
+        "export_csv": merged_df.to_csv(index=False).encode("utf-8"),
+    }
+
+
+def datasets_version():
+    """Version de l'artefact ``saed_fusion`` : change à chaque nouvelle publication."""
+    return artifact_version("saed_fusion")
+
+
+def dashboard_datasets():
+    """Jeux publiés par le planificateur ; simulés et fusionnés ici s'ils sont absents."""
+    published = read_artifact("saed_fusion")
+    return consolidate(simulate_datasets()) if published is None else published
+
+
+# 📄 RAPPORT PDF
+def _latin1(text):
+    """Les polices de base de FPDF sont en latin-1 : on remplace ce qu'elles ne savent pas écrire."""
+    return text.replace("–", "-").encode("latin-1", "ignore").decode("latin-1").strip()
+
+
+@instrument()
+def generate_pdf(data, campagne, filename=PDF_FILE):
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    try:
+        pdf.image(PDF_LOGO, x=10, y=8, w=35)
+    except Exception:
+        pass  # Ignore si image non trouvée
+    pdf.ln(40)
+
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(200, 10, txt=_latin1(f"Rapport SamaStat SAED – Campagne {campagne}"), ln=True, align='C')
+    pdf.ln(10)
+
+    pdf.set_font("Arial", size=12)
+    pdf.cell(200, 10, txt=_latin1(f"Nombre de producteurs : {len(data)}"), ln=True)
+    pdf.cell(200, 10, txt=_latin1(f"Superficie totale : {data['Superficie_ha'].sum():.2f} ha"), ln=True)
+    pdf.cell(200, 10, txt=_latin1(f"Rendement moyen : {data['Rendement_t_ha'].mean():.2f} t/ha"), ln=True)
+
+    # 🖋️ Slogan en pied de page
+    pdf.set_y(-20)
+    pdf.set_font("Arial", 'I', 10)
+    pdf.cell(0, 10, _latin1("SamaStat : La plateforme du futur pour la souveraineté agricole 🇸🇳"), ln=True, align='C')
+
+    pdf.output(filename)
+    return filename
+
+
+# 📊 FIGURES PAR DÉLÉGATION
+def load_delegations():
+    """Tableau des délégations et sa version (clé des figures persistées)."""
+    return load_table(DELEGATION_TABLE.name)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def delegation_hierarchy(version):
+    """Agrégats pays → régions → départements → communes des délégations."""
+    df = indicator_table(DELEGATION_TABLE.name, version).frame
+    with stage("hiérarchie des délégations"):
+        return Hierarchy([locate(name) for name in df["Région"]], df, DELEGATION_ADDITIVE, DELEGATION_RATES)
+
+
+@st.cache_data(show_spinner=False, persist="disk", max_entries=MAX_CACHED_VIEWS)
+def agriculture_figures(selected_regions, version):
+    df_filtered = select_rows(DELEGATION_TABLE.name, selected_regions, version)
+    with stage("plotly agriculture"):
+        return {
+            "superficie": px.bar(df_filtered, x="Région", y="Superficie cultivée (ha)", color="Superficie cultivée (ha)", template="plotly_white"),
+            "production": px.line(df_filtered, x="Région", y="Production (tonnes)", markers=True, template="plotly_white"),
+            "rendement": px.scatter(df_filtered, x="Région", y="Rendement (t/ha)", size="Production (tonnes)", color="Rendement (t/ha)", template="plotly_white"),
+        }
+
+
+@st.cache_data(show_spinner=False, persist="disk", max_entries=MAX_CACHED_VIEWS)
+def water_figures(selected_regions, version):
+    df_filtered = select_rows(DELEGATION_TABLE.name, selected_regions, version)
+    with stage("plotly ressources hydriques"):
+        return {
+            "eau": px.bar(df_filtered, x="Région", y="Volume d’eau distribué (milliers m³)", color="Volume d’eau distribué (milliers m³)", template="plotly_white"),
+            "irrigation": px.line(df_filtered, x="Région", y="Taux d’irrigation (%)", markers=True, template="plotly_white"),
+        }
+
+
+@st.cache_data(show_spinner=False, persist="disk", max_entries=MAX_CACHED_VIEWS)
+def economy_view(selected_regions, version):
+    """Figures économiques, prévision 2026 et exports CSV de la sélection."""
+    df_filtered = select_rows(DELEGATION_TABLE.name, selected_regions, version)
+    with stage("plotly économie & prévisions"):
+        figs = {
+            "budget": px.bar(df_filtered, x="Région", y="Budget régional (millions FCFA)", color="Budget régional (millions FCFA)", template="plotly_white"),
+            "revenu": px.line(df_filtered, x="Région", y="Revenus agricoles (millions FCFA)", markers=True, template="plotly_white"),
+            "emploi": px.scatter(df_filtered, x="Région", y="Taux d’emploi agricole (%)", size="Budget régional (millions FCFA)", color="Région", template="plotly_white"),
+        }
+        rng = np.random.RandomState(42)  # générateur local : sûr entre threads
+        df_prevision = df_filtered.copy()
+        df_prevision["Prévision 2026 (%)"] = round(df_prevision["Taux d’emploi agricole (%)"] * rng.uniform(0.98, 1.03, len(df_prevision)), 2)
+        exports = {
+            "indicateurs": df_filtered.to_csv(index=False).encode('utf-8'),
+            "previsions": df_prevision.to_csv(index=False).encode('utf-8'),
+        }
+        return figs, df_prevision[["Région", "Taux d’emploi agricole (%)", "Prévision 2026 (%)"]], exports
@@ -0,0 +1,397 @@
+"""Données et graphiques du module de statistiques scolaires.
+
+Les dossiers étudiants sont rangés par académie, année et département
+(``partitions/scolaire/academie=…/annee=…/departement=…/part.parquet``) et décrits par
+un manifeste : une sélection ne lit que les partitions qui la concernent, chacune
+chargée une fois par processus. Sans dépôt d'académie, ``data_student.csv`` est versé
+comme académie « Nationale ». Chaque dépôt est d'abord validé et nettoyé
+(``STUDENT_SCHEMA``) : les partitions contiennent des données déjà typées, et un
+fichier non conforme est rejeté sans rien remplacer. Dépôt d'un fichier :
+
+    python -m samastat.scolaire eleves_thies.csv --academie Thiès --annee 2025
+
+Les figures sont mises en cache par (version du manifeste, sélection, variante), si bien
+qu'une sélection déjà vue par une session n'est plus recalculée pour les suivantes.
+Ce cache est persisté sur disque : le préchauffage fait au déploiement profite au serveur.
+"""
+import argparse
+import os
+import shutil
+import sys
+import threading
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from samastat.animation import animated_lines, period_means, stage_means
+from samastat.artefacts import read_artifact
+from samastat.donnees import file_version, read_json, shared_dataset, write_json
+from samastat.instrumentation import instrument, stage
+from samastat.validation import Column, ValidationError, issues_frame, validate
+
+# --- PARAMÈTRES ---
+STUDENT_FILE = "data_student.csv"
+LOGO_PATH = "logo.png"
+MAX_CACHED_FIGURES = 256
+PARTITION_DIR = os.path.join("partitions", "scolaire")
+MANIFEST_FILE = os.path.join(PARTITION_DIR, "manifest.json")
+DEFAULT_ACADEMIE = "Nationale"
+DEFAULT_YEAR = int(os.environ.get("SAMASTAT_ANNEE_SCOLAIRE", "2025"))
+MAX_LOADED_PARTITIONS = 512
+# Sans colonne Semester, l'évolution suit les étapes d'évaluation du semestre.
+EVALUATION_STAGES = {
+    "Quizzes_Avg": "Quiz", "Assignments_Avg": "Devoirs", "Midterm_Score": "Partiel", "Final_Score": "Examen final",
+}
+
+SCORE = {"kind": "float", "min": 0, "max": 100, "decimals": 2}
+YES_NO = ["No", "Yes"]
+STUDENT_SCHEMA = {
+    "Student_ID": Column("str", unique=True),
+    "Gender": Column("category", values=["Female", "Male"]),
+    "Age": Column("int", min=10, max=99),
+    "Department": Column("category"),
+    "Semester": Column("category", required=False),
+    "Attendance (%)": Column(**SCORE),
+    "Midterm_Score": Column(**SCORE),
+    "Final_Score": Column(**SCORE),
+    "Assignments_Avg": Column(**SCORE),
+    "Quizzes_Avg": Column(**SCORE),
+    "Participation_Score": Column("float", min=0, max=10, decimals=2),
+    "Projects_Score": Column(**SCORE),
+    "Grade": Column("category", values=["A", "B", "C", "D", "F"]),
+    "Study_Hours_per_Week": Column("float", min=0, max=168, decimals=1),
+    "Extracurricular_Activities": Column("category", values=YES_NO),
+    "Internet_Access_at_Home": Column("category", values=YES_NO),
+    "Family_Income_Level": Column("category", values=["Low", "Medium", "High"]),
+    "Stress_Level (1-10)": Column("int", min=1, max=10),
+    "Sleep_Hours_per_Night": Column("float", min=0, max=24, decimals=1),
+}
+
+_manifest_lock = threading.RLock()
+EMPTY_MANIFEST = {"partitions": [], "sources": {}}
+
+
+# --- PARTITIONS ---
+def _year_dir(academie, annee):
+    parts = (f"academie={academie}", f"annee={annee}")
+    return os.path.join(*(part.replace(os.sep, "_") for part in parts))
+
+
+def ingest_students(df, academie, annee, source=None):
+    """Range un dépôt (une académie, une année) par département et met le manifeste à jour.
+
+    ``source`` (nom, version) note le fichier d'origine pour ne pas le reverser inchangé.
+    Lève ``ValidationError`` (et ne touche à rien) si le dépôt est rejeté.
+    """
+    with stage("validation dépôt scolaire"):
+        df, issues = validate(df, STUDENT_SCHEMA)
+    with _manifest_lock:
+        manifest = read_json(MANIFEST_FILE, default=EMPTY_MANIFEST)
+        year_dir = _year_dir(academie, annee)
+        partitions = [p for p in manifest["partitions"] if (p["academie"], p["annee"]) != (academie, annee)]
+        for department, part in df.groupby("Department", sort=True):
+            path = os.path.join(year_dir, f"departement={department}".replace(os.sep, "_"), "part.parquet")
+            full_path = os.path.join(PARTITION_DIR, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            part.to_parquet(full_path + ".tmp", index=False)
+            os.replace(full_path + ".tmp", full_path)
+            partitions.append({"academie": academie, "annee": annee, "departement": department,
+                               "fichier": path, "lignes": int(len(part))})
+        manifest["partitions"] = partitions
+        manifest.setdefault("anomalies", {})[f"{academie}/{annee}"] = issues
+        if source is not None:
+            manifest["sources"][source[0]] = source[1]
+            manifest.get("rejets", {}).pop(source[0], None)
+        write_json(MANIFEST_FILE, manifest, indent=2, ensure_ascii=False)
+
+        # Départements absents du nouveau dépôt : plus référencés, leurs fichiers sont retirés.
+        current = {os.path.dirname(p["fichier"]) for p in partitions}
+        for entry in os.scandir(os.path.join(PARTITION_DIR, year_dir)):
+            if entry.is_dir() and os.path.join(year_dir, entry.name) not in current:
+                shutil.rmtree(entry.path)
+        return manifest
+
+
+def _is_current(manifest, source):
+    rejected = manifest.get("rejets", {}).get(STUDENT_FILE, {})
+    return source in (manifest["sources"].get(STUDENT_FILE), rejected.get("version"))
+
+
+def student_manifest():
+    """Manifeste des partitions ; ``data_student.csv`` y est (re)versé s'il a changé.
+
+    Une version rejetée est notée dans ``rejets`` : les partitions précédentes restent servies.
+    """
+    manifest = read_json(MANIFEST_FILE, default=EMPTY_MANIFEST, private=False)
+    source = file_version(STUDENT_FILE)
+    if source == "absent" or _is_current(manifest, source):
+        return manifest
+    with _manifest_lock:
+        manifest = read_json(MANIFEST_FILE, default=EMPTY_MANIFEST)
+        if not _is_current(manifest, source):
+            try:
+                ingest_students(pd.read_csv(STUDENT_FILE), DEFAULT_ACADEMIE, DEFAULT_YEAR, (STUDENT_FILE, source))
+            except ValidationError as exc:
+                manifest.setdefault("rejets", {})[STUDENT_FILE] = {
+                    "version": source, "motif": str(exc), "anomalies": exc.issues}
+                os.makedirs(PARTITION_DIR, exist_ok=True)  # premier dépôt rejeté : dossier encore absent
+                write_json(MANIFEST_FILE, manifest, indent=2, ensure_ascii=False)
+    return read_json(MANIFEST_FILE, private=False)
+
+
+def student_data_version():
+    """Version des données scolaires (celle du manifeste) : clé des caches dérivés."""
+    student_manifest()
+    return file_version(MANIFEST_FILE)
+
+
+def partition_options():
+    """Académies, années et départements disponibles, lus dans le manifeste seul."""
+    partitions = student_manifest()["partitions"]
+    return tuple(sorted({p[key] for p in partitions}) for key in ("academie", "annee", "departement"))
+
+
+def default_selection():
+    """Sélection à l'ouverture de la page : toutes les académies, la dernière année, tous les départements.
+
+    Une seule académie (ou année) disponible : pas de filtre, ``None``.
+    """
+    academies, years, departments = partition_options()
+    return (tuple(academies) if len(academies) > 1 else None,
+            tuple(years[-1:]) if len(years) > 1 else None,
+            tuple(departments))
+
+
+def select_partitions(departments, academies=None, years=None):
+    """Élagage : les seules partitions de la sélection (``None`` : toutes les valeurs)."""
+    return [p for p in student_manifest()["partitions"]
+            if p["departement"] in departments
+            and (academies is None or p["academie"] in academies)
+            and (years is None or p["annee"] in years)]
+
+
+@shared_dataset(max_entries=MAX_LOADED_PARTITIONS)
+@instrument("read_parquet partition scolaire")
+def load_partition(path, version, source=None, _prepare=None):
+    """Une partition, chargée une fois par processus (et par page si ``_prepare`` la transforme)."""
+    df = pd.read_parquet(os.path.join(PARTITION_DIR, path))
+    return df if _prepare is None else _prepare(df)
+
+
+def load_students(departments, academies=None, years=None, prepare=None, source=None):
+    """Étudiants de la sélection, lus dans les seules partitions concernées."""
+    version = student_data_version()
+    selected = select_partitions(departments, academies, years)
+    if not selected:
+        # Sélection vide : un tableau vide mais avec les colonnes attendues par les graphiques.
+        first = student_manifest()["partitions"][:1]
+        return load_partition(first[0]["fichier"], version, source, prepare).iloc[:0] if first else pd.DataFrame()
+    parts = [load_partition(p["fichier"], version, source, prepare) for p in selected]
+    return pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+
+
+@shared_dataset(max_entries=2)
+@instrument("read_parquet partitions scolaire")
+def load_student_data(version):
+    """Cohorte entière (toutes académies et années), pour les calculs sur l'ensemble."""
+    partitions = student_manifest()["partitions"]
+    if not partitions:
+        return pd.DataFrame()  # premier dépôt rejeté : aucune partition
+    return pd.concat([pd.read_parquet(os.path.join(PARTITION_DIR, p["fichier"]))
+                      .assign(Academie=p["academie"], Annee=p["annee"]) for p in partitions],
+                     ignore_index=True)
+
+
+# --- MOYENNES PAR PARTITION ---
+def partition_score_totals():
+    """Somme et effectif des scores finaux de chaque partition (artefact ``moyennes_scolaires``)."""
+    totals = {}
+    for p in student_manifest()["partitions"]:
+        scores = pd.read_parquet(os.path.join(PARTITION_DIR, p["fichier"]), columns=["Final_Score"])["Final_Score"]
+        totals[p["fichier"]] = (float(scores.sum()), int(scores.count()))
+    return totals
+
+
+def department_means(selection):
+    """Score final moyen par département de la sélection, tiré des sommes publiées par partition.
+
+    ``None`` si l'artefact est absent ou périmé : la moyenne est alors calculée sur les lignes.
+    """
+    totals = read_artifact("moyennes_scolaires", eleves=student_data_version())
+    if totals is None:
+        return None
+    academies, years, departments = selection
+    rows = [(p["departement"], *totals[p["fichier"]])
+            for p in select_partitions(departments, academies, years) if p["fichier"] in totals]
+    table = pd.DataFrame(rows, columns=["Department", "somme", "effectif"]).groupby("Department").sum()
+    return (table["somme"] / table["effectif"]).rename("Final_Score").reset_index()
+
+
+# --- GRAPHIQUES ---
+def grade_histogram(df, detailed=False):
+    return px.histogram(df, x="Grade", color="Gender", barmode="group", title="Distribution des notes",
+                        template="plotly_white" if detailed else None)
+
+
+def average_score_bar(df, detailed=False, avg_scores=None):
+    if avg_scores is None:
+        avg_scores = df.groupby("Department")["Final_Score"].mean().reset_index()
+    return px.bar(avg_scores, x="Department", y="Final_Score", title="Score final moyen par département",
+                  template="plotly_dark" if detailed else None)
+
+
+def score_box(df, detailed=False):
+    return px.box(df, x="Department", y="Final_Score", color="Gender",
+                  title="Dispersion des scores par département", template="ggplot2")
+
+
+def score_violin(df, detailed=False):
+    return px.violin(df, y="Final_Score", x="Gender", box=True, points="all",
+                     title="Distribution des scores par genre")
+
+
+def score_evolution(df, detailed=False):
+    """Moyenne par département à chaque semestre (ou étape d'évaluation), animée étape par étape."""
+    if "Semester" in df.columns:
+        table = period_means(df, "Semester", "Final_Score", "Department")
+        return animated_lines(table, "Évolution des scores par semestre", "Score final moyen")
+    table = stage_means(df, EVALUATION_STAGES, "Department")
+    return animated_lines(table, "Évolution des scores au fil des évaluations", "Score moyen")
+
+
+def study_scatter(df, detailed=False):
+    fig = px.scatter(df, x="Study_Hours_per_Week", y="Final_Score",
+                     size="Stress_Level (1-10)", color="Gender",
+                     hover_data=["Department", "Sleep_Hours_per_Night"],
+                     title="Effet des heures d'étude sur le score final (taille = stress)",
+                     template="plotly_white" if detailed else None)
+    fig.update_layout(dragmode="zoom")
+    return fig
+
+
+# Seule l'évolution dépend des colonnes dérivées qu'une page peut ajouter (Semester).
+DERIVED_FIGURES = {"evolution"}
+
+FIGURES = {
+    "notes": grade_histogram,
+    "moyennes": average_score_bar,
+    "dispersion": score_box,
+    "violon": score_violin,
+    "evolution": score_evolution,
+    "correlation": study_scatter,
+}
+
+
+@st.cache_data(show_spinner=False, persist="disk", max_entries=MAX_CACHED_FIGURES)
+def school_figure(name, source, version, selection, detailed, _df):
+    """Figure ``name`` pour ``_df`` ; ``source``, ``version`` et ``selection`` identifient ses données."""
+    with stage(f"figure {name}"):
+        if name == "moyennes":
+            return average_score_bar(_df, detailed, department_means(selection))
+        return FIGURES[name](_df, detailed)
+
+
+def figure(name, df, selection, detailed=False, source=None):
+    """Figure ``name`` pour ``df`` déjà restreint à ``selection`` (académies, années, départements)."""
+    key = source if source and name in DERIVED_FIGURES else load_students.__name__
+    return school_figure(name, key, student_data_version(), selection, detailed, df)
+
+
+def figure_names(detailed):
+    """Figures affichées par une variante de la page, dans l'ordre d'affichage."""
+    names = ["notes"]
+    if detailed:
+        names += ["dispersion", "violon", "evolution"]
+    return names + ["moyennes", "correlation"]
+
+
+# --- TABLEAU DE BORD ---
+def show_school_dashboard(prepare=None, detailed=False, source=None):
+    """Page complète ; ``detailed`` ajoute dispersion, violon et évolution des scores.
+
+    ``prepare`` ajoute les colonnes dérivées propres à une page (une fois par partition) ;
+    ``source`` distingue ces données dans les caches.
+    """
+    from samastat.risque import show_risk_table  # risque et statistiques importent ce module
+    from samastat.statistiques import show_statistics
+
+    st.image(LOGO_PATH, width=120)
+    for name, rejection in student_manifest().get("rejets", {}).items():
+        st.warning(f"⚠️ Dernière version de {name} rejetée : {rejection['motif']}. Données précédentes affichées.")
+    if not student_manifest()["partitions"]:
+        st.info("Aucune donnée scolaire disponible : déposez un fichier d'étudiants valide.")
+        return
+    academies, years, departments = partition_options()
+    selected_academies, selected_years, _ = default_selection()
+
+    st.title("📊 Module de Statistiques Scolaires - SamaStat")
+
+    # Filtres interactifs : seules les partitions sélectionnées sont lues.
+    if selected_academies is not None:
+        selected_academies = tuple(st.multiselect("Choisir les académies :", options=academies, default=selected_academies))
+    if selected_years is not None:
+        selected_years = tuple(st.multiselect("Choisir les années :", options=years, default=selected_years))
+    selected_departments = st.multiselect("Choisir les départements :", options=departments, default=list(departments))
+    filtered_df = load_students(selected_departments, selected_academies, selected_years, prepare, source)
+
+    departments_key = tuple(sorted(selected_departments))
+    selection = (selected_academies, selected_years, departments_key)
+
+    def chart(name):
+        st.plotly_chart(figure(name, filtered_df, selection, detailed, source), use_container_width=True)
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("Répartition des notes finales")
+        chart("notes")
+        if detailed:
+            chart("dispersion")
+            chart("violon")
+            chart("evolution")
+
+    with col2:
+        st.subheader("Moyenne des scores finaux par département")
+        chart("moyennes")
+
+    st.markdown("---")
+    st.subheader("📈 Corrélation : Stress, Études et Résultats")
+    chart("correlation")
+    show_statistics(departments_key, selected_academies, selected_years)
+
+    st.markdown("---")
+    st.subheader("🚨 Étudiants à risque d'échec")
+    show_risk_table(departments_key, selected_academies, selected_years)
+
+    st.markdown("---")
+    st.subheader("💡 Tableau de données brutes")
+    st.dataframe(filtered_df)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verse un fichier d'étudiants dans les partitions scolaires.")
+    parser.add_argument("fichier", help="CSV au format de data_student.csv")
+    parser.add_argument("--academie", required=True)
+    parser.add_argument("--annee", type=int, required=True)
+    args = parser.parse_args(argv)
+
+    student_manifest()  # verse d'abord data_student.csv s'il ne l'est pas encore
+    try:
+        manifest = ingest_students(pd.read_csv(args.fichier), args.academie, args.annee)
+    except ValidationError as exc:
+        print(f"❌ Fichier rejeté : {exc}")
+        print(issues_frame(exc.issues).to_string(index=False))
+        return 1
+    issues = manifest["anomalies"][f"{args.academie}/{args.annee}"]
+    if issues:
+        print(issues_frame(issues).to_string(index=False))
+    rows = sum(p["lignes"] for p in manifest["partitions"]
+               if (p["academie"], p["annee"]) == (args.academie, args.annee))
+    print(f"{rows} étudiants versés dans {PARTITION_DIR} ({args.academie}, {args.annee}) ; "
+          f"{len(manifest['partitions'])} partitions au total")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""Sessions côté serveur : jetons signés (HMAC) et expirants, transmis par l'URL ou un cookie.
+
+Après une connexion, le jeton ``identifiant.expiration.signature`` est placé dans le
+paramètre d'URL ``session`` : un rechargement de page ou un nouvel onglet sur la même
+adresse retrouve la session par une vérification HMAC et une lecture du magasin, sans
+bcrypt. Un cookie du même nom (posé par un proxy, par exemple) est aussi accepté.
+
+Le magasin est en mémoire, avec éviction à l'expiration. Avec ``SAMASTAT_SESSION_DB``,
+les sessions vivent dans une base SQLite partagée par plusieurs processus : chaque
+lecture la consulte, si bien qu'une déconnexion ou un changement de mot de passe dans
+un processus vaut pour tous.
+
+Attention : un jeton dans l'URL reste dans l'historique du navigateur et part avec tout
+lien copié ; qui le détient est connecté jusqu'à son expiration. Déconnexion et
+changement de mot de passe le révoquent ; réduire ``SAMASTAT_SESSION_TTL_S`` limite
+l'exposition.
+"""
+import base64
+import contextlib
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+import streamlit as st
+
+# --- PARAMÈTRES ---
+TOKEN_NAME = "session"
+SESSION_TTL_S = float(os.environ.get("SAMASTAT_SESSION_TTL_S", 8 * 3600))
+SECRET_FILE = ".samastat_secret"
+SESSION_DB = os.environ.get("SAMASTAT_SESSION_DB")
+SWEEP_INTERVAL_S = 60.0
+
+
+# --- SIGNATURE ---
+def _load_secret():
+    """Clé HMAC : ``SAMASTAT_SESSION_SECRET`` ou fichier local créé au premier lancement."""
+    secret = os.environ.get("SAMASTAT_SESSION_SECRET")
+    if secret:
+        return secret.encode("utf-8")
+    try:
+        fd = os.open(SECRET_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        with open(SECRET_FILE, "rb") as f:
+            return f.read().strip()
+    with os.fdopen(fd, "wb") as f:
+        secret = secrets.token_hex(32).encode("ascii")
+        f.write(secret)
+    return secret
+
+
+def _sign(secret, payload):
+    digest = hmac.new(secret, payload.encode("ascii"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def parse_token(secret, token, now=None):
+    """Identifiant de session d'un jeton authentique et non expiré, sinon ``None``."""
+    try:
+        session_id, expires, signature = token.split(".")
+        expires = int(expires)
+    except (AttributeError, ValueError):
+        return None
+    if not hmac.compare_digest(signature, _sign(secret, f"{session_id}.{expires}")):
+        return None
+    if expires <= (time.time() if now is None else now):
+        return None
+    return session_id
+
+
+# --- MAGASIN ---
+class SessionStore:
+    """Sessions en mémoire (identifiant → utilisateur, expiration), SQLite en option."""
+
+    def __init__(self, secret, ttl=SESSION_TTL_S, db_path=None):
+        self._secret = secret
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._next_sweep = 0.0
+        self._db_path = db_path
+        if db_path:
+            self._execute("CREATE TABLE IF NOT EXISTS sessions "
+                          "(id TEXT PRIMARY KEY, username TEXT NOT NULL, expires REAL NOT NULL)")
+            self._execute("CREATE INDEX IF NOT EXISTS sessions_username ON sessions (username)")
+
+    def _execute(self, sql, params=()):
+        """Une requête dans sa propre connexion, validée puis fermée."""
+        with contextlib.closing(sqlite3.connect(self._db_path, timeout=5)) as db:
+            with db:
+                return db.execute(sql, params).fetchall()
+
+    def _sweep(self, now):
+        """Éviction des sessions expirées, au plus une fois par ``SWEEP_INTERVAL_S``."""
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + SWEEP_INTERVAL_S
+        self._sessions = {sid: entry for sid, entry in self._sessions.items() if entry[1] > now}
+        if self._db_path:
+            self._execute("DELETE FROM sessions WHERE expires <= ?", (now,))
+
+    def create(self, username):
+        """Ouvre une session et renvoie son jeton signé."""
+        now = time.time()
+        session_id = secrets.token_urlsafe(16)
+        expires = int(now + self.ttl)
+        with self._lock:
+            self._sweep(now)
+            if not self._db_path:
+                self._sessions[session_id] = (username, expires)
+        if self._db_path:
+            self._execute("INSERT INTO sessions VALUES (?, ?, ?)", (session_id, username, expires))
+        return f"{session_id}.{expires}.{_sign(self._secret, f'{session_id}.{expires}')}"
+
+    def resolve(self, token):
+        """Utilisateur d'un jeton valide ; un jeton falsifié est rejeté sans lecture du magasin.
+
+        Avec une base partagée, elle seule fait foi : une révocation faite par un autre
+        processus est vue immédiatement.
+        """
+        session_id = parse_token(self._secret, token)
+        if session_id is None:
+            return None
+        now = time.time()
+        with self._lock:
+            self._sweep(now)
+            entry = self._sessions.get(session_id)
+        if self._db_path:
+            rows = self._execute("SELECT username, expires FROM sessions WHERE id = ?", (session_id,))
+            entry = tuple(rows[0]) if rows else None
+        if entry is None or entry[1] <= now:
+            return None
+        return entry[0]
+
+    def revoke(self, token):
+        session_id = parse_token(self._secret, token)
+        if session_id is None:
+            return
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        if self._db_path:
+            self._execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def revoke_user(self, username):
+        """Ferme toutes les sessions d'un compte (mot de passe changé, compte supprimé)."""
+        with self._lock:
+            self._sessions = {sid: entry for sid, entry in self._sessions.items() if entry[0] != username}
+        if self._db_path:
+            self._execute("DELETE FROM sessions WHERE username = ?", (username,))
+
+    def __len__(self):
+        if self._db_path:
+            return self._execute("SELECT COUNT(*) FROM sessions")[0][0]
+        return len(self._sessions)
+
+
+def revoke_shared(usernames):
+    """Ferme les sessions de ces comptes dans la base partagée, depuis un script hors serveur.
+
+    Sans ``SAMASTAT_SESSION_DB``, les sessions ne vivent que dans les processus serveur.
+    """
+    if SESSION_DB:
+        store = SessionStore(_load_secret(), db_path=SESSION_DB)
+        for username in usernames:
+            store.revoke_user(username)
+
+
+@st.cache_resource(show_spinner=False)
+def get_session_store():
+    """Magasin partagé par toutes les sessions du processus."""
+    return SessionStore(_load_secret(), db_path=SESSION_DB)
+
+
+# --- JETON DE LA SESSION COURANTE ---
+def current_token():
+    """Jeton transmis par l'URL, à défaut par le cookie ``session``."""
+    token = st.query_params.get(TOKEN_NAME)
+    if token:
+        return token
+    try:
+        return st.context.cookies.get(TOKEN_NAME)
+    except Exception:  # hors serveur (tests, scripts)
+        return None
+
+
+def remember_login(username):
+    """Ouvre une session serveur et place son jeton dans l'URL (voir l'avertissement du module)."""
+    st.query_params[TOKEN_NAME] = get_session_store().create(username)
+
+
+def forget_login():
+    token = current_token()
+    if token:
+        get_session_store().revoke(token)
+    st.query_params.pop(TOKEN_NAME, None)
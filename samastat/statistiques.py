@@ -0,0 +1,193 @@
+"""Moteur statistique du module scolaire : corrélations, quantiles et répartition des notes.
+
+Les colonnes numériques sont rangées une fois par version des données dans un tableau
+NumPy trié par groupe (académie × année × département × genre). Pour chaque groupe on
+garde les moments (effectif, moyennes, co-moments centrés) des valeurs et de leurs rangs,
+les quantiles et le décompte des notes : une matrice de Pearson ou de Spearman par groupe
+n'est plus qu'une lecture, et celle d'une sélection (académies, années, départements)
+une fusion de moments. Les groupes affichés restent département × genre, réunis sur les
+académies et années choisies, comme les graphiques de la page.
+"""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from samastat.instrumentation import stage
+from samastat.scolaire import load_student_data, student_data_version
+
+# --- PARAMÈTRES ---
+STAT_COLUMNS = [
+    "Study_Hours_per_Week", "Sleep_Hours_per_Night", "Stress_Level (1-10)", "Attendance (%)",
+    "Midterm_Score", "Final_Score", "Assignments_Avg", "Quizzes_Avg", "Participation_Score", "Projects_Score",
+]
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+GROUP_COLUMNS = ["Academie", "Annee", "Department", "Gender"]
+ALL_GROUPS = "Sélection entière"
+MAX_CACHED_FILTERS = 128
+
+
+# --- MOMENTS ---
+def _moments(values, starts):
+    """Effectif, moyennes et co-moments centrés de chaque segment ``[starts[i], starts[i+1])``."""
+    counts = np.diff(np.append(starts, len(values)))
+    means = np.add.reduceat(values, starts, axis=0) / counts[:, None]
+    comoments = np.empty((len(starts), values.shape[1], values.shape[1]))
+    for i, (start, count) in enumerate(zip(starts, counts)):
+        centered = values[start:start + count] - means[i]
+        comoments[i] = centered.T @ centered
+    return counts, means, comoments
+
+
+def _merge(counts, means, comoments):
+    """Fusionne les moments de plusieurs groupes (formule de Chan et al.)."""
+    total = counts.sum()
+    mean = (counts[:, None] * means).sum(axis=0) / total
+    delta = means - mean
+    comoment = comoments.sum(axis=0) + np.einsum("g,gi,gj->ij", counts, delta, delta)
+    return total, mean, comoment
+
+
+def _correlation(comoment):
+    scale = np.sqrt(np.diag(comoment))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return comoment / np.outer(scale, scale)
+
+
+class StudentStats:
+    """Statistiques précalculées par groupe (académie × année × département × genre) d'une version des données."""
+
+    def __init__(self, df):
+        df = df.dropna(subset=STAT_COLUMNS)
+        grades, self.grade_names = pd.factorize(df["Grade"], sort=True)
+        group_ids = df.groupby(GROUP_COLUMNS, sort=True).ngroup().to_numpy()
+        order = np.argsort(group_ids, kind="stable")
+        group_ids = group_ids[order]
+        starts = np.flatnonzero(np.r_[True, group_ids[1:] != group_ids[:-1]])
+
+        self.groups = df[GROUP_COLUMNS].iloc[order[starts]].reset_index(drop=True)
+        values = df[STAT_COLUMNS].to_numpy(dtype=np.float64)[order]
+        # Rangs moyens (ex æquo) calculés dans chaque groupe, pour Spearman.
+        ranks = (pd.DataFrame(values).groupby(group_ids, sort=False).rank(method="average")
+                 .to_numpy(dtype=np.float64))
+
+        self.counts, self._means, self._comoments = _moments(values, starts)
+        _, _, self._rank_comoments = _moments(ranks, starts)
+        self._quantiles = np.stack([
+            np.quantile(values[start:start + count], QUANTILES, axis=0).T
+            for start, count in zip(starts, self.counts)
+        ])
+        self._grades = np.bincount(group_ids * len(self.grade_names) + grades[order],
+                                   minlength=len(starts) * len(self.grade_names)
+                                   ).reshape(len(starts), len(self.grade_names))
+        self._values = values
+        self._starts = starts
+
+    def _selected(self, departments, academies=None, years=None):
+        """Groupes de la sélection ; ``None`` : toutes les académies (ou années)."""
+        mask = self.groups["Department"].isin(departments)
+        if academies is not None:
+            mask &= self.groups["Academie"].isin(academies)
+        if years is not None:
+            mask &= self.groups["Annee"].isin(years)
+        return np.flatnonzero(mask.to_numpy())
+
+    def _displayed(self, selected):
+        """Groupes affichés (département · genre) et groupes de la sélection qui les composent."""
+        displayed = {}
+        for i in selected:
+            displayed.setdefault(self.group_label(i), []).append(i)
+        return displayed
+
+    def _rows(self, selected):
+        return np.concatenate([np.arange(self._starts[i], self._starts[i] + self.counts[i]) for i in selected])
+
+    def _frame(self, matrix):
+        return pd.DataFrame(matrix, index=STAT_COLUMNS, columns=STAT_COLUMNS)
+
+    def group_label(self, i):
+        return f"{self.groups['Department'].iat[i]} · {self.groups['Gender'].iat[i]}"
+
+    def correlations(self, departments, method="pearson", academies=None, years=None):
+        """Matrices de corrélation : la sélection entière puis chaque groupe affiché."""
+        selected = self._selected(departments, academies, years)
+        if not len(selected):
+            return {}
+        comoments = self._rank_comoments if method == "spearman" else self._comoments
+        tables = {ALL_GROUPS: self._frame(self._pooled(selected, method))}
+        for label, groups in self._displayed(selected).items():
+            matrix = _correlation(comoments[groups[0]]) if len(groups) == 1 else self._pooled(groups, method)
+            tables[label] = self._frame(matrix)
+        return tables
+
+    def _pooled(self, selected, method):
+        if method == "pearson":
+            _, _, comoment = _merge(self.counts[selected], self._means[selected], self._comoments[selected])
+            return _correlation(comoment)
+        # Spearman sur plusieurs groupes : les rangs doivent être recalculés sur les lignes réunies.
+        ranks = pd.DataFrame(self._values[self._rows(selected)]).rank(method="average").to_numpy(dtype=np.float64)
+        centered = ranks - ranks.mean(axis=0)
+        return _correlation(centered.T @ centered)
+
+    def quantiles(self, departments, academies=None, years=None):
+        """Quantiles de chaque indicateur, par groupe affiché (format long)."""
+        frames = []
+        for label, groups in self._displayed(self._selected(departments, academies, years)).items():
+            table = (self._quantiles[groups[0]] if len(groups) == 1
+                     else np.quantile(self._values[self._rows(groups)], QUANTILES, axis=0).T)
+            frames.append(pd.DataFrame(table, index=STAT_COLUMNS, columns=[f"q{int(q * 100)}" for q in QUANTILES])
+                          .assign(Groupe=label))
+        return pd.concat(frames).rename_axis("Indicateur").reset_index() if frames else pd.DataFrame()
+
+    def grade_distribution(self, departments, academies=None, years=None):
+        """Effectifs par note (colonnes) et par groupe affiché (lignes)."""
+        displayed = self._displayed(self._selected(departments, academies, years))
+        return pd.DataFrame([self._grades[groups].sum(axis=0) for groups in displayed.values()],
+                            columns=list(self.grade_names), index=list(displayed))
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def student_stats(version):
+    """Moteur construit une fois par version des données scolaires."""
+    with stage("statistiques scolaires"):
+        return StudentStats(load_student_data(version))
+
+
+# --- RÉSULTATS PAR FILTRE ---
+@st.cache_data(show_spinner=False, persist="disk", max_entries=MAX_CACHED_FILTERS)
+def correlation_tables(departments, method, version, academies=None, years=None):
+    return student_stats(version).correlations(departments, method, academies, years)
+
+
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_FILTERS)
+def correlation_heatmap(departments, method, group, version, academies=None, years=None):
+    table = correlation_tables(departments, method, version, academies, years)[group]
+    return px.imshow(table.round(2), text_auto=True, zmin=-1, zmax=1, color_continuous_scale="RdBu_r",
+                     aspect="auto", title=f"Corrélations ({method.capitalize()}) – {group}")
+
+
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_FILTERS)
+def quantile_table(departments, version, academies=None, years=None):
+    return student_stats(version).quantiles(departments, academies, years)
+
+
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_FILTERS)
+def grade_table(departments, version, academies=None, years=None):
+    return student_stats(version).grade_distribution(departments, academies, years)
+
+
+def show_statistics(departments, academies=None, years=None):
+    """Matrices de corrélation, quantiles et répartition des notes pour la sélection (mêmes filtres que la page)."""
+    version = student_data_version()
+    method = st.radio("Méthode :", ["Pearson", "Spearman"], horizontal=True, key="stats_method").lower()
+    tables = correlation_tables(departments, method, version, academies, years)
+    if not tables:
+        st.info("Aucun étudiant dans la sélection.")
+        return
+    group = st.selectbox("Groupe (département · genre) :", list(tables), key="stats_group")
+    st.plotly_chart(correlation_heatmap(departments, method, group, version, academies, years),
+                    use_container_width=True)
+
+    with st.expander("📐 Quantiles et répartition des notes par groupe"):
+        st.dataframe(quantile_table(departments, version, academies, years), hide_index=True)
+        st.dataframe(grade_table(departments, version, academies, years))
@@ -0,0 +1,117 @@
+"""Tableaux d'indicateurs par territoire : source interchangeable, index catégoriel, masques en cache.
+
+Une ``TableSource`` décrit d'où vient un tableau : un fichier CSV ou Parquet (chemin
+surchargeable par ``SAMASTAT_TABLE_<NOM>``) ou, à défaut, les données simulées du
+module. La colonne clé (région, délégation, commune) est codée en catégories une fois
+par version ; une sélection devient un masque booléen calculé sur ces codes entiers et
+mis en cache. Le même code d'onglet sert ainsi 10 régions ou des dizaines de milliers
+de communes.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from samastat.donnees import file_version, frame_version, read_only_view
+from samastat.instrumentation import stage
+
+# --- PARAMÈTRES ---
+MAX_CACHED_MASKS = 256
+
+TABLE_SOURCES = {}
+
+
+# --- SOURCES ---
+class TableSource:
+    """Tableau ``name`` indexé par la colonne ``key`` ; lu depuis ``path`` s'il existe, sinon ``data``."""
+
+    def __init__(self, name, key, data=None, path=None):
+        self.name = name
+        self.key = key
+        self.data = data
+        self.path = os.environ.get(f"SAMASTAT_TABLE_{name.upper()}", path)
+        self._data_version = None
+        TABLE_SOURCES[name] = self
+
+    def _from_file(self):
+        return bool(self.path) and os.path.exists(self.path)
+
+    def version(self):
+        """Date et taille du fichier, ou empreinte des données simulées (calculée une fois)."""
+        if self._from_file():
+            return f"{self.name}-{file_version(self.path)}"
+        if self._data_version is None:
+            self._data_version = f"{self.name}-{frame_version(pd.DataFrame(self.data))}"
+        return self._data_version
+
+    def read(self):
+        if not self._from_file():
+            return pd.DataFrame(self.data)
+        if self.path.endswith(".parquet"):
+            return pd.read_parquet(self.path)
+        return pd.read_csv(self.path)
+
+
+# --- INDEX CATÉGORIEL ---
+class IndicatorTable:
+    """Tableau et codes entiers de sa colonne clé ; le tableau lui-même n'est pas modifié."""
+
+    def __init__(self, df, key):
+        if key not in df.columns:
+            raise KeyError(f"Colonne clé « {key} » absente du tableau")
+        keys = pd.Categorical(df[key])
+        self.frame = df.reset_index(drop=True)
+        self.key = key
+        self.codes = keys.codes
+        self.categories = keys.categories
+        # Première ligne de chaque code (lignes demandées dans l'ordre de la sélection).
+        self._first_row = np.full(len(self.categories), -1, dtype=np.int64)
+        present = self.codes >= 0
+        rows = np.flatnonzero(present)
+        self._first_row[self.codes[rows][::-1]] = rows[::-1]
+
+    def selected_codes(self, selection):
+        """Codes des noms sélectionnés, dans l'ordre donné ; les noms inconnus sont ignorés."""
+        codes = self.categories.get_indexer(list(selection))
+        return codes[codes >= 0]
+
+    def mask(self, selection):
+        """Masque booléen des lignes sélectionnées : une table de correspondance indexée par code."""
+        lookup = np.zeros(len(self.categories) + 1, dtype=bool)  # dernière case : clé manquante (code -1)
+        lookup[self.selected_codes(selection)] = True
+        return lookup[self.codes]
+
+    def rows(self, selection):
+        """Lignes des noms sélectionnés, dans l'ordre de la sélection."""
+        return self.frame.iloc[self._first_row[self.selected_codes(selection)]]
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def indicator_table(name, version):
+    """Tableau indexé, construit une fois par version de sa source."""
+    source = TABLE_SOURCES[name]
+    with stage(f"table {name}"):
+        return IndicatorTable(source.read(), source.key)
+
+
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_MASKS)
+def selection_mask(name, selection, version):
+    return indicator_table(name, version).mask(selection)
+
+
+# --- ACCÈS ---
+def load_table(name):
+    """Tableau (vue en lecture seule) et version courante de la source ``name``."""
+    version = TABLE_SOURCES[name].version()
+    return read_only_view(indicator_table(name, version).frame), version
+
+
+def select_rows(name, selection, version):
+    """Lignes dont la clé figure dans ``selection`` (ordre du tableau), via le masque en cache."""
+    return indicator_table(name, version).frame[selection_mask(name, selection, version)]
+
+
+def ordered_rows(name, selection, version):
+    """Lignes de ``selection``, dans l'ordre de la sélection."""
+    return indicator_table(name, version).rows(selection)
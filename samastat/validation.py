@@ -0,0 +1,114 @@
+"""Validation et nettoyage des fichiers déposés, colonne par colonne et sans boucle sur les lignes.
+
+Un schéma décrit chaque colonne (type, obligatoire, bornes, valeurs permises, décimales).
+``validate`` renvoie le tableau nettoyé et typé (catégories, entiers compacts, flottants
+arrondis) et la liste des anomalies ; les lignes fautives sont écartées. Un fichier
+sans une colonne obligatoire, ou dont trop de lignes sont fautives, est rejeté
+(``ValidationError``) avant d'atteindre les tableaux de bord.
+"""
+import numpy as np
+import pandas as pd
+
+# --- PARAMÈTRES ---
+MAX_REJECTED_RATIO = 0.05
+MAX_EXAMPLES = 5
+
+
+class Column:
+    """Règles d'une colonne : ``kind`` vaut ``"float"``, ``"int"``, ``"category"`` ou ``"str"``."""
+
+    def __init__(self, kind, required=True, min=None, max=None, values=None, decimals=None, unique=False):
+        self.kind = kind
+        self.required = required
+        self.min = min
+        self.max = max
+        self.values = values
+        self.decimals = decimals
+        self.unique = unique
+
+
+class ValidationError(ValueError):
+    """Fichier rejeté ; ``issues`` détaille les anomalies relevées."""
+
+    def __init__(self, message, issues):
+        super().__init__(message)
+        self.issues = issues
+
+
+def _issue(issues, column, rule, mask, raw):
+    count = int(mask.sum())
+    if count:
+        examples = raw[mask].head(MAX_EXAMPLES).astype(str).tolist()
+        issues.append({"colonne": column, "regle": rule, "lignes": count, "exemples": examples})
+
+
+def validate(df, schema, max_rejected_ratio=MAX_REJECTED_RATIO):
+    """Tableau nettoyé et typé selon ``schema``, et anomalies ; lève ``ValidationError`` si rejeté."""
+    missing = [name for name, column in schema.items() if column.required and name not in df.columns]
+    if missing:
+        raise ValidationError(f"Colonnes obligatoires absentes : {', '.join(missing)}",
+                              [{"colonne": name, "regle": "obligatoire", "lignes": len(df), "exemples": []}
+                               for name in missing])
+
+    issues = []
+    bad = np.zeros(len(df), dtype=bool)
+    clean = {}
+    for name, column in schema.items():
+        if name not in df.columns:
+            continue
+        raw = df[name]
+        if column.kind in ("float", "int"):
+            values = pd.to_numeric(raw, errors="coerce")
+            invalid = values.isna()
+            _issue(issues, name, "valeur manquante ou non numérique", invalid, raw)
+            if column.kind == "int":
+                fractional = ~invalid & (values != values.round())
+                _issue(issues, name, "entier attendu", fractional, raw)
+                invalid |= fractional
+            if column.min is not None or column.max is not None:
+                outside = ~invalid & ~values.between(
+                    -np.inf if column.min is None else column.min, np.inf if column.max is None else column.max)
+                _issue(issues, name, f"hors de [{column.min}, {column.max}]", outside, raw)
+                invalid |= outside
+            if column.decimals is not None:
+                values = values.round(column.decimals)
+        else:
+            values = raw.astype("string").str.strip()
+            invalid = values.isna() | (values == "")
+            _issue(issues, name, "valeur manquante", invalid, raw)
+            if column.values is not None:
+                unknown = ~invalid & ~values.isin(column.values)
+                _issue(issues, name, f"valeur hors de {{{', '.join(column.values)}}}", unknown, raw)
+                invalid |= unknown
+        if column.unique:
+            duplicated = ~invalid & values.duplicated(keep="first")
+            _issue(issues, name, "doublon", duplicated, raw)
+            invalid |= duplicated
+        bad |= invalid.to_numpy()
+        clean[name] = values
+
+    rejected = int(bad.sum())
+    if len(df) and rejected / len(df) > max_rejected_ratio:
+        raise ValidationError(f"{rejected} lignes fautives sur {len(df)} (plus de {max_rejected_ratio:.0%})", issues)
+
+    keep = ~bad
+    typed = {}
+    for name, values in clean.items():
+        column, values = schema[name], values[keep]
+        if column.kind == "int":
+            typed[name] = pd.to_numeric(values.astype("int64"), downcast="integer")
+        elif column.kind == "float":
+            typed[name] = values.astype("float64")
+        elif column.kind == "category":
+            categories = column.values if column.values is not None else sorted(values.unique())
+            typed[name] = pd.Categorical(values, categories=categories)
+        else:
+            typed[name] = values
+    return pd.DataFrame(typed).reset_index(drop=True), issues
+
+
+def issues_frame(issues):
+    """Anomalies sous forme de tableau, pour l'affichage ou la ligne de commande."""
+    frame = pd.DataFrame(issues, columns=["colonne", "regle", "lignes", "exemples"])
+    frame["exemples"] = frame["exemples"].map(", ".join)
+    return frame
@@ -1,70 +1,19 @@
 
 import streamlit as st
-import pandas as pd
-import json
-import bcrypt
-import os
 
-# --- PARAMÈTRES ---
-LOGO_PATH = "logo.png"
-USER_FILE = "users.json"
-DATA_FILE = "samastat_mairie_donnees.csv"
-
-# --- UTILISATEUR ---
-def load_users():
-    if not os.path.exists(USER_FILE):
-        return {}
-    with open(USER_FILE, "r") as f:
-        return json.load(f)
-
-def save_users(users):
-    with open(USER_FILE, "w") as f:
-        json.dump(users, f)
-
-def hash_password(password: str) -> bytes:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt())
-
-def check_password(password: str, hashed: bytes) -> bool:
-    return bcrypt.checkpw(password.encode(), hashed)
-
-def verify_user(username, password):
-    users = load_users()
-    if username not in users:
-        return False
-    hashed = users[username].encode("utf-8")
-    return check_password(password, hashed)
-
-# --- PAGE D'ACCUEIL ---
-def show_welcome_page():
-    st.set_page_config(page_title="SamaStat Mairie", layout="centered")
-    if os.path.exists(LOGO_PATH):
-        st.image(LOGO_PATH, width=250)
-    st.title("Bienvenue sur SamaStat Mairie")
-    st.markdown("### Votre plateforme de veille statistique au service des collectivités locales.")
-    st.info("Veuillez vous connecter pour accéder aux données.")
-
-# --- CONNEXION ---
-def show_login():
-    st.sidebar.subheader("🧑‍💻 Connexion")
-    username = st.sidebar.text_input("Nom d'utilisateur", key="login_user")
-    password = st.sidebar.text_input("Mot de passe", type="password", key="login_pass")
-    if st.sidebar.button("Se connecter"):
-        if verify_user(username, password):
-            st.session_state.logged_in = True
-            st.session_state.username = username
-            st.success(f"Bienvenue {username} ! Vous êtes connecté.")
-            st.rerun()
-        else:
-            st.error("Nom d'utilisateur ou mot de passe incorrect.")
-
-# --- TABLEAU COMPLET ---
-def show_full_dashboard():
-    st.title("📊 Tableau de bord complet - SamaStat Mairie")
-    df = pd.read_csv(DATA_FILE)
+from samastat.auth import init_session, logout_button, show_login, show_welcome_page, user_scope
+from samastat.chargement import ProgressiveLoader
+from samastat.choroplethe import show_choropleth
+from samastat.hierarchie import show_drilldown
+from samastat.instrumentation import begin_rerun, end_rerun, show_perf_panel
+from samastat.mairie import (CHART_FIELDS, commune_hierarchy, get_chart_data, get_commune_row, load_scoped_data,
+                             region_table, scope_communes)
 
-    commune = st.selectbox("🏙️ Choisissez une commune :", df["Commune"].unique())
-    data = df[df["Commune"] == commune].iloc[0]
+# --- PARAMÈTRES ---
+PRESENTATION = "### Votre plateforme de veille statistique au service des collectivités locales."
 
+# --- BLOCS D'AFFICHAGE ---
+def render_metrics(data):
     col1, col2 = st.columns(2)
     with col1:
         st.metric("Population", f"{data['Population Totale']:,}")
@@ -79,20 +28,13 @@ def show_full_dashboard():
         st.metric("Budget participatif", f"{data['Budget Participatif (millions CFA)']} M CFA")
         st.metric("Incendies/an", int(data["Incendies/an"]))
 
-    st.markdown("### 📌 Visualisations")
-    chart_type = st.radio("Type de graphique :", ["Diagramme en barre", "Diagramme circulaire"])
-    selected_fields = [
-        "Taux de Scolarisation (%)", "Taux de Vaccination (%)", "Taux de Chômage (%)",
-        "Accès à l'Eau Potable (%)", "Électricité (%)"
-    ]
-    chart_data = df[df["Commune"] == commune][selected_fields].T
-    chart_data.columns = ["Valeur"]
-
+def render_chart(chart_data, chart_type):
     if chart_type == "Diagramme en barre":
         st.bar_chart(chart_data)
     else:
         st.pyplot(chart_data.plot.pie(y="Valeur", autopct="%1.1f%%", figsize=(5, 5)).get_figure())
 
+def render_export(data, commune):
     with st.expander("📄 Voir toutes les données"):
         st.dataframe(data.to_frame().rename(columns={data.name: commune}))
 
@@ -103,23 +45,61 @@ def show_full_dashboard():
         mime="text/csv"
     )
 
+def render_region_table(table):
+    with st.expander("📐 Dispersion par région (pondérée par la population)"):
+        st.dataframe(table)
+
+# --- TABLEAU COMPLET ---
+def show_full_dashboard():
+    st.title("📊 Tableau de bord complet - SamaStat Mairie")
+
+    # Un agent rattaché à un périmètre ne charge que la partition de ses communes.
+    scope = user_scope(st.session_state.username)
+
+    # Tous les chargements partent en parallèle ; la liste des communes arrive en premier.
+    loader = ProgressiveLoader()
+    names = loader.fetch(scope_communes, scope)
+    loader.fetch(load_scoped_data, scope)
+    if not names.result():
+        st.warning("Aucune commune dans votre périmètre. Contactez un administrateur.")
+        return
+    commune = st.selectbox("🏙️ Choisissez une commune :", names.result())
+
+    loader.submit(get_commune_row, commune, scope, render=render_metrics)
+
+    st.markdown("### 📌 Visualisations")
+    chart_type = st.radio("Type de graphique :", ["Diagramme en barre", "Diagramme circulaire"])
+    loader.submit(get_chart_data, commune, scope, render=lambda chart_data: render_chart(chart_data, chart_type))
+    loader.submit(get_commune_row, commune, scope, render=lambda data: render_export(data, commune))
+
+    st.markdown("### 🗺️ Carte des indicateurs par commune")
+    loader.submit(load_scoped_data, scope, render=lambda df: show_choropleth(df, "Commune", CHART_FIELDS))
+
+    # Les agrégats départementaux et régionaux couvrent toutes les communes : accès complet seulement.
+    if scope is None:
+        st.markdown("### 🧭 Vue territoriale")
+        loader.submit(commune_hierarchy, render=lambda hierarchy: show_drilldown(hierarchy, key="mairie"))
+        loader.submit(region_table, render=render_region_table)
+
     st.markdown("### ✅ Donnez votre avis")
     st.slider("Niveau de satisfaction global", 0, 10, 5)
     st.text_area("Commentaires ou suggestions")
 
+    loader.render_as_completed()
+
 # --- APPLICATION PRINCIPALE ---
 def main():
-    if "logged_in" not in st.session_state:
-        st.session_state.logged_in = False
+    begin_rerun("samastat_app_mairie")
+    init_session()
     if st.session_state.logged_in:
         st.sidebar.success(f"Connecté en tant que {st.session_state.username}")
-        if st.sidebar.button("🔓 Se déconnecter"):
-            st.session_state.logged_in = False
-            st.rerun()
+        logout_button()
         show_full_dashboard()
     else:
-        show_welcome_page()
+        show_welcome_page(PRESENTATION)
         show_login()
+    show_perf_panel()
+    end_rerun()
 
 if __name__ == "__main__":
     main()
@@ -3,13 +3,16 @@
 # Description : Dashboard Streamlit avec logo, PDF, filtres, feedback et graphiques
 
 import streamlit as st
-import pandas as pd
-import random
-from fpdf import FPDF
 import plotly.graph_objects as go
 
+from samastat.chargement import ProgressiveLoader
+from samastat.donnees import check_session_budget, shared_dataset
+from samastat.instrumentation import begin_rerun, end_rerun
+from samastat.saed import generate_pdf, simulate_agriculture
+
 # 🔧 Configuration Streamlit
 st.set_page_config(page_title="SamaStat SAED", layout="wide")
+begin_rerun("samastat_app_saed")
 
 # 🖼️ Affichage du logo dans la sidebar
 st.sidebar.image("logo.png", width=220)
@@ -33,24 +36,16 @@ if st.sidebar.button("Se connecter"):
 # 🎯 Accès au tableau de bord
 if st.session_state.logged_in:
 
-    # 🌾 Simuler les données agricoles
-    cultures = ["Riz", "Maïs", "Tomate", "Oignon"]
-    regions = ["Saint-Louis", "Dagana", "Podor", "Matam"]
-
-    def simulate_agriculture(n):
-        data = []
-        for _ in range(n):
-            data.append({
-                "Campagne": random.choice(["2022", "2023", "2024"]),
-                "Région": random.choice(regions),
-                "Culture": random.choice(cultures),
-                "Superficie_ha": round(random.uniform(10, 100), 2),
-                "Rendement_t_ha": round(random.uniform(2.5, 6), 2),
-                "Technique": random.choice(["traditionnelle", "intensive"])
-            })
-        return pd.DataFrame(data)
-
-    agri_df = simulate_agriculture(50)
+    # 🌾 Données agricoles simulées une seule fois par processus, partagées en lecture seule
+    @shared_dataset
+    def load_agriculture():
+        return simulate_agriculture(50, techniques=["traditionnelle", "intensive"])
+
+    def build_pie_chart(data):
+        pie_data = data["Culture"].value_counts()
+        return go.Figure(data=[go.Pie(labels=pie_data.index, values=pie_data.values, hole=0.3)])
+
+    agri_df = load_agriculture()
 
     # 📊 Interface principale
     st.title("📊 Tableau de bord SamaStat – SAED")
@@ -62,15 +57,17 @@ if st.session_state.logged_in:
     filtered_df = agri_df[agri_df["Campagne"] == selected_campagne]
     st.dataframe(filtered_df)
 
+    # Agrégats et figures calculés en parallèle, affichés dès qu'ils sont prêts
+    loader = ProgressiveLoader()
+
     # 📈 Graphique bar : rendements moyens
     st.subheader("📈 Rendement moyen par culture")
-    st.bar_chart(filtered_df.groupby("Culture")["Rendement_t_ha"].mean())
+    loader.submit(lambda: filtered_df.groupby("Culture")["Rendement_t_ha"].mean(), render=st.bar_chart)
 
     # 🥧 Diagramme circulaire : répartition des cultures
     st.subheader("🥧 Répartition des cultures")
-    pie_data = filtered_df["Culture"].value_counts()
-    pie_chart = go.Figure(data=[go.Pie(labels=pie_data.index, values=pie_data.values, hole=0.3)])
-    st.plotly_chart(pie_chart)
+    loader.submit(build_pie_chart, filtered_df, render=st.plotly_chart)
+    loader.render_as_completed()
 
     # 🗣️ Retour utilisateur
     st.subheader("📝 Votre avis sur SamaStat")
@@ -79,39 +76,13 @@ if st.session_state.logged_in:
     if st.button("📨 Envoyer le retour"):
         st.success("✅ Merci pour votre contribution ! (stockage simulé)")
 
-    # 📄 Rapport PDF avec logo et slogan
-    def generate_pdf(data):
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
-        try:
-            pdf.image("logo_samastat.png", x=10, y=8, w=35)
-        except:
-            pass  # Ignore si image non trouvée
-        pdf.ln(40)
-
-        pdf.set_font("Arial", 'B', 14)
-        pdf.cell(200, 10, txt=f"Rapport SamaStat SAED – Campagne {selected_campagne}", ln=True, align='C')
-        pdf.ln(10)
-
-        pdf.set_font("Arial", size=12)
-        pdf.cell(200, 10, txt=f"Nombre de producteurs : {len(data)}", ln=True)
-        pdf.cell(200, 10, txt=f"Superficie totale : {data['Superficie_ha'].sum():.2f} ha", ln=True)
-        pdf.cell(200, 10, txt=f"Rendement moyen : {data['Rendement_t_ha'].mean():.2f} t/ha", ln=True)
-
-        # 🖋️ Slogan en pied de page
-        pdf.set_y(-20)
-        pdf.set_font("Arial", 'I', 10)
-        pdf.cell(0, 10, "SamaStat : La plateforme du futur pour la souveraineté agricole 🇸🇳", ln=True, align='C')
-
-        filename = "rapport_samastat.pdf"
-        pdf.output(filename)
-        return filename
-
     if st.button("📄 Générer le rapport PDF"):
-        file_path = generate_pdf(filtered_df)
+        file_path = generate_pdf(filtered_df, selected_campagne)
         with open(file_path, "rb") as f:
             st.download_button("📥 Télécharger le rapport PDF", f, file_name="rapport_samastat.pdf")
 
+    check_session_budget()
+    end_rerun()
+
 else:
     st.warning("🔒 Veuillez vous connecter pour accéder au tableau de bord.")
@@ -0,0 +1,263 @@
+"""Benchmarks SamaStat exécutables sans interface Streamlit.
+
+    python samastat_benchmarks.py                      # tous les cas, résultats en JSON
+    python samastat_benchmarks.py --quick              # sans les volumes à 5 millions de lignes
+    python samastat_benchmarks.py --only scolaire      # filtre sur le nom des cas
+    python samastat_benchmarks.py --compare benchmarks/ancien.json
+
+Chaque exécution écrit ``benchmarks/<date>-<commit>.json``. Avec ``--compare``, les cas
+plus lents que le seuil (``--threshold``, +20 % par défaut) sont signalés et le code de
+sortie vaut 1, ce qui permet de détecter les régressions en intégration continue.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from unittest import mock
+
+import bcrypt
+import numpy as np
+import pandas as pd
+
+from samastat import auth, previsions, saed, scolaire
+from samastat.statistiques import student_stats
+
+# --- PARAMÈTRES ---
+STUDENT_FILE = "data_student.csv"
+RESULTS_DIR = "benchmarks"
+STUDENT_ROWS = (50_000, 500_000, 5_000_000)
+SIMULATION_ROWS = (50, 5_000, 50_000)
+MERGE_ROWS = (50, 100, 200)
+USER_COUNT = 10_000
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.20
+
+CASES = []
+
+
+def case(name, repeat=DEFAULT_REPEAT, heavy=False):
+    """Déclare un cas : ``setup(tmp, stack)`` prépare hors chrono et renvoie la fonction mesurée.
+
+    Les substitutions (``mock.patch``) entrées dans ``stack`` sont annulées à la fin du cas.
+    """
+    def decorator(setup):
+        CASES.append({"name": name, "setup": setup, "repeat": repeat, "heavy": heavy})
+        return setup
+    return decorator
+
+
+# --- DONNÉES ---
+def scale_student_csv(rows, tmp):
+    """Réplique ``data_student.csv`` jusqu'à ``rows`` lignes avec des identifiants uniques."""
+    path = os.path.join(tmp, f"data_student_{rows}.csv")
+    if not os.path.exists(path):
+        base = pd.read_csv(STUDENT_FILE)
+        reps = -(-rows // len(base))
+        df = pd.concat([base] * reps, ignore_index=True).iloc[:rows]
+        df["Student_ID"] = "S" + pd.Series(np.arange(rows), dtype="int64").astype(str)
+        df.to_csv(path, index=False)
+    return path
+
+
+def use_student_file(stack, path, tmp):
+    """Fait lire ``path`` au module scolaire, rangé dans des partitions temporaires, le temps du cas."""
+    partition_dir = os.path.join(tmp, "partitions-" + os.path.splitext(os.path.basename(path))[0])
+    stack.enter_context(mock.patch.multiple(scolaire, STUDENT_FILE=path, PARTITION_DIR=partition_dir,
+                                            MANIFEST_FILE=os.path.join(partition_dir, "manifest.json")))
+    scolaire.student_manifest()  # versement initial hors chrono (réutilisé s'il existe déjà)
+
+
+# --- CAS ---
+# Chaque mesure vide d'abord les caches concernés : on chronomètre le premier rerun.
+for _rows in STUDENT_ROWS:
+    @case(f"scolaire.student_manifest[{_rows}]", repeat=1 if _rows >= 5_000_000 else DEFAULT_REPEAT,
+          heavy=_rows >= 5_000_000)
+    def _ingest(tmp, stack, rows=_rows):
+        use_student_file(stack, scale_student_csv(rows, tmp), tmp)
+
+        def run():
+            os.remove(scolaire.MANIFEST_FILE)  # force le versement : lecture, validation, partitions
+            scolaire.student_manifest()
+        return run
+
+    @case(f"scolaire.load_students[{_rows}]", heavy=_rows >= 5_000_000)
+    def _load(tmp, stack, rows=_rows):
+        use_student_file(stack, scale_student_csv(rows, tmp), tmp)
+        departments = scolaire.partition_options()[2]
+
+        def run():
+            scolaire.load_partition.clear()
+            scolaire.load_students(departments)
+        return run
+
+    @case(f"scolaire.figures[{_rows}]", heavy=_rows >= 5_000_000)
+    def _figures(tmp, stack, rows=_rows):
+        use_student_file(stack, scale_student_csv(rows, tmp), tmp)
+        selection = scolaire.default_selection()
+        df = scolaire.load_students(selection[2], *selection[:2])
+
+        def run():
+            scolaire.school_figure.clear()
+            for name in scolaire.figure_names(True):
+                scolaire.figure(name, df, selection, True)
+        return run
+
+    @case(f"scolaire.statistiques[{_rows}]", heavy=_rows >= 5_000_000)
+    def _statistics(tmp, stack, rows=_rows):
+        use_student_file(stack, scale_student_csv(rows, tmp), tmp)
+        version = scolaire.student_data_version()
+        departments = scolaire.partition_options()[2]
+
+        def run():
+            scolaire.load_student_data.clear()
+            student_stats.clear()
+            for method in ("pearson", "spearman"):
+                student_stats(version).correlations(departments, method)
+        return run
+
+
+@case("sene_mairie.generate_forecast_data")
+def _forecast(tmp, stack):
+    stack.callback(previsions.get_model_registry.clear)
+    stack.enter_context(mock.patch.object(previsions, "MODEL_DIR", os.path.join(tmp, "modeles")))
+    previsions.get_model_registry.clear()
+    previsions.train_missing_forecasts()  # entraînement initial hors chrono
+    return previsions.generate_forecast_data
+
+
+for _n in SIMULATION_ROWS:
+    @case(f"saed.simulations[{_n}]")
+    def _simulations(tmp, stack, n=_n):
+        def run():
+            saed.simulate_agriculture(n)
+            saed.simulate_irrigation(n)
+            saed.simulate_producteurs(n)
+            saed.simulate_financement(n)
+        return run
+
+for _n in MERGE_ROWS:
+    @case(f"saed.merge_export[{_n}]")
+    def _merge(tmp, stack, n=_n):
+        random.seed(42)
+        agri = saed.simulate_agriculture(n)
+        irrig = saed.simulate_irrigation(n)
+        fin = saed.simulate_financement(n)
+        return lambda: saed.merge_for_export(agri, irrig, fin).to_csv(index=False).encode("utf-8")
+
+
+@case(f"sene_mairie.verify_user[{USER_COUNT}]")
+def _verify_user(tmp, stack):
+    # Un seul hachage au coût par défaut, partagé : seul le volume du fichier varie.
+    hashed = bcrypt.hashpw(b"motdepasse", bcrypt.gensalt()).decode("utf-8")
+    users = {f"agent_{i:05d}": hashed for i in range(USER_COUNT)}
+    stack.enter_context(mock.patch.object(auth, "USER_FILE", os.path.join(tmp, "users.json")))
+    auth.save_users(users)
+    return lambda: auth.verify_user(f"agent_{USER_COUNT // 2:05d}", "motdepasse")
+
+
+@case("saed.generate_pdf")
+def _pdf(tmp, stack):
+    random.seed(42)
+    data = saed.simulate_agriculture(50)
+    filename = os.path.join(tmp, "rapport.pdf")
+    return lambda: saed.generate_pdf(data, "2024", filename)
+
+
+# --- EXÉCUTION ---
+def run_case(spec, tmp):
+    timings = []
+    with contextlib.ExitStack() as stack:
+        fn = spec["setup"](tmp, stack)
+        for _ in range(spec["repeat"]):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+    return {
+        "name": spec["name"],
+        "repeat": spec["repeat"],
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+        "max_s": max(timings),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "inconnu"
+
+
+def compare(results, baseline_path, threshold):
+    """Affiche l'écart médian avec une exécution de référence ; renvoie les régressions."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        ref = baseline.get(result["name"])
+        if ref is None:
+            continue
+        ratio = result["median_s"] / ref["median_s"] if ref["median_s"] else float("inf")
+        flag = "⚠️ RÉGRESSION" if ratio > 1 + threshold else ""
+        print(f"  {result['name']:<45} {ref['median_s']:.4f}s → {result['median_s']:.4f}s ({ratio:5.2f}x) {flag}")
+        if flag:
+            regressions.append(result["name"])
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks SamaStat (sans interface).")
+    parser.add_argument("--only", help="Ne lance que les cas dont le nom contient ce texte")
+    parser.add_argument("--quick", action="store_true", help="Ignore les cas lourds (5 millions de lignes)")
+    parser.add_argument("--output", help="Fichier JSON de résultats")
+    parser.add_argument("--compare", help="Résultats de référence à comparer")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    specs = [c for c in CASES if (not args.only or args.only in c["name"]) and not (args.quick and c["heavy"])]
+    tmp = tempfile.mkdtemp(prefix="samastat-bench-")
+    results = []
+    try:
+        for spec in specs:
+            result = run_case(spec, tmp)
+            results.append(result)
+            print(f"{result['name']:<45} médiane {result['median_s']:.4f}s (min {result['min_s']:.4f}s, n={result['repeat']})")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    commit = git_commit()
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": commit,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "machine": platform.platform(),
+            "cpus": os.cpu_count(),
+            "results": results,
+        }, f, indent=2, ensure_ascii=False)
+    print(f"Résultats écrits dans {output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} régression(s) au-delà de +{args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""Test de charge sans navigateur : N agents simulés rejouent des interactions sur les applications.
+
+    python samastat_charge.py --utilisateurs 20 --iterations 10
+    python samastat_charge.py --app app --app scolaire --utilisateurs 50
+    python samastat_charge.py --app mairie --login agent1 --mot-de-passe secret
+
+Le mot de passe de ``app.py`` est lu, comme par l'application, dans ``SAMASTAT_APP_MOT_DE_PASSE``
+(ou passé par ``--mot-de-passe-app``).
+
+Chaque agent est une session ``AppTest`` (exécution réelle du script, sans serveur ni
+navigateur) dans son propre thread ; toutes les sessions partagent le processus, donc
+les caches ``st.cache_data`` / ``st.cache_resource``, comme sur un serveur unique. Chaque
+rerun est chronométré ; le rapport donne les latences p50/p95/p99 par application et
+le pic de mémoire résidente (RSS) du processus. ``AppTest`` n'est pas prévu pour tourner
+dans plusieurs threads : ses propres erreurs (``HARNESS_MARKERS``) sont comptées à part,
+hors latences et hors erreurs des applications.
+"""
+import abc
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+# --- PARAMÈTRES ---
+APP_PASSWORD_ENV = "SAMASTAT_APP_MOT_DE_PASSE"  # même variable que app.py
+RERUN_TIMEOUT = 120
+DEFAULT_USERS = 10
+DEFAULT_ITERATIONS = 5
+PERCENTILES = (50, 95, 99)
+# Erreurs du banc AppTest lui-même sous concurrence, pas des applications.
+HARNESS_MARKERS = ("$$ID-", "Runtime hasn't been created")
+
+
+def _widget(elements, label):
+    """Premier widget dont le libellé commence par ``label``."""
+    for element in elements:
+        if element.label.startswith(label):
+            return element
+    raise LookupError(f"Widget introuvable : {label}")
+
+
+def _sample(rng, options):
+    return rng.sample(list(options), rng.randint(1, len(options)))
+
+
+# --- SCÉNARIOS ---
+class Scenario(abc.ABC):
+    """Un parcours d'agent : ``open`` ouvre la session, ``step`` rejoue une interaction."""
+
+    script = None
+
+    def __init__(self, rng, args):
+        self.rng = rng
+        self.args = args
+
+    def open(self, at):
+        return at
+
+    @abc.abstractmethod
+    def step(self, at):
+        """Rejoue une interaction sur la session ``at`` et la renvoie."""
+
+
+class RegionsScenario(Scenario):
+    """``app.py`` : mot de passe puis sélections successives de régions."""
+
+    script = "app.py"
+
+    def open(self, at):
+        return _widget(at.sidebar.text_input, "Entrez le mot de passe").input(self.args.mot_de_passe_app)
+
+    def step(self, at):
+        regions = _widget(at.multiselect, "Choisissez les régions")
+        return regions.set_value(_sample(self.rng, regions.options))
+
+
+class MairieScenario(Scenario):
+    """``samastat_app_mairie.py`` : connexion puis navigation entre communes et graphiques."""
+
+    script = "samastat_app_mairie.py"
+
+    def open(self, at):
+        if self.args.login:
+            _widget(at.sidebar.text_input, "Nom d'utilisateur").input(self.args.login)
+            _widget(at.sidebar.text_input, "Mot de passe").input(self.args.mot_de_passe or "")
+            return _widget(at.sidebar.button, "Se connecter").click()
+        # Sans identifiants : session déjà authentifiée, on ne mesure que le tableau de bord.
+        at.session_state["logged_in"] = True
+        at.session_state["username"] = "charge"
+        return at
+
+    def step(self, at):
+        if not at.session_state["logged_in"]:
+            return self.open(at)
+        if self.rng.random() < 0.3:
+            chart = _widget(at.radio, "Type de graphique")
+            return chart.set_value(self.rng.choice(chart.options))
+        commune = _widget(at.selectbox, "🏙️ Choisissez une commune")
+        return commune.select(self.rng.choice(commune.options))
+
+
+class ScolaireScenario(Scenario):
+    """Module scolaire : sélections successives de départements."""
+
+    script = "samastat_module_scolaire_okk.py"
+
+    def step(self, at):
+        departments = _widget(at.multiselect, "Choisir les départements")
+        return departments.set_value(_sample(self.rng, departments.options))
+
+
+SCENARIOS = {"app": RegionsScenario, "mairie": MairieScenario, "scolaire": ScolaireScenario}
+
+
+# --- EXÉCUTION ---
+def is_harness_error(error):
+    return error is not None and any(marker in error for marker in HARNESS_MARKERS)
+
+
+def _timed_run(at, app, action, samples, lock):
+    start = time.perf_counter()
+    error = None
+    try:
+        at.run(timeout=RERUN_TIMEOUT)
+        if at.exception:
+            error = at.exception[0].message
+    except Exception as exc:  # un agent en échec ne doit pas interrompre les autres
+        error = f"{type(exc).__name__}: {exc}"
+    with lock:
+        samples.append({"app": app, "action": action, "latency_s": time.perf_counter() - start, "error": error})
+    return error is None
+
+
+def simulate_agent(app, agent_id, args, samples, lock):
+    """Une session : premier affichage, ouverture, puis ``iterations`` interactions."""
+    rng = random.Random(args.graine + agent_id)
+    scenario = SCENARIOS[app](rng, args)
+    at = AppTest.from_file(scenario.script, default_timeout=RERUN_TIMEOUT)
+    if not _timed_run(at, app, "chargement", samples, lock):
+        return
+    scenario.open(at)
+    if not _timed_run(at, app, "ouverture", samples, lock):
+        return
+    for _ in range(args.iterations):
+        time.sleep(rng.uniform(0, args.pause))
+        try:
+            scenario.step(at)
+        except LookupError as exc:
+            with lock:
+                samples.append({"app": app, "action": "interaction", "latency_s": 0.0, "error": str(exc)})
+            return
+        _timed_run(at, app, "interaction", samples, lock)
+
+
+def peak_rss_mb():
+    """Pic de mémoire résidente du processus (ru_maxrss est en Ko sous Linux, en octets sous macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 ** 2 if sys.platform == "darwin" else 1024)
+
+
+def summarize(samples):
+    """Latences par application et type d'action (les reruns en erreur sont comptés à part).
+
+    Les erreurs du banc (``is_harness_error``) ne comptent ni dans les reruns ni dans les erreurs.
+    """
+    report = {}
+    for app in sorted({s["app"] for s in samples}):
+        harness = sorted({s["error"] for s in samples if s["app"] == app and is_harness_error(s["error"])})
+        rows = [s for s in samples if s["app"] == app and not is_harness_error(s["error"])]
+        ok = np.array([s["latency_s"] for s in rows if s["error"] is None])
+        entry = {"reruns": len(rows), "erreurs": len(rows) - len(ok),
+                 "erreurs_banc": sum(1 for s in samples if s["app"] == app and is_harness_error(s["error"])),
+                 "exemples_erreurs_banc": harness[:3]}
+        if len(ok):
+            entry.update({f"p{p}_s": float(np.percentile(ok, p)) for p in PERCENTILES})
+            entry["moyenne_s"] = float(ok.mean())
+            entry["par_action"] = {
+                action: float(statistics.median(s["latency_s"] for s in rows if s["action"] == action and s["error"] is None))
+                for action in sorted({s["action"] for s in rows if s["error"] is None})
+            }
+        entry["exemples_erreurs"] = sorted({s["error"] for s in rows if s["error"]})[:3]
+        report[app] = entry
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge SamaStat (sessions Streamlit simulées).")
+    parser.add_argument("--app", action="append", choices=sorted(SCENARIOS),
+                        help="Application à solliciter (répétable ; défaut : toutes)")
+    parser.add_argument("--utilisateurs", type=int, default=DEFAULT_USERS, help="Agents simultanés par application")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="Interactions par agent")
+    parser.add_argument("--pause", type=float, default=0.5, help="Temps de réflexion maximal entre deux interactions (s)")
+    parser.add_argument("--login", help="Compte utilisé pour la connexion à l'application mairie")
+    parser.add_argument("--mot-de-passe", dest="mot_de_passe", help="Mot de passe de ce compte")
+    parser.add_argument("--mot-de-passe-app", dest="mot_de_passe_app", default=os.environ.get(APP_PASSWORD_ENV),
+                        help=f"Mot de passe de app.py (défaut : variable {APP_PASSWORD_ENV})")
+    parser.add_argument("--graine", type=int, default=0)
+    parser.add_argument("--output", help="Fichier JSON du rapport")
+    args = parser.parse_args(argv)
+
+    apps = args.app or sorted(SCENARIOS)
+    if "app" in apps and not args.mot_de_passe_app:
+        parser.error(f"mot de passe de app.py requis : --mot-de-passe-app ou variable {APP_PASSWORD_ENV}")
+    samples, lock = [], threading.Lock()
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.utilisateurs * len(apps), thread_name_prefix="agent") as pool:
+        futures = [pool.submit(simulate_agent, app, i, args, samples, lock)
+                   for app in apps for i in range(args.utilisateurs)]
+        for future in futures:
+            future.result()
+    duration = time.perf_counter() - start
+
+    report = {
+        "utilisateurs": args.utilisateurs,
+        "iterations": args.iterations,
+        "duree_s": round(duration, 3),
+        "reruns_par_s": round(len(samples) / duration, 2) if duration else None,
+        "rss_initial_mb": round(rss_before, 1),
+        "rss_pic_mb": round(peak_rss_mb(), 1),
+        "applications": summarize(samples),
+    }
+    print(f"{args.utilisateurs} agent(s) x {len(apps)} application(s), {len(samples)} reruns en {duration:.1f}s")
+    for app, entry in report["applications"].items():
+        latencies = " ".join(f"p{p}={entry[f'p{p}_s'] * 1000:.0f}ms" for p in PERCENTILES if f"p{p}_s" in entry)
+        print(f"  {app:<10} {entry['reruns']:>5} reruns  {latencies}  erreurs={entry['erreurs']}"
+              f"  (banc AppTest : {entry['erreurs_banc']})")
+        for error in entry["exemples_erreurs"]:
+            print(f"             ⚠️ {error[:120]}")
+    print(f"RSS : {report['rss_initial_mb']} Mo au départ, pic {report['rss_pic_mb']} Mo")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,82 +1,23 @@
 import streamlit as st
-import json
-import bcrypt
-import os
-import pandas as pd
 import matplotlib.pyplot as plt
 
+from samastat.auth import init_session, is_admin, logout_button, show_admin_panel, show_login as show_login_form, show_welcome_page
+from samastat.instrumentation import begin_rerun, end_rerun, show_perf_panel
+from samastat.mairie import DOMAIN_WEIGHTINGS, communes_table, domain_stats, load_communes, save_communes
+
 # --- PARAMÈTRES ---
-LOGO_PATH = "logo.png"
-USER_FILE = "users.json"
-COMMUNE_FILE = "communes.json"
-
-# --- UTILISATEURS ---
-def load_users():
-    if not os.path.exists(USER_FILE):
-        return {}
-    with open(USER_FILE, "r") as f:
-        return json.load(f)
-
-def save_users(users):
-    with open(USER_FILE, "w") as f:
-        json.dump(users, f)
-
-def hash_password(password: str) -> bytes:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt())
-
-def check_password(password: str, hashed: bytes) -> bool:
-    return bcrypt.checkpw(password.encode(), hashed)
-
-def verify_user(username, password):
-    users = load_users()
-    if username not in users:
-        return False
-    hashed = users[username].encode('utf-8')
-    return check_password(password, hashed)
-
-# --- COMMUNES ---
-def load_communes():
-    if os.path.exists(COMMUNE_FILE):
-        with open(COMMUNE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
-
-def save_communes(data):
-    with open(COMMUNE_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-
-# --- PAGE D'ACCUEIL ---
-def show_welcome_page():
-    st.set_page_config(page_title="SamaStat Mairie", layout="centered")
-    st.image(LOGO_PATH, width=250)
-    st.title("Bienvenue sur SamaStat Mairie")
-    st.markdown(
-        "### Votre plateforme de veille statistique au service des collectivités locales.\n"
-        "Accédez à des indicateurs clés et rapports pour mieux piloter vos actions à Dakar, Thiès, Diourbel, Mbour et Louga."
-    )
-    st.info("Veuillez vous connecter pour accéder aux données.")
+PRESENTATION = (
+    "### Votre plateforme de veille statistique au service des collectivités locales.\n"
+    "Accédez à des indicateurs clés et rapports pour mieux piloter vos actions à Dakar, Thiès, Diourbel, Mbour et Louga."
+)
 
 # --- CONNEXION ---
 def show_login():
-    st.sidebar.header("Connexion")
-    username = st.sidebar.text_input("Nom d'utilisateur")
-    password = st.sidebar.text_input("Mot de passe", type="password")
-    if st.sidebar.button("Se connecter"):
-        if verify_user(username, password):
-            st.session_state.logged_in = True
-            st.session_state.username = username
-            st.success(f"Bienvenue {username} ! Vous êtes connecté.")
-            st.experimental_rerun()
-        else:
-            st.error("Nom d'utilisateur ou mot de passe incorrect.")
+    show_login_form("Connexion")
 
+    # Sans connexion, aucune réinitialisation directe : elle permettrait de prendre n'importe quel compte.
     if st.sidebar.button("Mot de passe oublié ?"):
-        new_pass = st.sidebar.text_input("Nouveau mot de passe", type="password")
-        if username and new_pass:
-            users = load_users()
-            users[username] = hash_password(new_pass).decode('utf-8')
-            save_users(users)
-            st.sidebar.success("Mot de passe réinitialisé avec succès !")
+        st.sidebar.info("Contactez un administrateur : il peut recréer votre compte depuis la Zone Admin.")
 
 # --- APPLICATION PRINCIPALE ---
 def show_main_app():
@@ -85,9 +26,11 @@ def show_main_app():
 
     # --- Chargement des données communes
     communes_data = load_communes()
-    df = pd.DataFrame(communes_data).T
-    df['Commune'] = df.index
-    df.reset_index(drop=True, inplace=True)
+    df = communes_table(communes_data)
+    if "Domaine" not in df:
+        st.info("Aucune commune renseignée dans communes.json.")
+        logout_button("Se déconnecter", container=st)
+        return
 
     # --- Filtrage Domaine
     domaines = df['Domaine'].unique().tolist()
@@ -106,10 +49,13 @@ def show_main_app():
     )
 
     # --- Graphique Population
-    domaine_stats = df.groupby("Domaine").agg({
-        "Population": "sum",
-        "Taux Vaccination (%)": "mean"
-    }).reset_index()
+    # Taux par domaine pondérés par la population (ou non), précalculés par le planificateur.
+    weighting = st.radio("⚖️ Pondération des taux :", list(DOMAIN_WEIGHTINGS), horizontal=True)
+    domaine_stats = domain_stats(communes_data, weighting)
+    if selected_domaine != "Tous":
+        domaine_stats = domaine_stats.loc[[selected_domaine]]
+    domaine_stats = domaine_stats.reset_index()
+    st.dataframe(domaine_stats, hide_index=True)
 
     st.markdown("### 📈 Population par domaine")
     st.bar_chart(domaine_stats.set_index("Domaine")["Population"])
@@ -148,7 +94,7 @@ def show_main_app():
             communes_data[selected_commune][event_type + "s"] += int(nombre)
             save_communes(communes_data)
             st.success(f"{nombre} {event_type.lower()}(s) ajouté(s) à {selected_commune}.")
-            st.experimental_rerun()
+            st.rerun()
 
     # --- Satisfaction
     st.markdown("### ✨ Votre satisfaction")
@@ -156,19 +102,23 @@ def show_main_app():
     st.write(f"Merci pour votre note : {satisfaction} ⭐")
 
     # --- Déconnexion
-    if st.button("Se déconnecter"):
-        st.session_state.logged_in = False
-        st.experimental_rerun()
+    logout_button("Se déconnecter", container=st)
 
 # --- FONCTION PRINCIPALE ---
 def main():
-    if "logged_in" not in st.session_state:
-        st.session_state.logged_in = False
+    begin_rerun("samastat_mairie_accueil_export_v2")
+    init_session()
     if not st.session_state.logged_in:
-        show_welcome_page()
+        show_welcome_page(PRESENTATION)
         show_login()
     else:
         show_main_app()
+    if is_admin():
+        st.sidebar.markdown("---")
+        with st.sidebar.expander("🔧 Zone Admin"):
+            show_admin_panel()
+    show_perf_panel()
+    end_rerun()
 
 if __name__ == "__main__":
     main()
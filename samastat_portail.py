@@ -0,0 +1,33 @@
+"""Point d'entrée unique : les tableaux de bord SamaStat comme pages d'une seule application.
+
+    streamlit run samastat_portail.py
+
+Un seul processus Streamlit sert toutes les pages : pandas, plotly et scikit-learn ne
+sont chargés qu'une fois, et les caches de données et de figures (``st.cache_data``,
+``st.cache_resource``, ``@shared_dataset``) sont partagés d'une page à l'autre.
+"""
+import os
+
+import streamlit as st
+
+from samastat.prechauffage import start_warm_up
+
+PAGES = {
+    "Collectivités": [
+        st.Page("samastat_app_mairie.py", title="Mairie", icon="🏛️", url_path="mairie", default=True),
+    ],
+    "Agriculture": [
+        st.Page("app_saed.py", title="SAED", icon="🌾", url_path="saed"),
+    ],
+    "Éducation": [
+        st.Page("samastat_module_scolaire_okk.py", title="Scolaire", icon="🎓", url_path="scolaire"),
+    ],
+    "Territoires": [
+        st.Page("app.py", title="Régions", icon="🗺️", url_path="regions"),
+    ],
+}
+
+if os.environ.get("SAMASTAT_PRECHAUFFAGE") == "1":
+    start_warm_up()
+
+st.navigation(PAGES).run()